@@ -5,8 +5,8 @@ a = Analysis(
     ['run_server.py'],
     pathex=[],
     binaries=[],
-    datas=[('templates', 'templates'), ('static', 'static'), ('instance', 'instance')],
-    hiddenimports=['waitress', 'flask_sqlalchemy', 'flask_migrate', 'jinja2'],
+    datas=[('templates', 'templates'), ('static', 'static'), ('instance', 'instance'), ('migrations', 'migrations')],
+    hiddenimports=['waitress', 'flask_sqlalchemy', 'flask_migrate', 'jinja2', 'logging.config'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
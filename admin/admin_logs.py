@@ -1,9 +1,19 @@
-from flask import Blueprint, render_template, request, Response, jsonify
-from sqlalchemy import or_
-from datetime import datetime
+from flask import Blueprint, render_template, request, Response, jsonify, redirect, url_for, flash, session, stream_with_context
 import csv
+import io
+import zlib
 
 from models import db, OperationLog
+from utils.log_archive import archive_old_logs, list_archives, search_archived_logs
+from utils.log_query import (
+    apply_log_filters,
+    apply_keyset,
+    filter_signature,
+    get_filtered_count,
+    get_total_count,
+    make_cursor,
+    parse_cursor
+)
 
 admin_logs_bp = Blueprint('admin_logs', __name__)
 
@@ -38,49 +48,34 @@ def logs_data():
     date_from = request.args.get('date_from', '').strip()
     date_to   = request.args.get('date_to', '').strip()
 
+    # keyset 游標（前端翻到下一頁時帶上一頁最後一筆的 timestamp/id）
+    cursor = parse_cursor(request.args.get('after_ts', ''), request.args.get('after_id', ''))
+
     # 排序
     order_column_index = request.args.get('order[0][column]', '0')
     order_dir = request.args.get('order[0][dir]', 'desc')
     columns = ['timestamp', 'user_type', 'user_id', 'action', 'ip_address']
     order_column = columns[int(order_column_index)] if order_column_index.isdigit() else 'timestamp'
 
-    q = OperationLog.query
-
-    # 自訂篩選
-    if user_type:
-        q = q.filter(OperationLog.user_type == user_type)
-
-    if keyword:
-        like = f"%{keyword}%"
-        q = q.filter(or_(
-            OperationLog.action.ilike(like),
-            OperationLog.ip_address.ilike(like)
-        ))
-
-    if date_from:
-        try:
-            dt_from = datetime.strptime(date_from, "%Y-%m-%d")
-            q = q.filter(OperationLog.timestamp >= dt_from)
-        except Exception:
-            pass
-
-    if date_to:
-        try:
-            dt_to = datetime.strptime(date_to, "%Y-%m-%d").replace(hour=23, minute=59, second=59)
-            q = q.filter(OperationLog.timestamp <= dt_to)
-        except Exception:
-            pass
-
-    # 全量與篩選後數量
-    total_records = OperationLog.query.count()
-    filtered_records = q.count()
+    q = apply_log_filters(OperationLog.query, user_type, keyword, date_from, date_to)
 
-    # 排序
-    col_attr = getattr(OperationLog, order_column)
-    q = q.order_by(col_attr.desc() if order_dir == 'desc' else col_attr.asc())
+    # 全量與篩選後數量（皆有快取）
+    total_records = get_total_count()
+    signature = filter_signature(user_type, keyword, date_from, date_to)
+    filtered_records = total_records if not any(signature) else get_filtered_count(q, signature)
+
+    if order_column == 'timestamp':
+        # 預設排序：(timestamp, id) keyset 分頁，有游標就不用 OFFSET
+        q = apply_keyset(q, cursor, descending=(order_dir == 'desc'))
+        if not cursor:
+            q = q.offset(start)
+    else:
+        col_attr = getattr(OperationLog, order_column)
+        q = q.order_by(col_attr.desc() if order_dir == 'desc' else col_attr.asc(), OperationLog.id.desc())
+        q = q.offset(start)
 
     # 分頁
-    logs = q.offset(start).limit(length).all()
+    logs = q.limit(length).all()
 
     data = []
     for log in logs:
@@ -96,32 +91,112 @@ def logs_data():
         'draw': draw,
         'recordsTotal': total_records,
         'recordsFiltered': filtered_records,
-        'data': data
+        'data': data,
+        'cursor': make_cursor(logs[-1]) if logs and order_column == 'timestamp' else None
     })
 
 # ---------------------------
-# 匯出 CSV（後端全量）
+# 匯出 CSV（後端，套用與 logs_data 相同的篩選；gzip=1 輸出 .csv.gz）
 # ---------------------------
+EXPORT_CHUNK_ROWS = 1000
+
 @admin_logs_bp.route('/logs/export')
 def export_logs_csv():
-    q = OperationLog.query.order_by(OperationLog.timestamp.desc())
-
-    class Echo:
-        def write(self, value):
-            return value
-
-    def generate():
-        writer = csv.writer(Echo())
-        yield writer.writerow(["時間", "使用者類型", "使用者ID", "操作", "IP"])
-        for log in q:
-            yield writer.writerow([
-                log.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-                log.user_type,
-                log.user_id,
-                log.action,
-                log.ip_address or ""
+    user_type = request.args.get('user_type', '').strip()
+    keyword   = request.args.get('keyword', '').strip()
+    date_from = request.args.get('date_from', '').strip()
+    date_to   = request.args.get('date_to', '').strip()
+    use_gzip  = request.args.get('gzip', '') in ('1', 'true', 'on')
+
+    # 只選需要的欄位，並以 server-side cursor 分批取回，記憶體不隨筆數成長
+    q = db.session.query(
+        OperationLog.timestamp,
+        OperationLog.user_type,
+        OperationLog.user_id,
+        OperationLog.action,
+        OperationLog.ip_address
+    )
+    q = apply_log_filters(q, user_type, keyword, date_from, date_to)
+    q = q.order_by(OperationLog.timestamp.desc(), OperationLog.id.desc()) \
+         .execution_options(stream_results=True) \
+         .yield_per(EXPORT_CHUNK_ROWS)
+
+    def generate_csv():
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(["時間", "使用者類型", "使用者ID", "操作", "IP"])
+        rows_in_buf = 0
+        for ts, u_type, u_id, action, ip in q:
+            writer.writerow([
+                ts.strftime("%Y-%m-%d %H:%M:%S") if ts else "",
+                u_type,
+                u_id,
+                action,
+                ip or ""
             ])
-
-    return Response(generate(),
+            rows_in_buf += 1
+            if rows_in_buf >= EXPORT_CHUNK_ROWS:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+                rows_in_buf = 0
+        yield buf.getvalue()
+
+    def generate_gzip():
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in generate_csv():
+            data = compressor.compress(chunk.encode('utf-8'))
+            if data:
+                yield data
+        yield compressor.flush()
+
+    if use_gzip:
+        return Response(stream_with_context(generate_gzip()),
+                        mimetype='application/gzip',
+                        headers={"Content-Disposition": "attachment; filename=operation_logs.csv.gz"})
+
+    return Response(stream_with_context(generate_csv()),
                     mimetype='text/csv',
                     headers={"Content-Disposition": "attachment; filename=operation_logs.csv"})
+
+# ---------------------------
+# 封存舊紀錄（gzip JSONL，存放於 instance/log_archive/）
+# ---------------------------
+@admin_logs_bp.route('/logs/archive', methods=['POST'])
+def archive_logs():
+    if 'admin' not in session:
+        return redirect(url_for('admin_auth.admin_login'))
+
+    days = request.form.get('retention_days', type=int)
+    try:
+        result = archive_old_logs(retention_days=days)
+        flash(f"✅ 已封存 {result['archived']} 筆 {result['cutoff']} 以前的操作紀錄", "success")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"❌ 封存失敗：{e}", "danger")
+    return redirect(url_for('admin_logs.view_logs'))
+
+# ---------------------------
+# 查詢封存紀錄（與 logs_data 相同的篩選條件）
+# ---------------------------
+@admin_logs_bp.route('/logs/archive/search')
+def search_archive():
+    if 'admin' not in session:
+        return jsonify({"error": "unauthorized"}), 403
+
+    limit = min(request.args.get('limit', 500, type=int), 5000)
+    records = search_archived_logs(
+        user_type=request.args.get('user_type', '').strip(),
+        keyword=request.args.get('keyword', '').strip(),
+        date_from=request.args.get('date_from', '').strip(),
+        date_to=request.args.get('date_to', '').strip(),
+        limit=limit
+    )
+    data = [[
+        r.get('timestamp') or '',
+        r.get('user_type'),
+        r.get('user_id'),
+        r.get('action'),
+        r.get('ip_address') or ''
+    ] for r in records]
+    return jsonify({'archives': list_archives(), 'data': data})
@@ -1,6 +1,19 @@
 # admin_users.py
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+import os
+
+from flask import (
+    Blueprint, render_template, request, redirect, url_for, flash, session, jsonify,
+    Response, stream_template, stream_with_context,
+)
 from models import db, User, Candidate
+from utils.account_generator import (
+    DEFAULT_PASSWORD_LENGTH, AccountGenerationError, create_accounts, group_by_grade, parse_class_plan, plan_accounts,
+)
+from utils.account_import import AccountImportError, import_user_file, summary_text
+from utils.import_pipeline import get_import_progress
+from utils.login_tokens import (
+    forget_token_uses, make_token, revoke_all_tokens, set_token_login_enabled, token_generation, token_login_enabled,
+)
 
 admin_users_bp = Blueprint("admin_users", __name__, url_prefix="/admin")
 
@@ -72,6 +85,7 @@ def delete_user(user_id):
         return redirect(url_for("admin_auth.admin_login"))
 
     user = User.query.get_or_404(user_id)
+    forget_token_uses([user.id])
     db.session.delete(user)
     db.session.commit()
     flash("✅ 帳號刪除成功", "info")
@@ -90,6 +104,7 @@ def delete_users():
     if ids:
         try:
             ids = [int(i) for i in ids]
+            forget_token_uses(ids)
             User.query.filter(User.id.in_(ids)).delete(synchronize_session=False)
             db.session.commit()
             flash(f"✅ 已成功刪除 {len(ids)} 個帳號", "success")
@@ -113,60 +128,115 @@ def import_users():
             flash("請選擇檔案", "danger")
             return redirect(url_for("admin_users.import_users"))
 
-        ext = file.filename.lower().split(".")[-1]
         try:
-            # CSV
-            if ext == "csv":
-                import csv, chardet
-                raw = file.read()
-                result = chardet.detect(raw)
-                encoding = result["encoding"] or "utf-8"
-                file.stream.seek(0)
-
-                reader = csv.DictReader(
-                    (line.decode(encoding, errors="ignore") for line in file.stream)
-                )
-                rows = list(reader)
-            else:
-                import pandas as pd
-                df = pd.read_excel(file, dtype=str, engine="openpyxl").fillna("")
-                rows = df.to_dict(orient="records")
+            report = import_user_file(file, job_id=request.form.get("job_id") or None)
+        except AccountImportError as e:
+            flash(f"❌ {e}", "danger")
+            return redirect(url_for("admin_users.import_users"))
         except Exception as e:
-            flash(f"❌ 讀取檔案失敗：{e}", "danger")
+            flash(f"❌ 匯入失敗並已回滾：{e}", "danger")
             return redirect(url_for("admin_users.import_users"))
 
-        required_cols = {"帳號", "密碼"}
-        if not rows or not required_cols.issubset(rows[0].keys()):
-            flash(f"❌ 匯入失敗：缺少必要欄位 {required_cols}", "danger")
-            return redirect(url_for("admin_users.import_users"))
+        flash(summary_text(report), "success")
+        flash(f"⏱️ {report.timing_text()}", "info")
+        return redirect(url_for("admin_users.user_list"))
 
-        created, updated, skipped = 0, 0, 0
-        from models import User
-        try:
-            for row in rows:
-                username = (row.get("帳號") or "").strip()
-                password = str(row.get("密碼") or "").strip() or "1234"
-
-                if not username:
-                    skipped += 1
-                    continue
-
-                user = User.query.filter_by(username=username).first()
-                if user:
-                    user.set_password(password)
-                    updated += 1
-                else:
-                    user = User(username=username)
-                    user.set_password(password)
-                    db.session.add(user)
-                    created += 1
+    return render_template("admin_import_users.html")
 
-            db.session.commit()
-            flash(f"✅ 匯入完成：新增 {created} 筆、更新 {updated} 筆、略過 {skipped} 筆", "success")
+
+# ----------------------
+# 批次產生帳號（隨機密碼 + 依年級分組的帳密單）
+# ----------------------
+@admin_users_bp.route("/users/generate", methods=["GET", "POST"], endpoint="generate_users")
+def generate_users():
+    if "admin" not in session:
+        return redirect(url_for("admin_auth.admin_login"))
+
+    form = request.form
+    if request.method == "POST":
+        try:
+            class_plan = parse_class_plan(form.get("class_plan", ""))
+            accounts = plan_accounts(
+                prefix=form.get("prefix", "").strip(),
+                start=int(form.get("start") or 1),
+                width=int(form.get("width") or 3),
+                count=int(form.get("count") or 0),
+                class_plan=class_plan,
+                password_length=int(form.get("password_length") or DEFAULT_PASSWORD_LENGTH),
+            )
+            report, written = create_accounts(accounts, reset_existing=form.get("reset_existing") == "1",
+                                              job_id=form.get("job_id") or None)
+        except (AccountGenerationError, ValueError) as e:
+            flash(f"❌ {e}", "danger")
+            return render_template("admin_generate_users.html", form=form, default_length=DEFAULT_PASSWORD_LENGTH)
         except Exception as e:
-            db.session.rollback()
-            flash(f"❌ 匯入失敗並已回滾：{e}", "danger")
+            flash(f"❌ 產生失敗並已回滾：{e}", "danger")
+            return render_template("admin_generate_users.html", form=form, default_length=DEFAULT_PASSWORD_LENGTH)
 
-        return redirect(url_for("admin_users.user_list"))
+        # 帳密單含明文密碼：邊產生邊送出，且不讓瀏覽器 / proxy 快取
+        sheet = stream_template("admin_credential_sheet.html",
+                                groups=group_by_grade(written),
+                                total=len(written),
+                                summary=summary_text(report),
+                                timing=report.timing_text(),
+                                login_url=url_for("auth.login", _external=True))
+        return Response(stream_with_context(sheet), mimetype="text/html",
+                        headers={"Cache-Control": "no-store"})
 
-    return render_template("admin_import_users.html")
+    return render_template("admin_generate_users.html", form=form, default_length=DEFAULT_PASSWORD_LENGTH)
+
+
+# 匯入進度（帳號 / 教職員匯入頁面輪詢）
+@admin_users_bp.route("/import/progress/<job_id>", endpoint="import_progress")
+def import_progress(job_id):
+    if "admin" not in session:
+        return jsonify({"error": "unauthorized"}), 403
+
+    progress = get_import_progress(job_id)
+    if progress is None:
+        return jsonify({"error": "not found"}), 404
+    return jsonify(progress)
+
+
+# ----------------------
+# QR 登入單（列印後附在家長通知單上）
+# ----------------------
+@admin_users_bp.route("/users/login_tokens", endpoint="login_tokens")
+def login_tokens():
+    if "admin" not in session:
+        return redirect(url_for("admin_auth.admin_login"))
+
+    prefix = request.args.get("prefix", "").strip()
+    q = db.session.query(User.id, User.username)
+    if prefix:
+        q = q.filter(User.username.startswith(prefix, autoescape=True))
+    generation = token_generation()
+    cards = [
+        {"username": username,
+         "url": url_for("auth.token_login", token=make_token(user_id, generation), _external=True)}
+        for user_id, username in q.order_by(User.username).all()
+    ]
+    return render_template("admin_login_tokens.html",
+                           cards=cards,
+                           prefix=prefix,
+                           enabled=token_login_enabled(),
+                           generation=generation,
+                           stable_secret=bool(os.getenv("SECRET_KEY")))
+
+
+@admin_users_bp.route("/users/login_tokens/settings", methods=["POST"], endpoint="login_tokens_settings")
+def login_tokens_settings():
+    if "admin" not in session:
+        return redirect(url_for("admin_auth.admin_login"))
+
+    action = request.form.get("action")
+    if action == "enable":
+        set_token_login_enabled(True)
+        flash("✅ 已開放 QR 登入", "success")
+    elif action == "disable":
+        set_token_login_enabled(False)
+        flash("⏸️ 已關閉 QR 登入", "info")
+    elif action == "revoke":
+        generation = revoke_all_tokens()
+        flash(f"🔄 已重新產生登入碼（第 {generation} 批），先前印出的 QR code 全部失效", "warning")
+    return redirect(url_for("admin_users.login_tokens"))
@@ -2,6 +2,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash
 from models import Admin
 from utils.helpers import add_log   # ✅ 記得匯入
+from utils.password_verifier import check_login
 from models import db, Admin
 
 
@@ -15,7 +16,7 @@ def admin_login():
         password = request.form.get('password', '').strip()
         admin = Admin.query.filter_by(username=username).first()
 
-        if admin and admin.check_password(password):
+        if check_login(admin, password, use_pool=False):  # 管理員不排隊，但一樣會升級舊雜湊
             session['admin_id'] = admin.id
             session['admin'] = True  # 供其他檢查用
             add_log("admin", admin.id, "管理員登入")
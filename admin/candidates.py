@@ -1,10 +1,9 @@
 # admin_candidates.py
-from flask import Blueprint, render_template, redirect, url_for, request, flash, session
-from models import db, Candidate, VotePhase, Vote, User
-import pandas as pd
-import csv
-import chardet
-from sqlalchemy import func
+from flask import Blueprint, render_template, redirect, url_for, request, flash, session, jsonify
+from models import db, Candidate, Vote, User
+from utils.candidate_import import CandidateImportError, import_candidate_file
+from utils.login_tokens import forget_token_uses
+from utils.phase_service import get_first_phase_id
 
 admin_candidates_bp = Blueprint('admin_candidates', __name__, url_prefix='/admin')
 
@@ -20,80 +19,33 @@ def import_candidates():
             flash('請選擇檔案', 'danger')
             return redirect(url_for('admin_candidates.admin_import_candidates'))
 
-        ext = file.filename.lower().split('.')[-1]
-
-        try:
-            # CSV
-            if ext == "csv":
-                raw = file.read()
-                result = chardet.detect(raw)
-                encoding = result["encoding"] or "utf-8"
-                file.stream.seek(0)
-
-                reader = csv.DictReader(
-                    (line.decode(encoding, errors="ignore") for line in file.stream)
-                )
-                rows = list(reader)
-
-            # Excel
-            else:
-                df = pd.read_excel(file, dtype=str, engine="openpyxl").fillna("")
-                rows = df.to_dict(orient="records")
-
-        except Exception as e:
-            flash(f'❌ 讀取檔案失敗：{e}', 'danger')
-            return redirect(url_for('admin_candidates.admin_import_candidates'))
-
-        # ✅ 新規則：只需要「班級」+「家長姓名」
-        required_cols = {'班級', '家長姓名'}
-        if not rows or not required_cols.issubset(rows[0].keys()):
-            flash(f'❌ 匯入失敗：缺少必要欄位 {required_cols}', 'danger')
-            return redirect(url_for('admin_candidates.admin_import_candidates'))
-
-        first_phase_id = db.session.query(func.min(VotePhase.id)).scalar()
+        first_phase_id = get_first_phase_id()
         if not first_phase_id:
             flash('❌ 尚未建立任何投票階段，請先建立。', 'danger')
             return redirect(url_for('admin_candidates.admin_import_candidates'))
 
-        created, updated, skipped = 0, 0, 0
-
+        wants_json = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
         try:
-            for row in rows:
-                class_name = (row.get('班級') or '').strip()
-                parent_name = (row.get('家長姓名') or '').strip()
-
-                if not class_name or not parent_name:
-                    skipped += 1
-                    continue
-
-                # 查 Candidate 是否存在
-                cand = Candidate.query.filter_by(
-                    class_name=class_name,
-                    parent_name=parent_name,
-                    phase_id=first_phase_id
-                ).first()
-
-                if cand:
-                    cand.class_name = class_name
-                    cand.parent_name = parent_name
-                    cand.name = parent_name
-                    updated += 1
-                else:
-                    cand = Candidate(
-                        class_name=class_name,
-                        parent_name=parent_name,
-                        name=parent_name,
-                        phase_id=first_phase_id
-                    )
-                    db.session.add(cand)
-                    created += 1
-
-            db.session.commit()
-            flash(f'✅ 匯入完成：新增 {created} 筆、更新 {updated} 筆、略過 {skipped} 筆', 'success')
-
+            report = import_candidate_file(file, first_phase_id)
+        except CandidateImportError as e:
+            if wants_json:
+                return jsonify(ok=False, error=str(e)), 400
+            flash(f'❌ {e}', 'danger')
+            return redirect(url_for('admin_candidates.admin_import_candidates'))
         except Exception as e:
-            db.session.rollback()
+            if wants_json:
+                return jsonify(ok=False, error=f'匯入失敗並已回滾：{e}'), 500
             flash(f'❌ 匯入失敗並已回滾：{e}', 'danger')
+            return redirect(url_for('admin_candidates.admin_import_candidates'))
+
+        if wants_json:
+            return jsonify(ok=True, **report.to_dict())
+
+        counts = report.counts
+        flash(f'✅ 匯入完成：新增 {counts.get("created", 0)} 筆、更新 {counts.get("updated", 0)} 筆、'
+              f'未變更 {counts.get("unchanged", 0)} 筆、略過 {counts.get("skipped", 0)} 筆、'
+              f'檔案內重複 {counts.get("duplicates", 0)} 筆', 'success')
+        flash(f'⏱️ {report.timing_text()}', 'info')
 
         return redirect(url_for('admin_candidates.admin_import_candidates'))
 
@@ -121,7 +73,7 @@ def admin_add_candidate():
         username = request.form['username']
         password = request.form['password']
 
-        first_phase_id = db.session.query(func.min(VotePhase.id)).scalar()
+        first_phase_id = get_first_phase_id()
 
         cand = Candidate(
             class_name=class_name,
@@ -180,6 +132,7 @@ def admin_delete_candidate(candidate_id):
     Vote.query.filter(Vote.candidate_id == candidate_id).delete(synchronize_session=False)
 
     if user:
+        forget_token_uses([user.id])
         db.session.delete(user)
     db.session.delete(cand)
     db.session.commit()
@@ -200,6 +153,7 @@ def admin_delete_candidates():
             ids = [int(i) for i in ids]
             Vote.query.filter(Vote.candidate_id.in_(ids)).delete(synchronize_session=False)
             users = User.query.filter(User.candidate_id.in_(ids)).all()
+            forget_token_uses([u.id for u in users])
             for u in users:
                 db.session.delete(u)
             Candidate.query.filter(Candidate.id.in_(ids)).delete(synchronize_session=False)
@@ -1,12 +1,10 @@
-from flask import Blueprint, render_template, redirect, url_for, session
-from models import Candidate, Vote, VotePhase, StaffVote
+from flask import Blueprint, render_template, redirect, url_for, session, request, jsonify
+from models import Candidate
+from utils.dashboard_stats import DASHBOARD_STATS_TTL, get_dashboard_stats
+from utils.phase_service import get_current_phase, get_phases
 
 admin_dashboard_bp = Blueprint('admin_dashboard', __name__, url_prefix='/admin')
 
-# ✅ 補上這行
-def get_current_phase():
-    return VotePhase.query.filter_by(is_open=True).first()
-
 # ----------------------
 # 管理員主控台
 # ----------------------
@@ -15,20 +13,23 @@ def admin_dashboard():
     if 'admin_id' not in session:  # ✅ 修正這一行
         return redirect(url_for('admin_auth.admin_login'))
 
-    candidate_count = Candidate.query.count()
-    vote_count = Vote.query.count()
-    staff_vote_yes = StaffVote.query.filter_by(vote_result='贊成').count()
-    staff_vote_no = StaffVote.query.filter_by(vote_result='反對').count()
-    phases = VotePhase.query.all()
-    current_phase = get_current_phase()
+    stats = get_dashboard_stats(request.args.get('phase_id', type=int))
 
     return render_template('admin_dashboard.html',
-                           candidate_count=candidate_count,
-                           vote_count=vote_count,
-                           agree_count=staff_vote_yes,
-                           disagree_count=staff_vote_no,
-                           phases=phases,
-                           current_phase=current_phase)
+                           stats=stats,
+                           refresh_seconds=DASHBOARD_STATS_TTL,
+                           phases=get_phases(),
+                           current_phase=get_current_phase())
+
+# ----------------------
+# 主控台統計（自動更新用 JSON）
+# ----------------------
+@admin_dashboard_bp.route('/dashboard/stats')
+def dashboard_stats():
+    if 'admin_id' not in session:
+        return jsonify({"error": "unauthorized"}), 403
+
+    return jsonify(get_dashboard_stats(request.args.get('phase_id', type=int)).to_dict())
 
 # ----------------------
 # 點名名單
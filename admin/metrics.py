@@ -0,0 +1,62 @@
+import hmac
+import os
+import time
+
+from flask import Blueprint, render_template, redirect, url_for, session, request, Response, current_app, flash
+
+from utils.metrics import metrics, LATENCY_BUCKETS_MS
+
+admin_metrics_bp = Blueprint('admin_metrics', __name__)
+
+
+def _extra_gauges():
+    """其他子系統的即時數值（例如操作紀錄背景寫入器、登入密碼驗證 pool）。"""
+    gauges = {}
+    writer = current_app.extensions.get("oplog_writer")
+    if writer is not None:
+        for key, value in writer.stats().items():
+            gauges[f"oplog_writer_{key}"] = value
+    verifier = current_app.extensions.get("password_verifier")
+    if verifier is not None:
+        for key, value in verifier.stats().items():
+            gauges[f"login_verifier_{key}"] = value
+    return gauges
+
+
+# ✅ 效能監控頁（僅管理員）
+@admin_metrics_bp.route('/metrics', methods=['GET'], endpoint='metrics_page')
+def metrics_page():
+    if 'admin' not in session:
+        return redirect(url_for('admin_auth.admin_login'))
+
+    return render_template('admin_metrics.html',
+                           rows=metrics.snapshot(),
+                           in_flight=metrics.in_flight,
+                           gauges=_extra_gauges(),
+                           buckets=LATENCY_BUCKETS_MS,
+                           uptime_seconds=int(time.time() - metrics.started_at),
+                           pid=os.getpid())
+
+
+# ✅ Prometheus 文字格式（管理員 session 或 METRICS_TOKEN）
+@admin_metrics_bp.route('/metrics/prometheus', methods=['GET'], endpoint='metrics_prometheus')
+def metrics_prometheus():
+    token = current_app.config.get('METRICS_TOKEN')
+    supplied = request.args.get('token') or request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    authorized = 'admin' in session or (token and supplied and hmac.compare_digest(token, supplied))
+    if not authorized:
+        return Response("unauthorized\n", status=403, mimetype='text/plain')
+
+    return Response(metrics.prometheus_text(_extra_gauges()),
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# ✅ 重設統計
+@admin_metrics_bp.route('/metrics/reset', methods=['POST'], endpoint='metrics_reset')
+def metrics_reset():
+    if 'admin' not in session:
+        return redirect(url_for('admin_auth.admin_login'))
+
+    metrics.reset()
+    flash('✅ 效能統計已重設（僅限此 worker）', 'success')
+    return redirect(url_for('admin_metrics.metrics_page'))
@@ -1,22 +1,17 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, send_file
+from flask import (
+    Blueprint, render_template, redirect, url_for, flash, request, send_file, session, jsonify, current_app,
+)
 from models import db, VotePhase, Candidate, Vote
 from sqlalchemy import func
-import io
-import pandas as pd
+from utils.export_jobs import KINDS as EXPORT_KINDS, parse_key as parse_export_key
+from utils.phase_service import (
+    get_current_phase, get_first_phase, get_latest_closed_phase, get_next_phase, get_phase, get_phases,
+    invalidate_phases,
+)
 
 admin_promote_bp = Blueprint('admin_promote', __name__, url_prefix="/admin")
 
 
-# ✅ 取得最新結束階段
-def get_latest_closed_phase():
-    return VotePhase.query.filter_by(is_open=False).order_by(VotePhase.id.desc()).first()
-
-
-# ✅ 安全取得下一階段
-def get_next_phase(current_phase_id):
-    return VotePhase.query.filter(VotePhase.id > current_phase_id).order_by(VotePhase.id.asc()).first()
-
-
 # ✅ 取得票數與名次資料
 def get_vote_results_with_rank(phase_id):
     results = db.session.query(
@@ -43,7 +38,7 @@ def get_vote_results_with_rank(phase_id):
 @admin_promote_bp.route('/promote', methods=['GET'], endpoint='promote_page')
 def promote_page():
     phase_id = request.args.get('phase_id', type=int)
-    current_phase = VotePhase.query.get(phase_id) if phase_id else get_latest_closed_phase()
+    current_phase = get_phase(phase_id) if phase_id else get_latest_closed_phase()
 
     if not current_phase:
         flash("⚠️ 尚無可供檢視的階段", "warning")
@@ -80,20 +75,18 @@ def promote_page():
             tied_candidates = all_with_cutoff
             remaining_to_promote = promote_count - len(before_cutoff)
 
-    # ✅ 標記 auto promoted
+    # ✅ 標記 auto promoted（results 已是 Candidate 物件，不必逐筆重查）
     for c, _ in auto_promoted:
-        candidate = Candidate.query.get(c.id)
-        if candidate:
-            candidate.is_promoted = True
-            candidate.promote_type = 'auto'
+        c.is_promoted = True
+        c.promote_type = 'auto'
 
     db.session.commit()
 
-    actual_promoted_count = Candidate.query.filter_by(
-        phase_id=current_phase.id, is_promoted=True
-    ).count()
+    # commit 後物件皆已過期：一次重新載入本階段候選人，避免模板逐筆 refresh
+    phase_candidates = Candidate.query.filter_by(phase_id=current_phase.id).all()
+    actual_promoted_count = sum(1 for c in phase_candidates if c.is_promoted)
 
-    phases = VotePhase.query.order_by(VotePhase.id).all()
+    phases = get_phases()
 
     return render_template('admin_promote.html',
                            current_phase=current_phase,
@@ -113,7 +106,7 @@ def save_promoted_candidates():
     selected_ids = request.form.getlist('candidate_ids')  # 同票者手動勾選的 ID（字串）
     selected_ids = [int(x) for x in selected_ids]
 
-    phase = VotePhase.query.get(phase_id)
+    phase = get_phase(phase_id)
     if not phase:
         flash("❌ 找不到此階段", "danger")
         return redirect(url_for('admin_promote.promote_page'))
@@ -179,15 +172,18 @@ def save_promoted_candidates():
 
     promoted_candidates = Candidate.query.filter_by(phase_id=phase_id, is_promoted=True).all()
 
+    # 一次取出下一階段已存在的 (班級, 家長姓名)，避免逐筆查詢
+    existing_keys = set(
+        db.session.query(Candidate.class_name, Candidate.parent_name)
+        .filter(Candidate.phase_id == next_phase.id)
+        .all()
+    )
+
     added_count = 0
     for c in promoted_candidates:
-        exists = Candidate.query.filter_by(
-            class_name=c.class_name,
-            parent_name=c.parent_name,
-            phase_id=next_phase.id
-        ).first()
-        if exists:
+        if (c.class_name, c.parent_name) in existing_keys:
             continue
+        existing_keys.add((c.class_name, c.parent_name))
 
         # 🔥 確保 name 不為 NULL（有些系統只用 parent_name）
         safe_name = c.name or c.parent_name or "未命名"
@@ -218,99 +214,110 @@ def export_vote_results():
         flash("⚠️ 請指定要匯出的階段 (phase_id)", "warning")
         return redirect(url_for('admin_promote.promote_page'))
 
-    phase = VotePhase.query.get(phase_id)
+    phase = get_phase(phase_id)
     if not phase:
         flash("⚠️ 找不到指定階段", "warning")
         return redirect(url_for('admin_promote.promote_page'))
 
-    results = (
-        db.session.query(
-            Candidate,
-            func.count(Vote.id).label('vote_count')
-        )
-        .outerjoin(
-            Vote,
-            (Vote.candidate_id == Candidate.id) & (Vote.phase_id == phase.id)
-        )
-        .filter(Candidate.phase_id == phase.id)
-        .group_by(Candidate.id)
-        .order_by(func.count(Vote.id).desc(), Candidate.id.asc())
-        .all()
-    )
-
-    if not results:
+    if not Candidate.query.filter_by(phase_id=phase.id).first():
         flash("⚠️ 此階段無投票資料", "warning")
         return redirect(url_for('admin_promote.promote_page', phase_id=phase.id))
 
-    data = []
-    rank = 0
-    prev_votes = None
-    for idx, (c, votes) in enumerate(results, start=1):
-        if votes != prev_votes:
-            rank = idx
-            prev_votes = votes
-        data.append((rank, c.class_name, c.parent_name, int(votes)))
-
-    df = pd.DataFrame(data, columns=["名次", "班級", "家長姓名", "得票數"])
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        safe_sheet = f"{phase.name}投票結果"[:31]
-        df.to_excel(writer, index=False, sheet_name=safe_sheet)
-    output.seek(0)
-
-    return send_file(output,
-                     download_name=f"投票結果_{phase.name}_ID{phase.id}.xlsx",
-                     as_attachment=True)
+    return _send_export('vote_results', phase.id)
 
 
 # ✅ 匯出晉級名單
 @admin_promote_bp.route('/export_promoted_candidates', endpoint='export_promoted_candidates')
 def export_promoted_candidates():
     phase_id = request.args.get('phase_id', type=int)
-    if phase_id:
-        phase = VotePhase.query.get(phase_id)
-    else:
-        phase = VotePhase.query.filter_by(is_open=False).order_by(VotePhase.id.desc()).first()
+    phase = get_phase(phase_id) if phase_id else get_latest_closed_phase()
 
     if not phase:
         flash("⚠️ 找不到已結束的階段", "warning")
         return redirect(url_for('admin_promote.promote_page'))
 
-    candidates = Candidate.query.filter_by(phase_id=phase.id, is_promoted=True).order_by(Candidate.id).all()
-    if not candidates:
+    if not Candidate.query.filter_by(phase_id=phase.id, is_promoted=True).first():
         flash("⚠️ 該階段尚無晉級名單", "warning")
         return redirect(url_for('admin_promote.promote_page', phase_id=phase.id))
 
-    data = [(c.id, c.class_name, c.parent_name, c.promote_type or "auto") for c in candidates]
-    df = pd.DataFrame(data, columns=["ID", "班級", "家長姓名", "晉級方式"])
+    return _send_export('promoted', phase.id)
+
 
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='當選名單')
-    output.seek(0)
+# -------------------------------------------------
+# 📦 匯出背景工作（頁面：start → 輪詢 status → download）
+# -------------------------------------------------
+def _export_runner():
+    return current_app.extensions["export_jobs"]
+
+
+def _send_export_file(key):
+    return send_file(
+        _export_runner().path_for(key),
+        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        download_name=_export_runner().download_name(key),
+        as_attachment=True
+    )
+
+
+def _send_export(kind, phase_id=None):
+    # 沒有 JS 時的直接下載：資料未變就直接送快取檔，否則當場產生
+    return _send_export_file(_export_runner().build_now(kind, phase_id))
+
+
+@admin_promote_bp.route('/exports/start', methods=['POST'], endpoint='start_export')
+def start_export():
+    if 'admin' not in session:
+        return jsonify({"error": "unauthorized"}), 403
+
+    kind = request.form.get('kind', '')
+    phase_id = request.form.get('phase_id', type=int)
+    if kind not in EXPORT_KINDS:
+        return jsonify({"error": "unknown export"}), 400
+    if EXPORT_KINDS[kind].per_phase and not get_phase(phase_id):
+        return jsonify({"error": "找不到指定階段"}), 404
+
+    job = _export_runner().submit(kind, phase_id if EXPORT_KINDS[kind].per_phase else None)
+    job["download_url"] = url_for('admin_promote.download_export', key=job["key"])
+    return jsonify(job)
+
+
+@admin_promote_bp.route('/exports/status/<key>', endpoint='export_status')
+def export_status(key):
+    if 'admin' not in session:
+        return jsonify({"error": "unauthorized"}), 403
+    if not parse_export_key(key):
+        return jsonify({"error": "bad key"}), 400
+    return jsonify(_export_runner().status(key))
+
+
+@admin_promote_bp.route('/exports/download/<key>', endpoint='download_export')
+def download_export(key):
+    if 'admin' not in session:
+        return redirect(url_for('admin_auth.admin_login'))
+    if not parse_export_key(key) or _export_runner().status(key)["status"] != "done":
+        flash("⚠️ 匯出檔尚未完成或已過期，請重新匯出", "warning")
+        return redirect(url_for('admin_promote.promote_page'))
+    return _send_export_file(key)
 
-    return send_file(output,
-                     mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                     as_attachment=True,
-                     download_name=f'當選名單_{phase.name}_ID{phase.id}.xlsx')
 
 # ✅ 開啟下一階段
 # ✅ 開啟下一階段
 @admin_promote_bp.route('/open_next_phase', methods=['GET', 'POST'], endpoint='open_next_phase')
 def open_next_phase():
     # 🔍 找出目前開啟的階段
-    current_phase = VotePhase.query.filter_by(is_open=True).order_by(VotePhase.id).first()
+    current_phase = get_current_phase()
 
     if not current_phase:
         flash("⚠️ 沒有開啟中的階段", "warning")
         return redirect(url_for('admin_promote.promote_page'))
 
     # 🔐 關閉目前階段
-    current_phase.is_open = False
+    db.session.get(VotePhase, current_phase.id).is_open = False
     db.session.commit()
+    invalidate_phases()
 
     # ⏭️ 找下一個階段
-    next_phase = VotePhase.query.filter(VotePhase.id > current_phase.id).order_by(VotePhase.id).first()
+    next_phase = get_next_phase(current_phase.id)
 
     if not next_phase:
         flash("⚠️ 沒有下一階段可啟用", "warning")
@@ -325,8 +332,9 @@ def open_next_phase():
     db.session.commit()
 
     # ✅ 開啟下一階段
-    next_phase.is_open = True
+    db.session.get(VotePhase, next_phase.id).is_open = True
     db.session.commit()
+    invalidate_phases()
 
     flash(f"✅ 已關閉「{current_phase.name}」，並開啟下一階段：「{next_phase.name}」。請所有家長重新簽到。", "success")
     return redirect(url_for('admin_promote.promote_page', phase_id=next_phase.id))
@@ -341,25 +349,15 @@ def promoted_list():
 # ✅ 匯出所有晉級者名單
 @admin_promote_bp.route("/promote/export_all", endpoint="export_all_promoted_candidates")
 def export_all_promoted_candidates():
-    import pandas as pd
-    from io import BytesIO
-
-    candidates = Candidate.query.filter_by(is_promoted=True).order_by(Candidate.phase_id, Candidate.id).all()
-    data = [(c.phase_id, c.class_name, c.parent_name, c.promote_type or "") for c in candidates]
+    return _send_export('all_promoted')
 
-    df = pd.DataFrame(data, columns=["階段ID", "班級", "家長姓名", "晉級方式"])
+# ✅ 匯出整場選舉報表（所有階段得票、晉級名單、投票率、教職員投票）
+@admin_promote_bp.route("/promote/export_report", endpoint="export_election_report")
+def export_election_report():
+    if 'admin' not in session:
+        return redirect(url_for('admin_auth.admin_login'))
 
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-        df.to_excel(writer, index=False, sheet_name="所有晉級者")
-    output.seek(0)
-
-    return send_file(
-        output,
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        download_name="所有晉級者名單.xlsx",
-        as_attachment=True
-    )
+    return _send_export('report')
 
 # ✅ 開啟本階段投票
 @admin_promote_bp.route('/promote/open_phase/<int:phase_id>', methods=['POST'], endpoint='open_phase')
@@ -367,6 +365,7 @@ def open_phase(phase_id):
     # ✅ 先關閉所有階段
     VotePhase.query.update({VotePhase.is_open: False})
     db.session.commit()
+    invalidate_phases()
 
     # ✅ 再開啟指定階段
     phase = VotePhase.query.get(phase_id)
@@ -385,6 +384,7 @@ def open_phase(phase_id):
     # ✅ 開啟這個階段
     phase.is_open = True
     db.session.commit()
+    invalidate_phases()
 
     flash(f"✅ 已開啟階段「{phase.name}」，其他階段已關閉，所有人需重新簽到。", "success")
     return redirect(url_for('admin_promote.promote_page', phase_id=phase_id))
@@ -396,7 +396,7 @@ def goto_next_phase():
 
     # 若沒帶，抓 promote_page 頁會用到的邏輯，也可直接抓第一個或最新結束階段
     if not current_phase_id:
-        current_phase = get_latest_closed_phase() or VotePhase.query.order_by(VotePhase.id.asc()).first()
+        current_phase = get_latest_closed_phase() or get_first_phase()
         if not current_phase:
             flash("⚠️ 尚無任何階段可切換", "warning")
             return redirect(url_for('admin_dashboard.admin_dashboard'))
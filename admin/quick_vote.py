@@ -1,5 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
-from models import db, Candidate, Vote, VotePhase, Setting
+from models import db, Candidate, Vote
+from utils.helpers import get_int_setting
+from utils.phase_service import get_current_phase
 from sqlalchemy import func
 import random
 import traceback
@@ -11,7 +13,7 @@ def quick_vote():
     if 'admin' not in session:
         return redirect(url_for('admin_auth.admin_login'))
 
-    current_phase = VotePhase.query.filter_by(is_open=True).first()
+    current_phase = get_current_phase()
     if not current_phase:
         flash('⚠️ 尚未開啟任何投票階段', 'warning')
         return redirect(url_for('admin_dashboard.admin_dashboard'))
@@ -74,8 +76,7 @@ def quick_vote():
         grade = grade_mapping.get(class_prefix, '未分類')
         grouped_candidates.setdefault(grade, []).append(c)
 
-    refresh_setting = Setting.query.filter_by(key='refresh_interval').first()
-    refresh_interval = int(refresh_setting.value) if refresh_setting and refresh_setting.value.isdigit() else 10
+    refresh_interval = get_int_setting('refresh_interval', 10)
 
     return render_template("admin_quick_vote.html",
                            current_phase=current_phase,
@@ -1,9 +1,13 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from models import db, Setting, VotePhase, Vote, Candidate
+from utils.helpers import get_all_settings, set_settings, invalidate_settings
 import os
 import shutil
 import datetime
 from sqlalchemy import func
+from utils.log_query import invalidate_log_counts
+from utils.login_tokens import forget_token_uses
+from utils.phase_service import invalidate_phases
 
 admin_settings_bp = Blueprint('admin_settings', __name__)
 
@@ -15,20 +19,14 @@ def admin_settings():
     if 'admin' not in session:
         return redirect(url_for('admin_auth.admin_login'))
 
-    # 1️⃣ 取得現有設定
-    refresh_setting       = Setting.query.filter_by(key='refresh_interval').first()
-    slide_setting         = Setting.query.filter_by(key='slide_interval').first()
-    staff_title_setting   = Setting.query.filter_by(key='staff_vote_title').first()
-    parent_title_setting  = Setting.query.filter_by(key='parent_vote_title').first()
-    vote_title_setting    = Setting.query.filter_by(key='vote_title').first()
-    current_phase_setting = Setting.query.filter_by(key='current_phase_id').first()
-
-    refresh_value   = refresh_setting.value if refresh_setting else '10'
-    slide_interval  = slide_setting.value   if slide_setting   else '5'
-    staff_vote_title  = staff_title_setting.value  if staff_title_setting  else '教職員投票'
-    parent_vote_title = parent_title_setting.value if parent_title_setting else '家長投票'
-    vote_title        = vote_title_setting.value   if vote_title_setting   else '第一階段：家長委員（最多 6 票）'
-    current_phase_id  = current_phase_setting.value if current_phase_setting else ''
+    # 1️⃣ 取得現有設定（一次載入全部）
+    settings = get_all_settings()
+    refresh_value     = settings.get('refresh_interval', '10')
+    slide_interval    = settings.get('slide_interval', '5')
+    staff_vote_title  = settings.get('staff_vote_title', '教職員投票')
+    parent_vote_title = settings.get('parent_vote_title', '家長投票')
+    vote_title        = settings.get('vote_title', '第一階段：家長委員（最多 6 票）')
+    current_phase_id  = settings.get('current_phase_id', '')
 
     # ✅ 固定依 ID 排序
     phases = VotePhase.query.order_by(VotePhase.id).all()
@@ -37,25 +35,27 @@ def admin_settings():
     if request.method == 'POST':
         # ➔ 自動刷新秒數
         refresh_interval = (request.form.get('refresh_interval', '') or '').strip()
-        save_setting('refresh_interval', refresh_interval or '10')
 
         # ➔ 輪播間隔秒數
         slide_interval_form = (request.form.get('slide_interval', '') or '').strip()
-        save_setting('slide_interval', slide_interval_form or '5')
 
         # ➔ 投票標題
         staff_title = (request.form.get('staff_vote_title', '') or '').strip()
-        save_setting('staff_vote_title', staff_title)
-
         parent_title = (request.form.get('parent_vote_title', '') or '').strip()
-        save_setting('parent_vote_title', parent_title)
-
         vote_title_val = (request.form.get('vote_title', '') or '').strip()
-        save_setting('vote_title', vote_title_val)
 
         # ➔ 當前階段 ID
         selected_phase_id = (request.form.get('current_phase_id', '') or '').strip()
-        save_setting('current_phase_id', selected_phase_id)
+
+        # 一次寫入並通知其他 worker 重新載入
+        set_settings({
+            'refresh_interval': refresh_interval or '10',
+            'slide_interval': slide_interval_form or '5',
+            'staff_vote_title': staff_title,
+            'parent_vote_title': parent_title,
+            'vote_title': vote_title_val,
+            'current_phase_id': selected_phase_id,
+        })
 
         # ➔ 各階段投票數與晉級人數
         for phase in phases:
@@ -73,6 +73,7 @@ def admin_settings():
                 phase.promote_count = 1
 
         db.session.commit()
+        invalidate_phases()
         flash('✅ 系統設定已更新', 'success')
         return redirect(url_for('admin_settings.admin_settings'))
 
@@ -90,13 +91,7 @@ def admin_settings():
 # 通用設定儲存
 # -------------------------------------------------
 def save_setting(key, value):
-    setting = Setting.query.filter_by(key=key).first()
-    if setting:
-        setting.value = value
-    else:
-        setting = Setting(key=key, value=value)
-        db.session.add(setting)
-    db.session.commit()
+    set_settings({key: value})
 
 # -------------------------------------------------
 # 清除指定階段資料
@@ -136,10 +131,14 @@ def clear_all_data():
     phase_deleted = VotePhase.query.delete()
     setting_deleted = Setting.query.delete()
     log_deleted = OperationLog.query.delete()
+    forget_token_uses()  # user_id 外鍵：先清使用紀錄再刪帳號
     user_deleted = User.query.delete()
     admin_deleted = Admin.query.delete()
 
     db.session.commit()
+    invalidate_log_counts()
+    invalidate_settings()
+    invalidate_phases()
 
     # 🔹 建立預設管理員
     default_admin = Admin(username="admin")
@@ -1,5 +1,8 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from models import db, Staff, StaffVote, Setting
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, current_app
+from models import db, Staff, StaffVote
+from utils.helpers import get_setting, set_setting
+from utils.account_import import AccountImportError, import_staff_file, summary_text
+from utils.staff_tally import get_staff_tally, invalidate_staff_tally
 
 admin_staffs_bp = Blueprint('admin_staffs', __name__)
 
@@ -87,20 +90,18 @@ def admin_staff_vote_title():
     if 'admin' not in session:
         return redirect(url_for('admin_auth.admin_login'))
 
-    setting = Setting.query.filter_by(key='staff_vote_title').first()
-    if not setting:
-        setting = Setting(key='staff_vote_title', value='教職員投票')
-        db.session.add(setting)
-        db.session.commit()
+    title = get_setting('staff_vote_title')
+    if title is None:
+        title = '教職員投票'
+        set_setting('staff_vote_title', title)
 
     if request.method == 'POST':
         new_title = request.form.get('title', '').strip()
-        setting.value = new_title
-        db.session.commit()
+        set_setting('staff_vote_title', new_title)
         flash('✅ 教職員投票標題已更新', 'success')
         return redirect(url_for('admin_staffs.admin_staff_vote_title'))
 
-    return render_template('admin_staff_vote_title.html', title=setting.value)
+    return render_template('admin_staff_vote_title.html', title=title)
 
 @admin_staffs_bp.route('/staff_votes/reset', methods=['POST'], endpoint='admin_reset_staff_votes')
 def admin_reset_staff_votes():
@@ -109,9 +110,40 @@ def admin_reset_staff_votes():
 
     StaffVote.query.delete()
     db.session.commit()
+    invalidate_staff_tally()
     flash('✅ 教職員票數已清空', 'success')
     return redirect(url_for('admin_dashboard.admin_dashboard'))
 
+# 教職員投票即時看板（投影用）：頁面以 ETag 條件式輪詢票數，資料來自行程內快取
+STAFF_LIVE_POLL_SECONDS = 2
+
+
+@admin_staffs_bp.route('/staff_votes/live', methods=['GET'], endpoint='admin_staff_votes_live')
+def admin_staff_votes_live():
+    if 'admin' not in session:
+        return redirect(url_for('admin_auth.admin_login'))
+
+    return render_template('admin_staff_votes_live.html',
+                           vote_title=get_setting('staff_vote_title', '教職員意見調查'),
+                           tally=get_staff_tally(),
+                           poll_seconds=STAFF_LIVE_POLL_SECONDS)
+
+
+@admin_staffs_bp.route('/api/staff_votes/tally', methods=['GET'], endpoint='api_staff_tally')
+def api_staff_tally():
+    if 'admin' not in session:
+        return jsonify({"error": "unauthorized"}), 403
+
+    tally = get_staff_tally()
+    if tally.etag in request.if_none_match:
+        resp = current_app.response_class(status=304)
+    else:
+        resp = jsonify(tally.to_dict())
+    resp.set_etag(tally.etag)
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+
 # 匯入教職員名單
 @admin_staffs_bp.route('/staff_import', methods=['GET', 'POST'], endpoint='admin_staff_import')
 def admin_staff_import():
@@ -124,8 +156,17 @@ def admin_staff_import():
             flash("⚠️ 請選擇檔案", "danger")
             return redirect(url_for('admin_staffs.admin_staff_import'))
 
-        # TODO: 這裡加上實際的匯入處理（例如讀 CSV/Excel）
-        flash("✅ 教職員名單匯入成功", "success")
+        try:
+            report = import_staff_file(file, job_id=request.form.get('job_id') or None)
+        except AccountImportError as e:
+            flash(f"❌ {e}", "danger")
+            return redirect(url_for('admin_staffs.admin_staff_import'))
+        except Exception as e:
+            flash(f"❌ 匯入失敗並已回滾：{e}", "danger")
+            return redirect(url_for('admin_staffs.admin_staff_import'))
+
+        flash(summary_text(report), "success")
+        flash(f"⏱️ {report.timing_text()}", "info")
         return redirect(url_for('admin_staffs.admin_staff_list'))
 
     return render_template('admin_staff_import.html')
@@ -1,25 +1,33 @@
-from flask import Blueprint, render_template, redirect, url_for, session, flash, request, send_file, jsonify
-from models import db, VotePhase, Candidate, Vote, Setting
+from flask import (
+    Blueprint, render_template, redirect, url_for, session, flash, request, send_file, jsonify,
+    Response, stream_with_context,
+)
+from models import db, VotePhase, Candidate, Vote
 from sqlalchemy import func
-import pandas as pd
-import io
 from collections import OrderedDict
-from utils.helpers import get_setting
+import csv
+import io
+from utils.helpers import get_setting, get_int_setting
+from utils.phase_service import (
+    get_current_phase, get_latest_closed_phase, get_next_phase, get_phase, get_phases, invalidate_phases,
+)
+from utils.vote_log_query import (
+    apply_keyset as apply_vote_log_keyset,
+    apply_vote_log_filters,
+    count_vote_logs,
+    make_cursor as make_vote_log_cursor,
+    parse_cursor as parse_vote_log_cursor,
+    parse_phase_id,
+    vote_log_query,
+)
+from utils.vote_timeline import get_vote_timeline
 from flask import jsonify
 
 admin_votes_bp = Blueprint('admin_votes', __name__)
 
-# ✅ 取得當前開啟階段
-def get_current_phase():
-    return VotePhase.query.filter_by(is_open=True).first()
-
-# ✅ 僅抓取最新「已結束」的階段
-def get_latest_phase():
-    return VotePhase.query.filter_by(is_open=False).order_by(VotePhase.id.desc()).first()
-
 def get_latest_phase_with_votes():
     # 找出已結束階段，依序找出是否有票
-    closed_phases = VotePhase.query.filter_by(is_open=False).order_by(VotePhase.id.desc()).all()
+    closed_phases = [p for p in reversed(get_phases()) if not p.is_open]
     for phase in closed_phases:
         vote_count = Vote.query.filter_by(phase_id=phase.id).count()
         if vote_count > 0:
@@ -29,14 +37,16 @@ def get_latest_phase_with_votes():
 # 🔹 關閉目前開啟階段
 @admin_votes_bp.route('/phase/close', methods=['POST'], endpoint='close_phase')
 def close_phase():
-    current_phase = get_current_phase()
-    if not current_phase:
+    open_phase = get_current_phase()
+    if not open_phase:
         flash("⚠️ 無開啟中的階段", "warning")
         return redirect(url_for('admin_votes.admin_winners'))
 
     # ✅ 關閉階段（不要刪除票數）
+    current_phase = db.session.get(VotePhase, open_phase.id)
     current_phase.is_open = False
     db.session.commit()
+    invalidate_phases()
 
     flash(f"✅ 階段「{current_phase.name}」已成功關閉", "success")
     return redirect(url_for('admin_dashboard.admin_dashboard'))
@@ -52,6 +62,7 @@ def open_phase(phase_id):
     phase = VotePhase.query.get_or_404(phase_id)
     phase.is_open = True
     db.session.commit()
+    invalidate_phases()
 
     flash(f"✅ 階段「{phase.name}」已成功開啟，其餘階段已關閉", "success")
     return redirect(url_for('admin_votes.admin_vote_phases'))
@@ -59,8 +70,8 @@ def open_phase(phase_id):
 @admin_votes_bp.route('/vote_phases', endpoint='admin_vote_phases')
 def admin_vote_phases():
     vote_title = get_setting("vote_title")
-    phases = VotePhase.query.all()
-    refresh_interval = get_setting("refresh_interval", 10)
+    phases = get_phases()
+    refresh_interval = get_int_setting("refresh_interval", 10)
     return render_template("admin_vote_phases.html",
                            vote_title=vote_title,
                            refresh_interval=refresh_interval,
@@ -76,14 +87,11 @@ def admin_live_votes():
 
     # 取得目前階段
     current_phase = get_current_phase()
-    vote_title = Setting.query.filter_by(key='vote_title').first()
-    
-    # 從 Setting 取得 refresh_interval & slide_interval
-    refresh_interval_setting = Setting.query.filter_by(key='refresh_interval').first()
-    slide_interval_setting = Setting.query.filter_by(key='slide_interval').first()
+    vote_title = get_setting('vote_title', '')
 
-    refresh_interval = int(refresh_interval_setting.value) if refresh_interval_setting else 10
-    slide_interval = int(slide_interval_setting.value) if slide_interval_setting else 5  # 預設5秒
+    # 從 Setting 取得 refresh_interval & slide_interval
+    refresh_interval = get_int_setting('refresh_interval', 10)
+    slide_interval = get_int_setting('slide_interval', 5)  # 預設5秒
 
     # 沒有開啟中的階段就導去結果頁
     if not current_phase:
@@ -151,7 +159,7 @@ def admin_live_votes():
         'admin_live_votes.html',
         candidates=candidates,
         current_phase=current_phase,
-        vote_title=vote_title.value if vote_title else '',
+        vote_title=vote_title,
         refresh_interval=refresh_interval,
         slide_interval=slide_interval,  # 🔥 補上
         vote_counts=vote_counts,
@@ -169,7 +177,7 @@ def admin_live_votes():
 def manage_vote_phases():
     if 'admin' not in session:
         return redirect(url_for('admin_auth.admin_login'))
-    vote_phases = VotePhase.query.all()
+    vote_phases = get_phases()
     return render_template('admin_vote_phases.html', vote_phases=vote_phases)
 
 # ✅ 切換階段開關
@@ -181,6 +189,7 @@ def toggle_vote_phase(phase_id):
     phase = VotePhase.query.get_or_404(phase_id)
     phase.is_open = not phase.is_open
     db.session.commit()
+    invalidate_phases()
     flash(f"{phase.name} 階段已{'開啟' if phase.is_open else '關閉'}", 'success')
     return redirect(url_for('admin_votes.manage_vote_phases'))
 
@@ -192,6 +201,7 @@ def close_all_phases():
 
     VotePhase.query.update({VotePhase.is_open: False})
     db.session.commit()
+    invalidate_phases()
     flash('✅ 已全部關閉所有投票階段', 'success')
     return redirect(url_for('admin_votes.manage_vote_phases'))
 
@@ -210,6 +220,7 @@ def reset_vote_phases():
         VotePhase(name='家長會長', max_votes=1, promote_count=1, is_open=False)
     ])
     db.session.commit()
+    invalidate_phases()
     flash('✅ 已重設所有階段', 'success')
     return redirect(url_for('admin_votes.manage_vote_phases'))
 
@@ -249,7 +260,7 @@ def admin_winners():
         return redirect(url_for('admin_dashboard.admin_dashboard'))
 
     phase_id = phase_with_votes[0]
-    current_phase = VotePhase.query.get(phase_id)
+    current_phase = get_phase(phase_id)
     promote_count = current_phase.promote_count or 0
 
     # ✅ 查詢候選人與票數（僅限該階段）
@@ -304,8 +315,8 @@ def admin_winners():
     db.session.commit()
 
     # ✅ 取設定值
-    vote_title = Setting.query.filter_by(key="vote_title").first()
-    refresh_interval = Setting.query.filter_by(key="refresh_interval").first()
+    vote_title = get_setting("vote_title") or "投票結果"
+    refresh_interval = get_int_setting("refresh_interval", 10)
 
     return render_template(
         "admin_winners.html",
@@ -313,8 +324,8 @@ def admin_winners():
         promoted_candidates=promoted_candidates,
         current_phase=current_phase,
         promote_count=promote_count,
-        vote_title=vote_title.value if vote_title else "投票結果",
-        refresh_interval=int(refresh_interval.value) if refresh_interval else 10
+        vote_title=vote_title,
+        refresh_interval=refresh_interval
     )
 
 # ✅ 手動選取同票候選人（admin_promote.html）
@@ -327,7 +338,7 @@ def admin_tiebreaker():
     db.session.expire_all()
 
     # ✅ 取得當前階段（先試開啟中，沒有就拿最新關閉的）
-    current_phase = get_current_phase() or get_latest_phase()
+    current_phase = get_current_phase() or get_latest_closed_phase()
     if not current_phase:
         flash('尚未建立任何投票階段', 'warning')
         return redirect(url_for('admin_votes.admin_winners'))
@@ -378,7 +389,7 @@ def admin_tiebreaker():
                            need_manual=need_manual,
                            candidates=sorted_candidates,
                            promoted_candidates=[c for c in sorted_candidates if c.is_winner],
-                           has_next_phase=VotePhase.query.filter(VotePhase.id > current_phase.id).first() is not None)
+                           has_next_phase=get_next_phase(current_phase.id) is not None)
 
 @admin_votes_bp.route('/api/live_votes', methods=['GET'])
 def api_live_votes():
@@ -412,51 +423,120 @@ def api_live_votes():
     ])
 
 
+@admin_votes_bp.route('/api/vote_timeline', methods=['GET'])
+def api_vote_timeline():
+    """每分鐘投票數、累計投票率、各年級累計票數（預設為目前階段）。"""
+    if 'admin_id' not in session:
+        return jsonify({"error": "unauthorized"}), 403
+
+    phase = get_phase(request.args.get('phase_id', type=int)) or get_current_phase()
+    if not phase:
+        return jsonify({"error": "no phase"}), 404
+    return jsonify(get_vote_timeline(phase.id))
+
+
 @admin_votes_bp.route('/open_next_phase', methods=['POST'], endpoint='open_next_phase')
 def open_next_phase():
     if 'admin' not in session:
         return redirect(url_for('admin_auth.admin_login'))
 
-    current_phase = get_latest_phase()
-    next_phase = VotePhase.query.filter(VotePhase.id > current_phase.id).order_by(VotePhase.id).first()
+    current_phase = get_latest_closed_phase()
+    next_info = get_next_phase(current_phase.id) if current_phase else None
 
-    if not next_phase:
+    if not next_info:
         flash("⚠️ 已無下一階段", "warning")
         return redirect(url_for('admin_votes.admin_winners'))
 
+    next_phase = db.session.get(VotePhase, next_info.id)
     next_phase.is_open = True
     db.session.commit()
+    invalidate_phases()
     flash(f"✅ 已開啟下一階段：{next_phase.name}", "success")
     return redirect(url_for('admin_votes.admin_winners'))
 
+# ---------------------------
+# 投票明細（誰投給誰）：頁面只有外框，資料由 DataTables 分頁向後端取得
+# ---------------------------
+VOTES_LOG_MAX_PAGE = 500
+VOTES_LOG_EXPORT_CHUNK = 1000
+
+
+def _votes_log_filters():
+    return (
+        parse_phase_id(request.args.get('phase_id', '').strip()),
+        request.args.get('voter', '').strip(),
+        request.args.get('class_name', '').strip(),
+    )
+
+
 @admin_votes_bp.route('/votes_log')
 def votes_log():
     if 'admin' not in session:
         return redirect(url_for('admin_auth.admin_login'))
 
-    from models import User
+    return render_template('admin_votes_log.html', phases=get_phases(),
+                           phase_id=request.args.get('phase_id', ''))
 
-    votes = (
-        db.session.query(
-            Vote.id,
-            VotePhase.name.label("phase"),
-            User.username.label("voter_username"),
-            Candidate.class_name.label("target_class"),
-            Candidate.parent_name.label("target_name")
-        )
-        .join(VotePhase, Vote.phase_id == VotePhase.id)
-        .join(User, Vote.voter_id == User.id)   # ✅ 投票人改成 User
-        .join(Candidate, Vote.candidate_id == Candidate.id)  # ✅ 投票目標仍是候選人
-        .order_by(VotePhase.id, Vote.id)
-        .all()
-    )
 
-    vote_details = [
-        {
-            "phase": v.phase,
-            "voter": v.voter_username,   # ✅ 只顯示帳號
-            "candidate": f"{v.target_class} {v.target_name}"
-        }
-        for v in votes
-    ]
-    return render_template('admin_votes_log.html', votes=vote_details)
+@admin_votes_bp.route('/votes_log/data')
+def votes_log_data():
+    if 'admin' not in session:
+        return jsonify({"error": "unauthorized"}), 403
+
+    draw   = int(request.args.get('draw', '1'))
+    start  = max(int(request.args.get('start', '0')), 0)
+    length = min(max(int(request.args.get('length', '25')), 1), VOTES_LOG_MAX_PAGE)
+    phase_id, voter, class_name = _votes_log_filters()
+
+    # keyset 游標（翻到下一頁時帶上一頁最後一筆的 phase_id/id），沒有游標才退回 OFFSET
+    cursor = parse_vote_log_cursor(request.args.get('after_phase', ''), request.args.get('after_id', ''))
+
+    q = apply_vote_log_filters(vote_log_query(), phase_id, voter, class_name)
+    q = apply_vote_log_keyset(q, cursor)
+    if not cursor:
+        q = q.offset(start)
+    rows = q.limit(length).all()
+
+    total = count_vote_logs()
+    filtered = total if not (phase_id or voter or class_name) else count_vote_logs(phase_id, voter, class_name)
+
+    return jsonify({
+        'draw': draw,
+        'recordsTotal': total,
+        'recordsFiltered': filtered,
+        'data': [[r.phase, r.voter, f"{r.target_class or ''} {r.target_name or ''}".strip()] for r in rows],
+        'cursor': make_vote_log_cursor(rows[-1]) if rows else None,
+    })
+
+
+@admin_votes_bp.route('/votes_log/export')
+def export_votes_log_csv():
+    if 'admin' not in session:
+        return redirect(url_for('admin_auth.admin_login'))
+
+    phase_id, voter, class_name = _votes_log_filters()
+    q = apply_vote_log_filters(vote_log_query(), phase_id, voter, class_name)
+    q = apply_vote_log_keyset(q, None) \
+        .execution_options(stream_results=True) \
+        .yield_per(VOTES_LOG_EXPORT_CHUNK)
+
+    def generate_csv():
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        buf.write('\ufeff')  # BOM，讓 Excel 以 UTF-8 開啟
+        writer.writerow(["投票階段", "投票帳號", "候選人班級", "候選人姓名"])
+        rows_in_buf = 0
+        for r in q:
+            writer.writerow([r.phase, r.voter, r.target_class or "", r.target_name or ""])
+            rows_in_buf += 1
+            if rows_in_buf >= VOTES_LOG_EXPORT_CHUNK:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+                rows_in_buf = 0
+        yield buf.getvalue()
+
+    filename = f"votes_log_phase{phase_id}.csv" if phase_id else "votes_log.csv"
+    return Response(stream_with_context(generate_csv()),
+                    mimetype='text/csv',
+                    headers={"Content-Disposition": f"attachment; filename={filename}"})
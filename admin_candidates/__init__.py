@@ -32,10 +32,9 @@ def admin_candidates():
     if 'admin' not in session:
         return redirect(url_for('admin.admin_login'))
     phases = VotePhase.query.order_by(VotePhase.id).all()
-    candidates_by_phase = {
-        phase.id: Candidate.query.filter_by(phase_id=phase.id).all()
-        for phase in phases
-    }
+    candidates_by_phase = {phase.id: [] for phase in phases}
+    for c in Candidate.query.filter(Candidate.phase_id.in_(candidates_by_phase.keys())).all():
+        candidates_by_phase[c.phase_id].append(c)
     return render_template('admin_candidates.html', phases=phases, candidates_by_phase=candidates_by_phase)
 
 # 新增候選人
@@ -1,12 +1,13 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from models import db, Setting, VotePhase, StaffVote
+from utils.helpers import get_setting as _cached_setting, invalidate_settings
+from utils.phase_service import invalidate_phases
 
 admin_settings_bp = Blueprint('admin_settings', __name__)
 
 # ✅ 工具函式：取得設定值
 def get_setting(key):
-    setting = Setting.query.filter_by(key=key).first()
-    return setting.value if setting else ''
+    return _cached_setting(key, '')
 
 # ✅ 路由：顯示與更新系統設定頁（刷新秒數、標頭文字、各階段投票數）
 @admin_settings_bp.route('/admin/settings', methods=['GET', 'POST'])
@@ -32,6 +33,7 @@ def admin_settings():
             setting.value = header_text
 
         db.session.commit()
+        invalidate_settings()
         flash('✅ 系統基本設定已更新', 'success')
         return redirect(url_for('admin_settings.admin_settings'))
 
@@ -53,6 +55,7 @@ def update_max_votes():
             if phase:
                 phase.max_votes = int(value)
     db.session.commit()
+    invalidate_phases()
     flash('已更新各階段投票數上限')
     return redirect(url_for('admin_settings.admin_settings'))
 
@@ -65,6 +68,7 @@ def edit_phase_name(phase_id):
         if new_name:
             phase.name = new_name
             db.session.commit()
+            invalidate_phases()
             flash('已更新階段名稱', 'success')
             return redirect(url_for('admin_settings.admin_settings'))
         else:
@@ -83,6 +87,7 @@ def edit_staff_vote_title():
             setting = Setting(key='staff_vote_title', value=new_title)
             db.session.add(setting)
         db.session.commit()
+        invalidate_settings()
         flash('已更新投票標題', 'success')
         return redirect(url_for('admin.admin_dashboard'))  # ✅ 修正導向
     return render_template('edit_staff_vote_title.html', setting=setting)
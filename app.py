@@ -15,13 +15,20 @@ from utils.helpers import (
     get_request_user,
     should_log_request
 )
+from utils.export_jobs import init_export_jobs
+from utils.log_writer import init_log_writer
+from utils.metrics import init_metrics
+from utils.password_verifier import init_password_verifier
+from utils.phase_service import get_phases, invalidate_phases
+from utils.query_profiler import init_query_profiler
+from utils.schema import ensure_schema
 
 # -------------------------------------------------
 # 靜音 werkzeug 指定路徑的請求日誌
 # -------------------------------------------------
 def silence_werkzeug(noisy_paths=None):
     if noisy_paths is None:
-        noisy_paths = ("/admin/logs/data", "/static/", "/favicon.ico")
+        noisy_paths = ("/admin/logs/data", "/admin/metrics/prometheus", "/static/", "/favicon.ico")
 
     class EndpointFilter(logging.Filter):
         def __init__(self, paths):
@@ -84,8 +91,39 @@ app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
     "pool_recycle": 1800,  # 30 分鐘 recycle 連線
 }
 
+# ✅ 操作紀錄背景批次寫入（OPLOG_ASYNC=0 可關閉，改回同步寫入）
+app.config['OPLOG_ASYNC'] = os.getenv("OPLOG_ASYNC", "1") != "0"
+app.config['OPLOG_FLUSH_MS'] = int(os.getenv("OPLOG_FLUSH_MS", "500"))
+app.config['OPLOG_BATCH_SIZE'] = int(os.getenv("OPLOG_BATCH_SIZE", "200"))
+app.config['OPLOG_MAX_QUEUE'] = int(os.getenv("OPLOG_MAX_QUEUE", "10000"))
+# ✅ 操作紀錄保留天數（超過的可封存至 instance/log_archive/）
+app.config['OPLOG_RETENTION_DAYS'] = int(os.getenv("OPLOG_RETENTION_DAYS", "180"))
+
+# ✅ 請求計時 / SQL 統計（/admin/metrics；METRICS_TOKEN 供 Prometheus 抓取）
+app.config['METRICS_ENABLED'] = os.getenv("METRICS_ENABLED", "1") != "0"
+app.config['METRICS_TOKEN'] = os.getenv("METRICS_TOKEN")
+
+# ✅ SQL 剖析 / N+1 偵測（除錯用，回應標頭 X-SQL-Queries / X-SQL-NPlus1）
+app.config['SQL_PROFILE'] = os.getenv("SQL_PROFILE", "0") == "1"
+app.config['SQL_NPLUS1_THRESHOLD'] = int(os.getenv("SQL_NPLUS1_THRESHOLD", "5"))
+
+# ✅ Excel 匯出背景工作數（產出檔快取於 instance/exports/）
+app.config['EXPORT_WORKERS'] = int(os.getenv("EXPORT_WORKERS", "2"))
+
+# ✅ 登入密碼驗證 pool（忙碌時登入回 503 + Retry-After，避免拖垮投票請求）
+app.config['LOGIN_HASH_WORKERS'] = int(os.getenv("LOGIN_HASH_WORKERS", "0"))  # 0 = CPU 數的一半
+app.config['LOGIN_HASH_QUEUE'] = int(os.getenv("LOGIN_HASH_QUEUE", "4"))
+app.config['LOGIN_HASH_TIMEOUT'] = float(os.getenv("LOGIN_HASH_TIMEOUT", "5"))
+# ✅ 密碼雜湊參數（例如 pbkdf2:sha256:50000；未設定時用 calibrate_password_hash.py --save 存的值）
+app.config['PASSWORD_HASH_METHOD'] = os.getenv("PASSWORD_HASH_METHOD")
+
 db.init_app(app)
-migrate = Migrate(app, db)
+migrate = Migrate(app, db, directory=os.path.join(app.root_path, 'migrations'))  # 打包後 cwd 不一定是專案目錄
+init_metrics(app)
+init_query_profiler(app)
+init_log_writer(app)
+init_export_jobs(app)
+init_password_verifier(app)
 
 # -------------------------------------------------
 # 載入並註冊 Blueprints
@@ -100,6 +138,7 @@ from admin.votes import admin_votes_bp
 from admin.settings import admin_settings_bp
 from admin.staffs import admin_staffs_bp
 from admin.quick_vote import admin_quickvote_bp
+from admin.metrics import admin_metrics_bp
 from auth import auth_bp
 from staff import staff_bp
 from checkin.checkin_panel import checkin_panel_bp
@@ -114,6 +153,7 @@ app.register_blueprint(admin_settings_bp, url_prefix='/admin')
 app.register_blueprint(admin_staffs_bp, url_prefix='/admin')
 app.register_blueprint(admin_quickvote_bp)
 app.register_blueprint(admin_logs_bp, url_prefix='/admin')
+app.register_blueprint(admin_metrics_bp, url_prefix='/admin')
 app.register_blueprint(auth_bp)
 app.register_blueprint(staff_bp, url_prefix='/staff')
 app.register_blueprint(checkin_panel_bp)
@@ -123,7 +163,7 @@ app.register_blueprint(admin_users_bp, url_prefix='/admin')
 # 啟動時自動建立 admin / 投票階段
 # -------------------------------------------------
 with app.app_context():
-    db.create_all()
+    ensure_schema()
 
     # 確保管理員帳號存在
     if not Admin.query.filter_by(username="admin").first():
@@ -144,6 +184,7 @@ with app.app_context():
         ]
         db.session.add_all(phases)
         db.session.commit()
+        invalidate_phases()
         print("✅ 已自動建立投票階段")
     else:
         print("ℹ️ 投票階段已存在，略過建立")
@@ -159,7 +200,7 @@ def home():
 
 @app.route('/admin/phases')
 def show_phases():
-    phases = VotePhase.query.all()
+    phases = get_phases()
     if not phases:
         return '<h3>❌ 沒有找到任何階段資料</h3>'
     html = '<h3>✅ 當前投票階段：</h3><ul>'
@@ -181,6 +222,10 @@ EXCLUDE_ENDPOINTS = {
     "admin_logs.view_logs",
     "admin_logs.logs_data",
     "admin_logs.export_logs_csv",
+    "admin_logs.search_archive",
+    "admin_metrics.metrics_prometheus",
+    "admin_users.import_progress",
+    "admin_votes.votes_log_data",
 }
 
 @app.before_request
@@ -1,6 +1,10 @@
+from datetime import datetime
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify
-from models import db, Candidate, User, VotePhase, Vote, Setting
+from models import db, Candidate, User, Vote
 from utils.helpers import get_grade_from_class, get_setting, group_candidates_by_grade
+from utils.login_tokens import LoginTokenError, redeem_token, token_login_enabled, verify_token
+from utils.password_verifier import PasswordVerifierBusy, check_login
+from utils.phase_service import get_current_phase, get_first_phase_id, phase_is_open_in_db
 from sqlalchemy import func
 
 auth_bp = Blueprint('auth', __name__)
@@ -9,14 +13,7 @@ auth_bp = Blueprint('auth', __name__)
 # 📌 取得家長投票標題
 # ----------------------
 def get_parent_vote_title():
-    setting = Setting.query.filter_by(key='parent_vote_title').first()
-    return setting.value if setting else '家長投票'
-
-# ----------------------
-# ⏲️ 取得當前開啟的階段
-# ----------------------
-def get_current_phase():
-    return VotePhase.query.filter_by(is_open=True).first()
+    return get_setting('parent_vote_title', '家長投票')
 
 # ----------------------
 # 🔍 判斷是否具備投票資格
@@ -25,7 +22,7 @@ def is_qualified_voter(candidate, current_phase):
     if not current_phase or not candidate:
         return False
 
-    first_phase_id = db.session.query(func.min(VotePhase.id)).scalar()
+    first_phase_id = get_first_phase_id()
     if not first_phase_id:
         return False
 
@@ -59,7 +56,13 @@ def login():
         password = request.form['password'].strip()
 
         user = User.query.filter_by(username=username).first()
-        if not user or not user.check_password(password):
+        try:
+            ok = check_login(user, password)
+        except PasswordVerifierBusy as e:
+            # 登入尖峰：快速回 503，請瀏覽器稍後重試，不佔住請求執行緒
+            flash(f'目前登入人數眾多，請於 {e.retry_after} 秒後再試一次。', 'warning')
+            return render_template('login.html'), 503, {'Retry-After': str(e.retry_after)}
+        if not ok:
             flash('帳號或密碼錯誤，請確認後再試。', 'danger')
             return redirect(url_for('auth.login'))
 
@@ -71,6 +74,34 @@ def login():
 
     return render_template('login.html')
 
+# ----------------------
+# 📱 QR 登入碼（家長通知單上的 QR code，免輸入密碼）
+# ----------------------
+@auth_bp.route('/login/token/<token>', methods=['GET', 'POST'], endpoint='token_login')
+def token_login(token):
+    if not token_login_enabled():
+        flash('目前未開放 QR 登入，請使用帳號密碼登入。', 'warning')
+        return redirect(url_for('auth.login'))
+
+    current_phase = get_current_phase()
+    if not current_phase:
+        flash('⚠️ 目前尚未開啟投票階段', 'warning')
+        return redirect(url_for('auth.login'))
+
+    # GET 只驗證並顯示確認頁：連結預覽、掃碼 App 預先載入不會用掉登入碼
+    try:
+        if request.method != 'POST':
+            user = db.session.get(User, verify_token(token, current_phase.id))
+            return render_template('token_login_confirm.html', username=user.username, phase=current_phase)
+        user_id = redeem_token(token, current_phase.id)
+    except LoginTokenError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('auth.login'))
+
+    session['user_id'] = user_id
+    session['role'] = 'voter'
+    return redirect(url_for('auth.vote'))
+
 # ----------------------
 # ✍ 候選人資料確認
 # ----------------------
@@ -93,9 +124,6 @@ def confirm_candidate():
 # ----------------------
 # 📊 候選人主頁
 # ----------------------
-def get_first_phase_id():
-    return db.session.query(func.min(VotePhase.id)).scalar()
-
 @auth_bp.route('/dashboard', endpoint='candidate_dashboard')
 def candidate_dashboard():
     if 'voter_candidate_id' not in session:
@@ -178,7 +206,7 @@ def vote():
             flash("⚠️ 本階段必須先簽到才能投票", "warning")
             return redirect(url_for('auth.checkin'))
 
-    vote_title = get_setting("vote_title", default="家長投票", use_cache=False)
+    vote_title = get_setting("vote_title", default="家長投票")
     max_votes = current_phase.max_votes or 0
     min_votes = getattr(current_phase, 'min_votes', 1) or 1
 
@@ -200,8 +228,16 @@ def vote():
             flash(f"最多只能投 {max_votes} 票", "danger")
             return redirect(url_for('auth.vote'))
 
+        # 快取的階段狀態可能落後其他主機：在寫入選票的同一個交易內向資料庫再確認一次
+        if not phase_is_open_in_db(current_phase.id):
+            db.session.rollback()
+            flash("⚠️ 本階段投票已結束", "warning")
+            return redirect(url_for('auth.login'))
+
+        # 同一張選票的每一列用同一個時間，每分鐘投票人數才不會被拆開
+        cast_at = datetime.now()
         for cid in selected_ids:
-            vote = Vote(candidate_id=int(cid), voter_id=user_id, phase_id=current_phase.id)
+            vote = Vote(candidate_id=int(cid), voter_id=user_id, phase_id=current_phase.id, cast_at=cast_at)
             db.session.add(vote)
 
         db.session.commit()
@@ -0,0 +1,101 @@
+# bench_login.py
+# -*- coding: utf-8 -*-
+"""
+各密碼雜湊參數（profile）的登入吞吐量：以 N 個並行用戶端對 /login 送出正確帳密，
+量每秒成功登入數、延遲與 503 次數，用來估算選舉當晚伺服器撐得住多少人同時登入。
+
+用法：
+    python bench_login.py                       # 預設 profile、200 次登入、8 個用戶端
+    python bench_login.py 500 16                # 500 次、16 個用戶端
+    python bench_login.py 200 8 pbkdf2:sha256:50000 scrypt:16384:8:1
+
+登入走的是實際的 PasswordVerifier（LOGIN_HASH_WORKERS / LOGIN_HASH_QUEUE 照環境變數），
+遇到 503 會依 Retry-After 稍候重試並計入 busy 次數。
+使用暫存 SQLite 資料庫，不會動到 instance/voting.db。
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_tmpdir = tempfile.mkdtemp(prefix="bench_login_")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_tmpdir, "bench.db")
+os.environ.setdefault("OPLOG_ASYNC", "0")
+
+from app import app  # noqa: E402
+from models import db, User  # noqa: E402
+from utils.password_hashing import DEFAULT_HASH_METHOD, hash_passwords, measure_verify_ms  # noqa: E402
+
+ACCOUNTS = 50
+
+
+def prepare_accounts(method):
+    with app.app_context():
+        User.query.filter(User.username.like("bench%")).delete(synchronize_session=False)
+        passwords = [f"pw{i:03d}" for i in range(ACCOUNTS)]
+        hashes = hash_passwords(passwords, method=method)
+        db.session.bulk_insert_mappings(User, [
+            {"username": f"bench{i:03d}", "password_hash": h} for i, h in enumerate(hashes)
+        ])
+        db.session.commit()
+
+
+def run_profile(method, total, clients):
+    app.config["PASSWORD_HASH_METHOD"] = method  # 與帳號雜湊相同，不會觸發重新雜湊
+    prepare_accounts(method)
+
+    latencies, busy = [], [0]
+    lock = threading.Lock()
+
+    def login(i):
+        client = app.test_client()
+        data = {"username": f"bench{i % ACCOUNTS:03d}", "password": f"pw{i % ACCOUNTS:03d}"}
+        start = time.perf_counter()
+        while True:
+            resp = client.post("/login", data=data)
+            if resp.status_code != 503:
+                break
+            with lock:
+                busy[0] += 1
+            time.sleep(min(float(resp.headers.get("Retry-After", "1")), 1.0) / 4)
+        elapsed = (time.perf_counter() - start) * 1000
+        if resp.status_code != 302 or "/vote" not in resp.headers.get("Location", ""):
+            raise RuntimeError(f"登入失敗：{resp.status_code}")
+        with lock:
+            latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(login, range(total)))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "verify_ms": measure_verify_ms(method),
+        "per_sec": total / wall,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "busy": busy[0],
+    }
+
+
+def main():
+    argv = sys.argv[1:]
+    total = int(argv[0]) if argv else 200
+    clients = int(argv[1]) if len(argv) > 1 else 8
+    profiles = argv[2:] or [DEFAULT_HASH_METHOD, "pbkdf2:sha256:50000", "pbkdf2:sha256:600000"]
+
+    verifier = app.extensions["password_verifier"]
+    print(f"{total} 次登入、{clients} 個並行用戶端；驗證 pool {verifier.workers} worker、"
+          f"容量 {verifier.capacity}（CPU {os.cpu_count()}）")
+    print(f"{'profile':<26}{'驗證ms':>8}{'登入/秒':>9}{'p50 ms':>9}{'p95 ms':>9}{'503次':>7}")
+    for method in profiles:
+        r = run_profile(method, total, clients)
+        print(f"{method:<26}{r['verify_ms']:8.1f}{r['per_sec']:9.1f}{r['p50']:9.0f}{r['p95']:9.0f}{r['busy']:7d}")
+
+
+if __name__ == "__main__":
+    main()
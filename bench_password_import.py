@@ -0,0 +1,76 @@
+# bench_password_import.py
+# -*- coding: utf-8 -*-
+"""
+帳號匯入效能比較：逐筆 set_password + 查詢 vs. 批次匯入（平行雜湊 + bulk 寫入）。
+
+用法：
+    python bench_password_import.py            # 預設 1000 筆
+    python bench_password_import.py 3000 4     # 3000 筆、4 個 worker
+
+使用暫存 SQLite 資料庫，不會動到 instance/voting.db。
+"""
+import os
+import sys
+import tempfile
+import time
+
+_tmpdir = tempfile.mkdtemp(prefix="bench_import_")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_tmpdir, "bench.db")
+os.environ.setdefault("OPLOG_ASYNC", "0")
+
+from app import app  # noqa: E402
+from models import db, User  # noqa: E402
+from utils.account_import import import_account_rows, user_row  # noqa: E402
+from utils.import_pipeline import ImportProgress, ImportReport  # noqa: E402
+from utils.password_hashing import default_workers, hash_passwords  # noqa: E402
+
+
+def legacy_import(rows):
+    """原本的做法：每列查一次、逐筆雜湊。"""
+    for row in rows:
+        username, password = row["帳號"], row["密碼"]
+        user = User.query.filter_by(username=username).first()
+        if user:
+            user.set_password(password)
+        else:
+            user = User(username=username)
+            user.set_password(password)
+            db.session.add(user)
+    db.session.commit()
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28}{elapsed:8.2f} s")
+    return elapsed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else default_workers()
+    rows = [{"帳號": f"bench{i:05d}", "密碼": f"pw{i:05d}"} for i in range(n)]
+    passwords = [r["密碼"] for r in rows]
+
+    print(f"筆數 {n}，worker {workers}（CPU {os.cpu_count()}）")
+    with app.app_context():
+        serial = timed("雜湊：逐筆", lambda: hash_passwords(passwords, workers=1))
+        parallel = timed("雜湊：平行", lambda: hash_passwords(passwords, workers=workers))
+
+        User.query.filter(User.username.like("bench%")).delete(synchronize_session=False)
+        db.session.commit()
+        legacy = timed("匯入：原本逐筆", lambda: legacy_import(rows))
+
+        User.query.filter(User.username.like("bench%")).delete(synchronize_session=False)
+        db.session.commit()
+        report = ImportReport()
+        bulk = timed("匯入：批次 + 平行雜湊",
+                     lambda: import_account_rows(User, rows, user_row, report, ImportProgress(None)))
+        print("  分段：" + report.timing_text())
+
+    print(f"雜湊加速 {serial / parallel:.1f}x，整體匯入加速 {legacy / bulk:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# bench_startup.py
+# -*- coding: utf-8 -*-
+"""
+啟動效能量測：每次開一個新的 python 行程 `-X importtime` 匯入 app，
+統計冷啟動時間、匯入後的 RSS（約等於每個 gunicorn worker 的基本記憶體），
+以及最耗時的模組；並檢查 pandas / openpyxl 等重型套件沒有在啟動時被載入。
+
+用法：
+    python bench_startup.py            # 預設跑 5 次
+    python bench_startup.py 10 wsgi    # 跑 10 次、改量 wsgi 模組
+    python bench_startup.py 5 app --heavy   # 另外量「啟動後再載入重型套件」多出的時間 / 記憶體
+
+使用暫存 SQLite 資料庫，不會動到 instance/voting.db。
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl", "chardet", "xlsxwriter")
+RESULT_MARK = "@@bench@@"
+
+# 子行程內執行：匯入目標模組後回報時間、RSS、已載入的重型套件
+_CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+__import__(sys.argv[1])  # 不用 importlib.import_module：它不會經過 -X importtime 的紀錄
+elapsed = time.perf_counter() - start
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource  # 非 Linux：以峰值 RSS 近似（macOS 單位為 bytes）
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+result = {"seconds": elapsed, "rss_mb": rss_mb(),
+          "heavy": [m for m in HEAVY if m in sys.modules]}
+if "--heavy" in sys.argv:
+    start = time.perf_counter()
+    for m in HEAVY:
+        __import__(m)
+    result["heavy_seconds"] = time.perf_counter() - start
+    result["heavy_rss_mb"] = rss_mb()
+print(MARK + json.dumps(result))
+"""
+
+
+def run_once(target, heavy, env):
+    code = f"HEAVY = {HEAVY_MODULES!r}\nMARK = {RESULT_MARK!r}\n" + _CHILD
+    args = [sys.executable, "-X", "importtime", "-c", code, target] + (["--heavy"] if heavy else [])
+    proc = subprocess.run(args, capture_output=True, text=True, env=env,
+                          cwd=os.path.dirname(os.path.abspath(__file__)))
+    lines = [l for l in proc.stdout.splitlines() if l.startswith(RESULT_MARK)]
+    if proc.returncode != 0 or not lines:
+        sys.exit(f"子行程失敗：\n{proc.stderr[-2000:]}")
+    return json.loads(lines[-1][len(RESULT_MARK):]), proc.stderr
+
+
+def top_imports(importtime_log, target, limit=12):
+    """解析 -X importtime 輸出，依 cumulative 時間列出最慢的套件（只看頂層名稱）。
+    只統計到目標模組匯入完成為止（--heavy 之後載入的不算啟動成本）。"""
+    totals = {}
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        try:
+            us = int(cumulative.strip())
+        except ValueError:
+            continue  # 標題列
+        top = name.strip().split(".")[0]
+        totals[top] = max(totals.get(top, 0), us)
+        if name.rstrip() == " " + target:
+            break
+    return sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+
+
+def main():
+    argv = [a for a in sys.argv[1:] if not a.startswith("--")]
+    heavy = "--heavy" in sys.argv
+    runs = int(argv[0]) if argv else 5
+    target = argv[1] if len(argv) > 1 else "app"
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_startup_")
+    env = dict(os.environ, DATABASE_URL="sqlite:///" + os.path.join(tmpdir, "bench.db"), OPLOG_ASYNC="0")
+
+    run_once(target, False, env)  # 第一次建立資料庫，不列入統計
+    results, log = [], ""
+    for _ in range(runs):
+        result, log = run_once(target, heavy, env)
+        results.append(result)
+
+    seconds = [r["seconds"] for r in results]
+    rss = [r["rss_mb"] for r in results]
+    print(f"匯入 {target}：{runs} 次（Python {sys.version.split()[0]}）")
+    print(f"  冷啟動時間  中位數 {statistics.median(seconds):.3f} s（最快 {min(seconds):.3f} / 最慢 {max(seconds):.3f}）")
+    print(f"  worker RSS  中位數 {statistics.median(rss):.1f} MB")
+
+    loaded = sorted({m for r in results for m in r["heavy"]})
+    print(f"  啟動時已載入的重型套件：{', '.join(loaded) if loaded else '無'}")
+    if heavy:
+        extra_s = statistics.median(r["heavy_seconds"] for r in results)
+        extra_mb = statistics.median(r["heavy_rss_mb"] - r["rss_mb"] for r in results)
+        print(f"  第一次匯入 / 匯出再載入重型套件：+{extra_s:.3f} s、+{extra_mb:.1f} MB")
+
+    print("  最耗時的套件（cumulative）：")
+    for name, us in top_imports(log, target):
+        print(f"    {name:<24}{us / 1000:8.1f} ms")
+
+    if loaded:
+        sys.exit(1)  # 方便放進 CI：重型套件又被拉回啟動路徑時失敗
+
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,11 @@ pyinstaller --noconfirm --name wenhuah --onefile ^
   --hidden-import flask_sqlalchemy ^
   --hidden-import flask_migrate ^
   --hidden-import jinja2 ^
+  --hidden-import logging.config ^
   --add-data "templates;templates" ^
   --add-data "static;static" ^
   --add-data "instance;instance" ^
+  --add-data "migrations;migrations" ^
   run_server.py
 
 pause
@@ -0,0 +1,51 @@
+# calibrate_password_hash.py
+# -*- coding: utf-8 -*-
+"""
+依這台機器的速度挑選密碼雜湊參數：驗證一次約 target 毫秒。
+
+用法：
+    python calibrate_password_hash.py                 # pbkdf2，目標 50 ms，只顯示結果
+    python calibrate_password_hash.py 100 scrypt      # scrypt，目標 100 ms
+    python calibrate_password_hash.py 50 pbkdf2 --save   # 存到設定表 password_hash_method
+
+--save 之後新建 / 匯入的帳號都用新參數；既有帳號會在下次登入成功時自動重新雜湊。
+環境變數 PASSWORD_HASH_METHOD 有設定時優先於設定表。
+"""
+import sys
+
+from app import app
+from utils.password_hashing import (
+    HASH_METHOD_SETTING,
+    calibrate,
+    current_hash_method,
+    measure_verify_ms,
+)
+from utils.password_verifier import default_workers
+from utils.settings_service import set_setting
+
+
+def main():
+    argv = [a for a in sys.argv[1:] if not a.startswith("--")]
+    target_ms = float(argv[0]) if argv else 50.0
+    algorithm = argv[1] if len(argv) > 1 else "pbkdf2"
+    save = "--save" in sys.argv
+
+    with app.app_context():
+        current = current_hash_method()
+        method = calibrate(target_ms, algorithm)
+        ms = measure_verify_ms(method)
+        workers = default_workers()
+
+        print(f"目前參數：{current}（驗證 {measure_verify_ms(current):.1f} ms）")
+        print(f"校準結果：{method}（驗證 {ms:.1f} ms，目標 {target_ms:g} ms）")
+        print(f"登入 pool {workers} 個 worker → 約每秒 {workers * 1000 / ms:.0f} 次登入")
+
+        if save:
+            set_setting(HASH_METHOD_SETTING, method)
+            print(f"✅ 已寫入設定 {HASH_METHOD_SETTING}")
+            if app.config.get("PASSWORD_HASH_METHOD"):
+                print("⚠️ 環境變數 PASSWORD_HASH_METHOD 已設定，會優先於此設定")
+
+
+if __name__ == "__main__":
+    main()
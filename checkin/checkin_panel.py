@@ -1,7 +1,8 @@
 from flask import Blueprint, render_template, request, jsonify, session, abort, redirect, url_for
 from functools import wraps
 from datetime import datetime
-from models import db, User, VotePhase
+from models import db, User
+from utils.phase_service import get_current_phase, get_phases
 
 # ✅ 統一 url_prefix
 checkin_panel_bp = Blueprint('checkin_panel', __name__, url_prefix='/checkin_panel')
@@ -65,12 +66,12 @@ def panel():
     total = len(users)
     signed_count = sum(1 for u in users if u.is_signed_in)
 
-    current_phase = VotePhase.query.filter_by(is_open=True).order_by(VotePhase.id).first()
+    current_phase = get_current_phase()
 
     return render_template(
         'checkin_panel.html',
         grade_groups=grade_groups,
-        phases=VotePhase.query.all(),
+        phases=get_phases(),
         current_phase=current_phase,
         total=total,
         signed_count=signed_count
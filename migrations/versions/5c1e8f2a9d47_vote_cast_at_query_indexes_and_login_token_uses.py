@@ -0,0 +1,62 @@
+"""vote cast_at, query indexes and login_token_uses
+
+Revision ID: 5c1e8f2a9d47
+Revises: 9bd27a0c4874
+Create Date: 2026-10-19 10:12:41.208315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e8f2a9d47'
+down_revision = '9bd27a0c4874'
+branch_labels = None
+depends_on = None
+
+# 新資料庫由 db.create_all() 建立時已含以下結構，故每一步都先檢查是否已存在
+INDEXES = [
+    ('votes', 'ix_votes_phase_id_id', ['phase_id', 'id']),
+    ('votes', 'ix_votes_phase_id_cast_at', ['phase_id', 'cast_at']),
+    ('operation_logs', 'ix_operation_logs_timestamp_id', ['timestamp', 'id']),
+]
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def _has_index(table, name):
+    return any(ix['name'] == name for ix in _inspector().get_indexes(table))
+
+
+def upgrade():
+    if 'cast_at' not in {c['name'] for c in _inspector().get_columns('votes')}:
+        with op.batch_alter_table('votes', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('cast_at', sa.DateTime(), nullable=True))
+
+    for table, name, columns in INDEXES:
+        if not _has_index(table, name):
+            op.create_index(name, table, columns, unique=False)
+
+    if not _inspector().has_table('login_token_uses'):
+        op.create_table('login_token_uses',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('phase_id', sa.Integer(), nullable=False),
+        sa.Column('used_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'phase_id', name='uix_login_token_use')
+        )
+
+
+def downgrade():
+    op.drop_table('login_token_uses')
+
+    for table, name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+
+    with op.batch_alter_table('votes', schema=None) as batch_op:
+        batch_op.drop_column('cast_at')
@@ -0,0 +1,37 @@
+"""unique staff vote per round
+
+Revision ID: a7d3b9e4c610
+Revises: 5c1e8f2a9d47
+Create Date: 2026-10-19 10:14:05.731942
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3b9e4c610'
+down_revision = '5c1e8f2a9d47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    indexes = {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes('staff_votes')}
+    if 'uix_staff_votes_staff_reset' in indexes:
+        return
+
+    # 一次性清理：舊資料中同一位教職員同一輪的重複票只保留最早的一筆，否則無法建立唯一索引
+    result = op.get_bind().execute(sa.text(
+        'DELETE FROM staff_votes WHERE id NOT IN '
+        '(SELECT MIN(id) FROM staff_votes GROUP BY staff_id, reset_id)'
+    ))
+    if result.rowcount:
+        print(f'⚠️ 已刪除 {result.rowcount} 筆重複的教職員投票')
+
+    op.create_index('uix_staff_votes_staff_reset', 'staff_votes', ['staff_id', 'reset_id'], unique=True)
+
+
+def downgrade():
+    # 刪除的重複票無法復原，只移除唯一索引
+    op.drop_index('uix_staff_votes_staff_reset', table_name='staff_votes')
@@ -0,0 +1,29 @@
+"""parent account class_name
+
+Revision ID: e3f1a6c8b250
+Revises: a7d3b9e4c610
+Create Date: 2026-10-19 14:02:17.416083
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3f1a6c8b250'
+down_revision = 'a7d3b9e4c610'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 新資料庫由 db.create_all() 建立時已含此欄位
+    if 'class_name' in {c['name'] for c in sa.inspect(op.get_bind()).get_columns('users')}:
+        return
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('class_name', sa.String(length=50), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('class_name')
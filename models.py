@@ -1,5 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
+from utils.password_hashing import hash_password
 from datetime import datetime
 
 db = SQLAlchemy()
@@ -13,6 +14,7 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False)
     password_hash = db.Column(db.String(512), nullable=False)
+    class_name = db.Column(db.String(50), nullable=True)        # 孩子的班級（投票趨勢依年級統計）
 
     # 🔥 簽到欄位
     is_signed_in = db.Column(db.Boolean, default=False)
@@ -23,9 +25,7 @@ class User(db.Model):
     candidate = db.relationship("Candidate", back_populates="user", uselist=False)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(
-            password, method='pbkdf2:sha256:10000', salt_length=16
-        )
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
@@ -65,9 +65,12 @@ class Vote(db.Model):
     voter_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     candidate_id = db.Column(db.Integer, db.ForeignKey('candidates.id'), nullable=False)
     phase_id = db.Column(db.Integer, db.ForeignKey('vote_phases.id'), nullable=False)
+    cast_at = db.Column(db.DateTime, nullable=True, default=datetime.now)  # 投票時間（本地時間；舊資料為空）
 
     __table_args__ = (
         db.UniqueConstraint('voter_id', 'candidate_id', 'phase_id', name='uix_vote_unique'),
+        db.Index('ix_votes_phase_id_id', 'phase_id', 'id'),  # 投票明細依階段 keyset 分頁
+        db.Index('ix_votes_phase_id_cast_at', 'phase_id', 'cast_at'),  # 每分鐘投票趨勢
     )
 
 
@@ -109,9 +112,7 @@ class Admin(db.Model):
     password_hash = db.Column(db.String(512), nullable=False)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(
-            password, method='pbkdf2:sha256:10000', salt_length=16
-        )
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
@@ -130,9 +131,7 @@ class Staff(db.Model):
     class_name = db.Column(db.String(50), nullable=True)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(
-            password, method='pbkdf2:sha256:10000', salt_length=16
-        )
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
@@ -149,6 +148,27 @@ class StaffVote(db.Model):
     vote_result = db.Column(db.String(10), nullable=False)
     reset_id = db.Column(db.Integer, nullable=False, default=1)
 
+    # ✅ 每位教職員每輪只能投一票（也讓「是否已投票」成為索引查詢）
+    __table_args__ = (
+        db.Index('uix_staff_votes_staff_reset', 'staff_id', 'reset_id', unique=True),
+    )
+
+
+# ----------------------
+# QR 登入碼使用紀錄（每個帳號每階段只能用一次）
+# ----------------------
+class LoginTokenUse(db.Model):
+    __tablename__ = 'login_token_uses'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    phase_id = db.Column(db.Integer, nullable=False)
+    used_at = db.Column(db.DateTime, default=datetime.now)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'phase_id', name='uix_login_token_use'),
+    )
+
 
 # ----------------------
 # 操作紀錄
@@ -163,5 +183,10 @@ class OperationLog(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.now)  # 改為本地時間
     ip_address = db.Column(db.String(50))
 
+    # ✅ 操作紀錄頁 keyset 分頁用
+    __table_args__ = (
+        db.Index('ix_operation_logs_timestamp_id', 'timestamp', 'id'),
+    )
+
     def __repr__(self):
         return f"<Log {self.user_type}-{self.user_id}: {self.action}>"
@@ -1,26 +1,18 @@
 from flask import Blueprint, render_template, jsonify
-from models import Candidate, Vote, VotePhase, Setting, db
+from models import Candidate, Vote, db
+from utils.helpers import get_setting, get_int_setting
+from utils.phase_service import get_current_phase, get_latest_closed_phase
 from sqlalchemy import func
 
 public_votes_bp = Blueprint('public_votes', __name__)
 
 # 工具：投票標題
 def get_parent_vote_title():
-    setting = Setting.query.filter_by(key='parent_vote_title').first()
-    return setting.value if setting else '家長投票'
-
-# 工具：目前階段
-def get_current_phase():
-    return VotePhase.query.filter_by(is_open=True).first()
-
-# 工具：最近結束階段
-def get_latest_phase():
-    return VotePhase.query.filter_by(is_open=False).order_by(VotePhase.id.desc()).first()
+    return get_setting('parent_vote_title', '家長投票')
 
 # 工具：刷新秒數
 def get_refresh_interval():
-    setting = Setting.query.filter_by(key='refresh_interval').first()
-    return int(setting.value) if setting and setting.value and setting.value.isdigit() else 10
+    return get_int_setting('refresh_interval', 10)
 
 # 工具：年級分類（API 用）
 def get_grade_from_class(class_name):
@@ -51,7 +43,7 @@ def get_grade_from_class(class_name):
 # ✅ 公開得票頁
 @public_votes_bp.route('/public/winners', endpoint='public_winners')
 def public_winners():
-    current_phase = get_current_phase() or get_latest_phase()
+    current_phase = get_current_phase() or get_latest_closed_phase()
     vote_title = get_parent_vote_title()
     refresh_interval = get_refresh_interval()
 
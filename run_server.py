@@ -34,6 +34,8 @@ os.makedirs(INSTANCE_DIR, exist_ok=True)
 os.environ.setdefault("SECRET_KEY", "change-me-in-production")
 os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(INSTANCE_DIR, 'voting.db')}")
 PORT = int(os.getenv("PORT", "5000"))
+# waitress 請求執行緒數；需大於 LOGIN_HASH_WORKERS + LOGIN_HASH_QUEUE，登入尖峰時才有執行緒留給投票
+THREADS = int(os.getenv("WAITRESS_THREADS", "8"))
 
 # -------------------------------------------------
 # 匯入 Flask app
@@ -68,7 +70,7 @@ def run():
     # 優先用 waitress，沒裝就 fallback 到 Flask 內建 server（方便除錯）
     try:
         from waitress import serve
-        serve(app, host="0.0.0.0", port=PORT)
+        serve(app, host="0.0.0.0", port=PORT, threads=THREADS)
     except ModuleNotFoundError:
         print("⚠️ 沒有安裝 waitress，改用 Flask 內建伺服器啟動（僅測試用）")
         app.run(host="0.0.0.0", port=PORT)
@@ -1,6 +1,10 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash, send_file
-from models import db, Staff, StaffVote, Setting
-import pandas as pd
+from models import db, Staff, StaffVote
+from utils.helpers import get_setting
+from utils.password_verifier import PasswordVerifierBusy, check_login
+from utils.staff_tally import CHOICES as STAFF_VOTE_CHOICES, current_reset_id as get_current_reset_id, get_staff_tally, invalidate_staff_tally
+from sqlalchemy.exc import IntegrityError
+from utils.account_import import AccountImportError, import_staff_file, summary_text
 from io import BytesIO
 
 staff_bp = Blueprint('staff', __name__)
@@ -15,7 +19,12 @@ def staff_login():
         password = request.form['password'].strip()
 
         staff = Staff.query.filter_by(username=username).first()
-        if staff and staff.check_password(password):
+        try:
+            ok = check_login(staff, password)
+        except PasswordVerifierBusy as e:
+            flash(f'目前登入人數眾多，請於 {e.retry_after} 秒後再試一次。', 'warning')
+            return render_template('staff_login.html'), 503, {'Retry-After': str(e.retry_after)}
+        if ok:
             session['staff_id'] = staff.id
             session['staff_name'] = staff.name
             # ✅ 登入後直接到簽到面板
@@ -53,41 +62,46 @@ def staff_vote():
     staff = Staff.query.get(session['staff_id'])
 
     # 取得投票標題
-    vote_title_setting = Setting.query.filter_by(key='staff_vote_title').first()
-    vote_title = vote_title_setting.value if vote_title_setting else '教職員意見調查'
+    vote_title = get_setting('staff_vote_title', '教職員意見調查')
 
-    # 取得 current_reset_id（沒有的話用 '1'）
-    current_reset_id = int(get_setting('current_reset_id', '1'))
+    # 目前輪次（current_reset_id，沒有的話用 1）
+    current_reset_id = get_current_reset_id()
 
-    # 查詢是否已投票
+    # 查詢是否已投票（走 (staff_id, reset_id) 唯一索引）
     existing_vote = StaffVote.query.filter_by(staff_id=staff.id, reset_id=current_reset_id).first()
 
     if request.method == 'POST' and not existing_vote:
         choice = request.form.get('choice')  # 贊成 or 反對
 
-        if choice in ['贊成', '反對']:
+        if choice in STAFF_VOTE_CHOICES:
             vote = StaffVote(
                 staff_id=staff.id,
                 vote_result=choice,
                 reset_id=current_reset_id
             )
             db.session.add(vote)
-            db.session.commit()
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # 同一人同時送出兩次：唯一索引擋下第二筆
+                db.session.rollback()
+                flash('您本輪已經投過票了', 'warning')
+                return redirect(url_for('staff.staff_vote'))
+            invalidate_staff_tally()
             flash('投票成功', 'success')
             return redirect(url_for('staff.staff_vote'))
         else:
             flash('請選擇有效的投票選項', 'danger')
 
-    # 票數統計
-    agree_count = StaffVote.query.filter_by(vote_result='贊成', reset_id=current_reset_id).count()
-    disagree_count = StaffVote.query.filter_by(vote_result='反對', reset_id=current_reset_id).count()
+    # 票數統計（快取的 GROUP BY 結果）
+    tally = get_staff_tally()
 
     return render_template(
         'staff_vote.html',
         staff=staff,
         existing_vote=existing_vote,
-        agree_count=agree_count,
-        disagree_count=disagree_count,
+        agree_count=tally.agree,
+        disagree_count=tally.disagree,
         vote_title=vote_title
     )
 
@@ -166,6 +180,7 @@ def export_staffs():
         '姓名': s.name or '',
         '班級': s.class_name or ''
     } for s in staffs]
+    import pandas as pd  # 只有匯出時才載入 pandas，避免拖慢啟動
     df = pd.DataFrame(data)
     output = BytesIO()
     df.to_excel(output, index=False)
@@ -180,43 +195,28 @@ def import_staffs():
 
     if request.method == 'POST':
         file = request.files.get('file')
-        if file and file.filename.endswith('.xlsx'):
-            df = pd.read_excel(file)
-            created, updated, skipped = 0, 0, 0
-
-            for _, row in df.iterrows():
-                username = str(row.get('帳號') or '').strip()
-                password = str(row.get('密碼') or '').strip()
-                name = None if pd.isna(row.get('姓名')) else str(row.get('姓名')).strip()
-                class_name = None if pd.isna(row.get('班級')) else str(row.get('班級')).strip()
-
-                if not username or not password:
-                    skipped += 1
-                    continue
-
-                existing = Staff.query.filter_by(username=username).first()
-                if existing:
-                    existing.name = name
-                    existing.class_name = class_name
-                    existing.set_password(password)
-                    updated += 1
-                else:
-                    s = Staff(username=username, name=name, class_name=class_name)
-                    s.set_password(password)
-                    db.session.add(s)
-                    created += 1
-
-            db.session.commit()
-            flash(f'✅ 匯入完成：新增 {created} 筆、更新 {updated} 筆、略過 {skipped} 筆', 'success')
+        if file and file.filename.lower().endswith(('.xlsx', '.csv')):
+            try:
+                report = import_staff_file(file, job_id=request.form.get('job_id') or None)
+            except AccountImportError as e:
+                flash(f'❌ {e}', 'danger')
+                return redirect(url_for('staff.import_staffs'))
+            except Exception as e:
+                flash(f'❌ 匯入失敗並已回滾：{e}', 'danger')
+                return redirect(url_for('staff.import_staffs'))
+
+            flash(summary_text(report), 'success')
+            flash(f'⏱️ {report.timing_text()}', 'info')
             return redirect(url_for('staff.admin_staffs'))
         else:
-            flash('請上傳 .xlsx 檔案', 'danger')
+            flash('請上傳 .xlsx 或 .csv 檔案', 'danger')
     return render_template('admin_staff_import.html')
 
 @staff_bp.route('/admin/staffs/download_sample')
 def download_sample_staffs():
     if 'admin' not in session:
         return redirect(url_for('admin_auth.admin_login'))
+    import pandas as pd
     sample_data = pd.DataFrame([
         {'帳號': 'staff01', '密碼': '1234', '姓名': '王小明', '班級': '六年級'},
         {'帳號': 'staff02', '密碼': '5678', '姓名': '李小華', '班級': '五年級'},
@@ -226,10 +226,3 @@ def download_sample_staffs():
     output.seek(0)
     return send_file(output, as_attachment=True, download_name='教職員名單範例.xlsx',
                      mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-
-# ----------------------
-# 工具函式
-# ----------------------
-def get_setting(key, default=''):
-    setting = Setting.query.filter_by(key=key).first()
-    return setting.value if setting else default
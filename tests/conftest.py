@@ -0,0 +1,91 @@
+# tests/conftest.py
+# -*- coding: utf-8 -*-
+"""
+測試共用設定：app 指向暫存 SQLite 與暫存 instance 目錄，每個測試結束後清空資料表與行程內快取。
+"""
+import os
+import shutil
+import tempfile
+
+import pytest
+
+_TMP_DIR = tempfile.mkdtemp(prefix="voting-test-")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_TMP_DIR, "test.db")
+os.environ["OPLOG_ASYNC"] = "0"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+from app import app as flask_app  # noqa: E402  （必須在設定環境變數之後 import）
+from models import db, Admin, VotePhase  # noqa: E402
+
+_INSTANCE_DIR = os.path.join(_TMP_DIR, "instance")
+os.makedirs(_INSTANCE_DIR, exist_ok=True)
+flask_app.instance_path = _INSTANCE_DIR
+flask_app.extensions["export_jobs"].export_dir = os.path.join(_INSTANCE_DIR, "exports")
+flask_app.config["TESTING"] = True
+
+
+def _reset_caches():
+    from utils import dashboard_stats, vote_timeline
+    from utils.log_query import invalidate_log_counts
+    from utils.phase_service import invalidate_phases
+    from utils.settings_service import invalidate_settings
+    from utils.staff_tally import invalidate_staff_tally
+
+    invalidate_phases(broadcast=False)
+    invalidate_settings(broadcast=False)
+    invalidate_staff_tally(broadcast=False)
+    invalidate_log_counts()
+    dashboard_stats._cache.clear()
+    vote_timeline._cache.clear()
+
+
+def _truncate():
+    db.session.rollback()
+    for table in reversed(db.metadata.sorted_tables):
+        db.session.execute(table.delete())
+    db.session.commit()
+    _reset_caches()
+
+
+@pytest.fixture
+def app():
+    """每個測試都從空資料庫開始（包含啟動時自動建立的管理員與階段）。"""
+    with flask_app.app_context():
+        _truncate()
+        yield flask_app
+        _truncate()
+    shutil.rmtree(os.path.join(_INSTANCE_DIR, "exports"), ignore_errors=True)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_client(app):
+    admin = Admin(username="admin")
+    admin.set_password("admin")
+    db.session.add(admin)
+    db.session.commit()
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s["admin"] = True
+        s["admin_id"] = admin.id
+    return client
+
+
+@pytest.fixture
+def phases(app):
+    """與啟動時相同的三個階段（皆未開啟）。"""
+    from utils.phase_service import invalidate_phases
+
+    rows = [
+        VotePhase(id=1, name="家長委員", max_votes=6, promote_count=2),
+        VotePhase(id=2, name="常務委員", max_votes=3, promote_count=1),
+        VotePhase(id=3, name="家長會長", max_votes=1, promote_count=1),
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+    invalidate_phases(broadcast=False)
+    return rows
@@ -0,0 +1,73 @@
+# tests/test_account_generator.py
+# -*- coding: utf-8 -*-
+"""批次產生家長帳號：班級人數清單、連續編號、既有帳號略過或重設密碼、依年級分組。"""
+import pytest
+from werkzeug.security import check_password_hash
+
+from models import db, User
+from utils.account_generator import (
+    PASSWORD_ALPHABET,
+    AccountGenerationError,
+    create_accounts,
+    group_by_grade,
+    parse_class_plan,
+    plan_accounts,
+)
+
+
+def test_parse_class_plan():
+    assert parse_class_plan("101 3\n\n102,2\n601：1\n") == [("101", 3), ("102", 2), ("601", 1)]
+    with pytest.raises(AccountGenerationError, match="第 2 行"):
+        parse_class_plan("101 3\n102 兩人")
+
+
+def test_plan_accounts_numbers_classes_in_order():
+    accounts = plan_accounts("wh-", start=9, width=3, class_plan=[("601", 1), ("101", 2)], password_length=8)
+
+    assert [(a.username, a.class_name, a.grade) for a in accounts] == [
+        ("wh-009", "601", "六年級"), ("wh-010", "101", "一年級"), ("wh-011", "101", "一年級"),
+    ]
+    assert all(len(a.password) == 8 and set(a.password) <= set(PASSWORD_ALPHABET) for a in accounts)
+    assert list(group_by_grade(accounts)) == ["一年級", "六年級"]
+
+    unassigned = plan_accounts("p", start=1, width=2, count=2)
+    assert [(a.username, a.grade) for a in unassigned] == [("p01", "未分班"), ("p02", "未分班")]
+
+
+@pytest.mark.parametrize("kwargs", [
+    dict(count=0),
+    dict(count=5001),
+    dict(count=1, width=0),
+    dict(count=1, password_length=3),
+])
+def test_plan_accounts_rejects_bad_parameters(kwargs):
+    with pytest.raises(AccountGenerationError):
+        plan_accounts("wh-", **{"start": 1, "width": 3, **kwargs})
+
+
+def test_create_accounts_skips_or_resets_existing(app, monkeypatch):
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_METHOD", "pbkdf2:sha256:1000")
+    db.session.add(User(username="wh-001", password_hash="old"))
+    db.session.commit()
+
+    accounts = plan_accounts("wh-", start=1, width=3, count=3)
+    report, written = create_accounts(accounts)
+    assert [a.username for a in written] == ["wh-002", "wh-003"]
+    assert report.counts["skipped"] == 1 and report.counts["created"] == 2
+    assert User.query.filter_by(username="wh-001").one().password_hash == "old"
+    for a in written:
+        assert check_password_hash(User.query.filter_by(username=a.username).one().password_hash, a.password)
+
+    report, written = create_accounts(accounts, reset_existing=True)
+    assert len(written) == 3 and report.counts["updated"] == 3
+    user = User.query.filter_by(username="wh-001").one()
+    assert check_password_hash(user.password_hash, accounts[0].password)
+    assert User.query.count() == 3
+
+
+def test_create_accounts_stores_class(app, monkeypatch):
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_METHOD", "pbkdf2:sha256:1000")
+    create_accounts(plan_accounts("wh-", start=1, width=3, class_plan=[("302", 1)]))
+    create_accounts(plan_accounts("p", start=1, width=2, count=1))
+
+    assert dict(db.session.query(User.username, User.class_name)) == {"wh-001": "302", "p01": None}
@@ -0,0 +1,64 @@
+# tests/test_candidate_import.py
+# -*- coding: utf-8 -*-
+"""候選人匯入：檔案內去重、與既有候選人比對後批次新增 / 更新、格式錯誤時不寫入。"""
+import io
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from models import db, Candidate
+from utils.candidate_import import CandidateImportError, import_candidate_file
+
+
+def _csv(text, filename="candidates.csv"):
+    return FileStorage(stream=io.BytesIO(text.encode("utf-8")), filename=filename)
+
+
+def test_import_creates_updates_and_skips(app, phases):
+    db.session.add_all([
+        Candidate(name="王小明", class_name="101", parent_name="王小明", phase_id=1),
+        Candidate(name="舊名字", class_name="102", parent_name="李大華", phase_id=1),
+        Candidate(name="陳小美", class_name="103", parent_name="陳小美", phase_id=2),  # 其他階段不比對
+    ])
+    db.session.commit()
+
+    report = import_candidate_file(_csv(
+        "班級,家長姓名\n"
+        "101,王小明\n"       # 已存在、沒變
+        "102, 李大華 \n"     # 已存在、顯示名不同 → 更新
+        "103,陳小美\n"       # 新增
+        "103,陳小美\n"       # 檔案內重複
+        ",無班級\n"          # 缺欄
+    ), phase_id=1)
+
+    assert report.counts == {"rows": 5, "unchanged": 1, "duplicates": 1, "skipped": 1, "created": 1, "updated": 1}
+    assert [name for name, in db.session.query(Candidate.name).filter_by(phase_id=1).order_by(Candidate.id)] == \
+        ["王小明", "李大華", "陳小美"]
+    assert Candidate.query.filter_by(phase_id=2).count() == 1
+
+
+def test_missing_columns_raise_and_write_nothing(app, phases):
+    with pytest.raises(CandidateImportError, match="缺少必要欄位"):
+        import_candidate_file(_csv("班級,姓名\n101,王小明\n"), phase_id=1)
+    assert Candidate.query.count() == 0
+
+
+def test_import_route_reports_counts_as_json(admin_client, phases):
+    res = admin_client.post(
+        "/admin/candidates/import",
+        data={"file": (io.BytesIO("班級,家長姓名\n101,王小明\n102,李大華\n".encode("utf-8")), "c.csv")},
+        headers={"X-Requested-With": "XMLHttpRequest"},
+        content_type="multipart/form-data",
+    )
+    assert res.status_code == 200
+    assert res.get_json()["counts"]["created"] == 2
+    assert Candidate.query.filter_by(phase_id=1).count() == 2
+
+    res = admin_client.post(
+        "/admin/candidates/import",
+        data={"file": (io.BytesIO(b"a,b\n1,2\n"), "c.csv")},
+        headers={"X-Requested-With": "XMLHttpRequest"},
+        content_type="multipart/form-data",
+    )
+    assert res.status_code == 400
+    assert res.get_json()["ok"] is False
@@ -0,0 +1,77 @@
+# tests/test_dashboard_stats.py
+# -*- coding: utf-8 -*-
+"""主控台統計：一次查詢取回所有數字、未指定階段時的選擇順序、快取。"""
+import pytest
+
+from models import db, Candidate, Staff, StaffVote, User, Vote, VotePhase
+from utils import dashboard_stats
+from utils.dashboard_stats import get_dashboard_stats
+from utils.phase_service import get_phases, invalidate_phases
+from utils.query_profiler import QueryProfiler
+from utils.staff_tally import current_reset_id
+
+
+@pytest.fixture
+def election(app, phases):
+    users = [User(username=f"p{i}", password_hash="x", is_signed_in=i < 3) for i in range(4)]
+    cands = [Candidate(name=f"c{i}", class_name="101", parent_name=f"c{i}", phase_id=1, is_signed_in=i == 0)
+             for i in range(2)]
+    staff = [Staff(username=f"t{i}", password_hash="x", name=f"T{i}") for i in range(3)]
+    db.session.add_all(users + cands + staff)
+    db.session.flush()
+    db.session.add_all([
+        Vote(voter_id=users[0].id, candidate_id=cands[0].id, phase_id=1),
+        Vote(voter_id=users[0].id, candidate_id=cands[1].id, phase_id=1),
+        Vote(voter_id=users[1].id, candidate_id=cands[0].id, phase_id=1),
+        StaffVote(staff_id=staff[0].id, vote_result="贊成", reset_id=1),
+        StaffVote(staff_id=staff[1].id, vote_result="反對", reset_id=1),
+        StaffVote(staff_id=staff[2].id, vote_result="贊成", reset_id=2),  # 其他輪不計
+    ])
+    db.session.commit()
+
+
+def test_counts_in_a_single_query(election):
+    get_phases(), current_reset_id()  # 先暖好階段 / 設定快取
+    with QueryProfiler("dashboard") as prof:
+        stats = get_dashboard_stats(1)
+    prof.assert_max_queries(1)
+
+    assert stats.to_dict() | {"generated_at": 0} == {
+        "phase_id": 1, "phase_name": "家長委員", "phase_open": False,
+        "candidates": 2, "candidates_signed_in": 1, "ballots": 3, "voters": 2,
+        "registered_users": 4, "users_signed_in": 3,
+        "staff_total": 3, "staff_reset_id": 1, "staff_agree": 1, "staff_disagree": 1,
+        "generated_at": 0, "turnout": 50.0, "staff_voted": 2,
+    }
+
+
+def test_default_phase_order(election, monkeypatch):
+    monkeypatch.setattr(dashboard_stats, "DASHBOARD_STATS_TTL", 0)
+
+    assert get_dashboard_stats().phase_id == 1  # 沒有開啟的階段：最後一個有票的
+
+    db.session.get(VotePhase, 2).is_open = True
+    db.session.commit()
+    invalidate_phases(broadcast=False)
+    assert get_dashboard_stats().phase_id == 2  # 開啟中的優先
+    assert get_dashboard_stats(99).phase_id == 2  # 不存在的階段視為未指定
+
+    db.session.get(VotePhase, 2).is_open = False
+    Vote.query.delete()
+    db.session.commit()
+    invalidate_phases(broadcast=False)
+    assert get_dashboard_stats().phase_id == 1  # 都沒有票：第一個階段
+
+
+def test_stats_are_cached(election):
+    first = get_dashboard_stats(1)
+    Vote.query.delete()
+    db.session.commit()
+    assert get_dashboard_stats(1) is first
+    dashboard_stats._cache.clear()
+    assert get_dashboard_stats(1).ballots == 0
+
+
+def test_dashboard_page(admin_client, election):
+    res = admin_client.get("/admin/dashboard")
+    assert res.status_code == 200
@@ -0,0 +1,63 @@
+# tests/test_election_report.py
+# -*- coding: utf-8 -*-
+"""整場選舉報表：各工作表的內容、同票同名次、工作表名稱合法且不重複。"""
+import io
+
+from openpyxl import load_workbook
+
+from models import db, Candidate, Staff, StaffVote, User, Vote
+from utils.election_report import _safe_sheet_name, write_election_report
+
+
+def _sheet(wb, name):
+    return [list(r) for r in wb[name].iter_rows(values_only=True)]
+
+
+def test_election_report_sheets(app, phases):
+    users = [User(username=f"p{i}", password_hash="x") for i in range(4)]
+    a = Candidate(name="A", class_name="101", parent_name="甲", phase_id=1, is_promoted=True)
+    b = Candidate(name="B", class_name="102", parent_name="乙", phase_id=1, is_promoted=True, promote_type="manual")
+    c = Candidate(name="C", class_name="103", parent_name="丙", phase_id=1)
+    staff = [Staff(username=f"t{i}", password_hash="x", name=f"T{i}") for i in range(3)]
+    db.session.add_all(users + [a, b, c] + staff)
+    db.session.flush()
+    db.session.add_all([
+        Vote(voter_id=users[0].id, candidate_id=a.id, phase_id=1),
+        Vote(voter_id=users[0].id, candidate_id=b.id, phase_id=1),
+        Vote(voter_id=users[1].id, candidate_id=a.id, phase_id=1),
+        Vote(voter_id=users[1].id, candidate_id=b.id, phase_id=1),
+        Vote(voter_id=users[2].id, candidate_id=c.id, phase_id=1),
+        StaffVote(staff_id=staff[0].id, vote_result="贊成", reset_id=1),
+        StaffVote(staff_id=staff[1].id, vote_result="反對", reset_id=1),
+        StaffVote(staff_id=staff[2].id, vote_result="贊成", reset_id=2),
+    ])
+    db.session.commit()
+
+    buf = io.BytesIO()
+    write_election_report(buf)
+    wb = load_workbook(io.BytesIO(buf.getvalue()), read_only=True)
+
+    assert wb.sheetnames == ["總覽", "家長委員得票", "常務委員得票", "家長會長得票", "晉級名單", "教職員投票"]
+
+    overview = _sheet(wb, "總覽")
+    assert overview[1][:9] == [1, "家長委員", "已結束", 2, 6, 3, 5, 3, 4]
+    assert overview[1][9] == 0.75
+    assert overview[2][:9] == [2, "常務委員", "已結束", 1, 3, 0, 0, 0, 4]
+
+    # 同票同名次，下一名跳號
+    assert _sheet(wb, "家長委員得票")[1:] == [
+        [1, "101", "甲", 2, "✔"],
+        [1, "102", "乙", 2, "手動"],
+        [3, "103", "丙", 1, None],
+    ]
+    assert _sheet(wb, "晉級名單")[1:] == [["家長委員", "101", "甲", "auto"], ["家長委員", "102", "乙", "manual"]]
+    assert _sheet(wb, "教職員投票")[1:] == [[1, 1, 1, 2], [2, 1, 0, 1]]
+    wb.close()
+
+
+def test_safe_sheet_name():
+    used = set()
+    assert _safe_sheet_name("階段[1]/得票?", used) == "階段_1__得票_"
+    long_name = "x" * 40
+    assert _safe_sheet_name(long_name, used) == "x" * 31
+    assert _safe_sheet_name(long_name, used) == "x" * 28 + "(2)"
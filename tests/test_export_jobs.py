@@ -0,0 +1,110 @@
+# tests/test_export_jobs.py
+# -*- coding: utf-8 -*-
+"""匯出快取：資料內容有變（含同長度改名、清空後重投）就要產生新檔，沒變則沿用舊檔。"""
+import os
+
+from openpyxl import load_workbook
+
+from models import db, Candidate, Staff, StaffVote, User, Vote
+from utils.export_jobs import data_version
+
+
+def _cells(path):
+    wb = load_workbook(path, read_only=True)
+    try:
+        return {str(v) for ws in wb.worksheets for row in ws.iter_rows(values_only=True) for v in row if v is not None}
+    finally:
+        wb.close()
+
+
+def _votes_by_parent(path):
+    wb = load_workbook(path, read_only=True)
+    try:
+        return {row[2]: row[3] for row in wb.active.iter_rows(min_row=2, values_only=True)}
+    finally:
+        wb.close()
+
+
+def test_same_length_rename_changes_version(app, phases):
+    c = Candidate(name="c1", class_name="101", parent_name="王小明", phase_id=1)
+    db.session.add(c)
+    db.session.commit()
+    before = data_version(1), data_version()
+
+    c.parent_name = "王曉明"
+    db.session.commit()
+    assert (data_version(1), data_version()) != before
+
+    c.class_name = "102"
+    db.session.commit()
+    assert data_version(1) != before[0]
+
+
+def test_promotion_and_winner_flags_change_version(app, phases):
+    c = Candidate(name="c1", class_name="101", parent_name="p1", phase_id=1)
+    db.session.add(c)
+    db.session.commit()
+    v0 = data_version(1)
+    c.is_winner = True
+    db.session.commit()
+    v1 = data_version(1)
+    c.is_promoted, c.promote_type = True, "manual"
+    db.session.commit()
+    assert len({v0, v1, data_version(1)}) == 3
+
+
+def test_cached_workbook_reused_until_rename(app, phases):
+    runner = app.extensions["export_jobs"]
+    c = Candidate(name="c1", class_name="101", parent_name="p1", phase_id=1)
+    db.session.add(c)
+    db.session.commit()
+
+    key = runner.build_now("vote_results", 1)
+    assert runner.build_now("vote_results", 1) == key
+    assert "p1" in _cells(runner.path_for(key))
+
+    c.parent_name = "q1"
+    db.session.commit()
+    new_key = runner.build_now("vote_results", 1)
+    assert new_key != key
+    cells = _cells(runner.path_for(new_key))
+    assert "q1" in cells and "p1" not in cells
+    assert not os.path.exists(runner.path_for(key))  # 舊版本已清掉
+
+
+def test_clear_and_recast_changes_version(app, admin_client, phases):
+    runner = app.extensions["export_jobs"]
+    a = Candidate(name="c1", class_name="101", parent_name="甲", phase_id=1)
+    b = Candidate(name="c2", class_name="102", parent_name="乙", phase_id=1)
+    voter = User(username="p001", password_hash="x")
+    db.session.add_all([a, b, voter])
+    db.session.commit()
+    db.session.add(Vote(voter_id=voter.id, candidate_id=a.id, phase_id=1))
+    db.session.commit()
+    vote_id = Vote.query.one().id
+    key, report = runner.build_now("vote_results", 1), data_version()
+    assert _votes_by_parent(runner.path_for(key)) == {"甲": 1, "乙": 0}
+
+    admin_client.post("/admin/votes/clear")
+    db.session.add(Vote(voter_id=voter.id, candidate_id=b.id, phase_id=1))
+    db.session.commit()
+    assert Vote.query.one().id == vote_id  # SQLite 重用了 rowid，筆數與最大 id 都沒變
+
+    new_key = runner.build_now("vote_results", 1)
+    assert new_key != key
+    assert data_version() != report
+    assert _votes_by_parent(runner.path_for(new_key)) == {"甲": 0, "乙": 1}
+
+
+def test_staff_clear_and_recast_changes_version(app, admin_client, phases):
+    staff = Staff(username="t1", password_hash="x", name="A")
+    db.session.add(staff)
+    db.session.commit()
+    db.session.add(StaffVote(staff_id=staff.id, vote_result="贊成", reset_id=1))
+    db.session.commit()
+    before = data_version()
+
+    admin_client.post("/admin/staff_votes/reset")
+    db.session.add(StaffVote(staff_id=staff.id, vote_result="反對", reset_id=1))
+    db.session.commit()
+    assert data_version() != before
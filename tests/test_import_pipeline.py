@@ -0,0 +1,68 @@
+# tests/test_import_pipeline.py
+# -*- coding: utf-8 -*-
+"""匯入進度存在 instance 目錄：任何 worker 都能回報同一個 job 的進度。"""
+import io
+import os
+
+from models import db, User
+from utils import import_pipeline
+from utils.import_pipeline import ImportProgress, get_import_progress
+
+
+def test_progress_is_shared_through_instance_dir(app):
+    progress = ImportProgress("job-1")
+    progress.stage("hash", total=10)
+    progress.advance(4)
+    progress._write()  # advance() 會節流寫檔，這裡直接寫出目前狀態
+
+    # 別的 worker 只看得到檔案
+    assert os.path.exists(os.path.join(app.instance_path, "import_progress", "job-1.json"))
+    data = get_import_progress("job-1")
+    assert data["stage"] == "hash" and data["done"] == 4 and data["percent"] == 40
+    assert data["stage_label"] == "密碼雜湊"
+
+    progress.finish()
+    assert get_import_progress("job-1")["finished"] is True
+
+
+def test_unknown_or_invalid_job_id(app):
+    assert get_import_progress("missing") is None
+    assert get_import_progress("../../etc/passwd") is None
+    ImportProgress("../evil").finish()  # 格式不符：不寫檔也不出錯
+    assert not os.path.exists(os.path.join(app.instance_path, "evil.json"))
+
+
+def test_expired_progress_files_are_removed(app, monkeypatch):
+    ImportProgress("old-job").finish()
+    monkeypatch.setattr(import_pipeline, "PROGRESS_TTL", -1)
+    ImportProgress("new-job")
+    assert get_import_progress("old-job") is None
+    assert get_import_progress("new-job") is not None
+
+
+def test_user_import_reports_progress(admin_client):
+    csv_data = "帳號,密碼\n" + "".join(f"wh-{i:03d},pw{i}\n" for i in range(5))
+    resp = admin_client.post("/admin/users/import", data={
+        "file": (io.BytesIO(csv_data.encode("utf-8")), "users.csv"),
+        "job_id": "import-abc",
+    }, content_type="multipart/form-data")
+    assert resp.status_code == 302
+    assert User.query.count() == 5
+
+    data = admin_client.get("/admin/import/progress/import-abc").get_json()
+    assert data["finished"] is True and not data["error"]
+
+
+def _import_users(admin_client, csv_data):
+    return admin_client.post("/admin/users/import", data={
+        "file": (io.BytesIO(csv_data.encode("utf-8")), "users.csv"),
+    }, content_type="multipart/form-data")
+
+
+def test_user_import_keeps_class_when_column_missing(admin_client):
+    _import_users(admin_client, "帳號,密碼,班級\nwh-001,pw1,301\nwh-002,pw2,\n")
+    assert dict(db.session.query(User.username, User.class_name)) == {"wh-001": "301", "wh-002": None}
+
+    _import_users(admin_client, "帳號,密碼\nwh-001,pw9\n")  # 只改密碼的檔案不會清掉班級
+    db.session.expire_all()
+    assert db.session.query(User.class_name).filter_by(username="wh-001").scalar() == "301"
@@ -0,0 +1,61 @@
+# tests/test_log_archive.py
+# -*- coding: utf-8 -*-
+"""操作紀錄封存：舊紀錄依月份搬進 gzip JSONL，分批刪除，並可再依條件查詢。"""
+import shutil
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, OperationLog
+from utils.log_archive import archive_old_logs, get_archive_dir, list_archives, search_archived_logs
+
+
+@pytest.fixture
+def archive_dir(app):
+    path = get_archive_dir()
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def _log(ts, action, user_type="admin", ip="10.0.0.1"):
+    return OperationLog(user_type=user_type, user_id=1, action=action, ip_address=ip, timestamp=ts)
+
+
+@pytest.fixture
+def logs(app, archive_dir):
+    now = datetime.now()
+    rows = [
+        _log(datetime(2024, 1, 5, 9, 0), "刪除候選人 王小明"),
+        _log(datetime(2024, 1, 20, 10, 30), "教職員投票", user_type="staff", ip="192.168.1.5"),
+        _log(datetime(2024, 2, 1, 8, 15), "新增候選人 李大華"),
+        _log(now - timedelta(days=1), "最近的紀錄"),
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+
+def test_archives_old_logs_by_month_in_batches(logs):
+    result = archive_old_logs(retention_days=30, batch_size=2)
+
+    assert result["archived"] == 3
+    assert result["files"] == ["operation_logs_2024-01.jsonl.gz", "operation_logs_2024-02.jsonl.gz"]
+    assert [a["month"] for a in list_archives()] == ["2024-01", "2024-02"]
+    assert [log.action for log in OperationLog.query.all()] == ["最近的紀錄"]
+
+    # 再跑一次沒有可封存的紀錄
+    assert archive_old_logs(retention_days=30)["archived"] == 0
+
+
+def test_search_archived_logs(logs):
+    archive_old_logs(retention_days=30)
+
+    newest_first = search_archived_logs()
+    assert [r["action"] for r in newest_first] == ["新增候選人 李大華", "教職員投票", "刪除候選人 王小明"]
+    assert newest_first[0]["timestamp"] == "2024-02-01 08:15:00"
+
+    assert [r["action"] for r in search_archived_logs(keyword="候選人")] == ["新增候選人 李大華", "刪除候選人 王小明"]
+    assert [r["action"] for r in search_archived_logs(keyword="192.168")] == ["教職員投票"]
+    assert [r["action"] for r in search_archived_logs(user_type="staff")] == ["教職員投票"]
+    assert [r["action"] for r in search_archived_logs(date_from="2024-01-10", date_to="2024-01-31")] == ["教職員投票"]
+    assert len(search_archived_logs(limit=2)) == 2
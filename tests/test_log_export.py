@@ -0,0 +1,62 @@
+# tests/test_log_export.py
+# -*- coding: utf-8 -*-
+"""操作紀錄 CSV 匯出：套用篩選條件、依時間新到舊、可選 gzip。"""
+import csv
+import gzip
+import io
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, OperationLog
+
+
+@pytest.fixture
+def logs(app):
+    base = datetime(2025, 3, 1, 9, 0)
+    rows = [
+        OperationLog(user_type="admin", user_id=1, action="刪除候選人 王小明", ip_address="10.0.0.1", timestamp=base),
+        OperationLog(user_type="staff", user_id=2, action="教職員投票", ip_address=None, timestamp=base + timedelta(hours=1)),
+        OperationLog(user_type="admin", user_id=1, action="新增候選人 李大華", ip_address="10.0.0.2",
+                     timestamp=base + timedelta(days=1)),
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+
+def _rows(data):
+    return list(csv.reader(io.StringIO(data.decode("utf-8"))))
+
+
+def test_export_all_newest_first(admin_client, logs):
+    res = admin_client.get("/admin/logs/export")
+    assert res.status_code == 200
+    assert res.mimetype == "text/csv"
+    assert "operation_logs.csv" in res.headers["Content-Disposition"]
+
+    rows = _rows(res.data)
+    assert rows[0] == ["時間", "使用者類型", "使用者ID", "操作", "IP"]
+    assert rows[1:] == [
+        ["2025-03-02 09:00:00", "admin", "1", "新增候選人 李大華", "10.0.0.2"],
+        ["2025-03-01 10:00:00", "staff", "2", "教職員投票", ""],
+        ["2025-03-01 09:00:00", "admin", "1", "刪除候選人 王小明", "10.0.0.1"],
+    ]
+
+
+def test_export_applies_filters(admin_client, logs):
+    res = admin_client.get("/admin/logs/export", query_string={"user_type": "admin", "date_to": "2025-03-01"})
+    assert [r[3] for r in _rows(res.data)[1:]] == ["刪除候選人 王小明"]
+
+    res = admin_client.get("/admin/logs/export", query_string={"keyword": "候選人"})
+    assert [r[3] for r in _rows(res.data)[1:]] == ["新增候選人 李大華", "刪除候選人 王小明"]
+
+
+def test_export_gzip_matches_plain(admin_client, logs, monkeypatch):
+    monkeypatch.setattr("admin.admin_logs.EXPORT_CHUNK_ROWS", 1)  # 每筆一個 chunk
+    plain = admin_client.get("/admin/logs/export").data
+    res = admin_client.get("/admin/logs/export", query_string={"gzip": "1"})
+
+    assert res.mimetype == "application/gzip"
+    assert "operation_logs.csv.gz" in res.headers["Content-Disposition"]
+    assert gzip.decompress(res.data) == plain
@@ -0,0 +1,70 @@
+# tests/test_log_query.py
+# -*- coding: utf-8 -*-
+"""操作紀錄 API：keyset 分頁不漏不重、總筆數快取跟著新增 / 刪除更新。"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, OperationLog
+from utils.log_query import get_total_count, invalidate_log_counts
+
+
+@pytest.fixture
+def logs(app):
+    base = datetime(2025, 3, 1, 9, 0)
+    # 每兩筆同一時間，測試 (timestamp, id) 的同分排序
+    rows = [
+        OperationLog(user_type="admin" if i % 3 else "staff", user_id=1, action=f"action {i}",
+                     ip_address="10.0.0.1", timestamp=base + timedelta(minutes=i // 2))
+        for i in range(11)
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+
+def _page(client, **params):
+    res = client.get("/admin/logs/data", query_string={"length": 4, **params})
+    assert res.status_code == 200
+    return res.get_json()
+
+
+def test_keyset_pages_cover_every_log_once(admin_client, logs):
+    seen, params = [], {}
+    while True:
+        page = _page(admin_client, **params)
+        assert page["recordsTotal"] == 11
+        seen.extend(row[3] for row in page["data"])
+        if not page["cursor"]:
+            break
+        params = {"after_ts": page["cursor"]["ts"], "after_id": page["cursor"]["id"]}
+
+    expected = [log.action for log in sorted(logs, key=lambda l: (l.timestamp, l.id), reverse=True)]
+    assert seen == expected
+
+
+def test_filters_and_filtered_count(admin_client, logs):
+    page = _page(admin_client, user_type="staff", length=100)
+    assert page["recordsTotal"] == 11
+    assert page["recordsFiltered"] == 4
+    assert {row[1] for row in page["data"]} == {"staff"}
+
+    page = _page(admin_client, date_from="2025-03-01", date_to="2025-02-28")
+    assert page["recordsFiltered"] == 0 and page["data"] == []
+
+
+def test_total_count_follows_inserts_and_deletes(app, logs):
+    invalidate_log_counts()
+    assert get_total_count() == 11
+
+    db.session.add(OperationLog(user_type="admin", action="new", timestamp=datetime.now()))
+    db.session.commit()
+    assert get_total_count() == 12  # 只補算新增的部分
+
+    OperationLog.query.filter(OperationLog.id == logs[0].id).delete()
+    db.session.commit()
+    assert get_total_count() == 11  # min(id) 改變：全量重算
+
+    OperationLog.query.delete()
+    db.session.commit()
+    assert get_total_count() == 0
@@ -0,0 +1,60 @@
+# tests/test_log_search.py
+# -*- coding: utf-8 -*-
+"""操作紀錄關鍵字查詢：FTS5 trigram 索引與 LIKE 結果一致，且跟著新增 / 修改 / 刪除同步。"""
+import pytest
+from sqlalchemy import or_
+
+from models import db, OperationLog
+from utils import log_search
+from utils.log_search import keyword_filter
+
+
+@pytest.fixture
+def logs(app):
+    if log_search.ensure_log_search_index() != "sqlite_fts":
+        pytest.skip("SQLite 未編入 FTS5 trigram")
+    rows = [
+        OperationLog(user_type="admin", action="刪除候選人 王小明", ip_address="10.0.0.1"),
+        OperationLog(user_type="admin", action="新增候選人 李大華", ip_address="10.0.0.2"),
+        OperationLog(user_type="staff", action="教職員投票：贊成", ip_address="192.168.1.5"),
+        OperationLog(user_type="admin", action='匯出 "選舉報表"', ip_address="10.0.0.1"),
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+
+def _search(keyword):
+    return sorted(r.id for r in OperationLog.query.filter(keyword_filter(keyword)))
+
+
+def _like(keyword):
+    like = f"%{keyword}%"
+    q = OperationLog.query.filter(or_(OperationLog.action.ilike(like), OperationLog.ip_address.ilike(like)))
+    return sorted(r.id for r in q)
+
+
+@pytest.mark.parametrize("keyword", ["候選人", "王小明", "192.168", "10.0.0.1", "教職員投票", "不存在的字"])
+def test_matches_like_results(logs, keyword):
+    assert _search(keyword) == _like(keyword)
+    assert "operation_logs_fts" in str(keyword_filter(keyword).compile())
+
+
+def test_short_keyword_falls_back_to_like(logs):
+    assert "operation_logs_fts" not in str(keyword_filter("新增").compile())
+    assert _search("新增") == [logs[1].id]
+
+
+def test_query_syntax_is_treated_as_text(logs):
+    assert _search('"選舉報表"') == [logs[3].id]
+    assert _search("OR 贊成 AND") == []
+
+
+def test_index_follows_updates_and_deletes(logs):
+    logs[0].action = "修改候選人 陳小美"
+    db.session.delete(logs[1])
+    db.session.commit()
+
+    assert _search("王小明") == []
+    assert _search("陳小美") == [logs[0].id]
+    assert _search("候選人") == [logs[0].id]
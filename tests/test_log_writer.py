@@ -0,0 +1,61 @@
+# tests/test_log_writer.py
+# -*- coding: utf-8 -*-
+"""操作紀錄背景寫入器：批次寫入、佇列滿時丟棄、stop() 寫完剩餘紀錄。"""
+import time
+from datetime import datetime
+
+import pytest
+
+from models import OperationLog
+from utils.helpers import add_log
+from utils.log_writer import LogWriter
+
+
+def _record(i):
+    return dict(user_type="admin", user_id=1, action=f"action {i}", ip_address=None, timestamp=datetime.now())
+
+
+@pytest.fixture
+def writer(app):
+    w = LogWriter(app, flush_ms=20, batch_size=3, max_queue=100)
+    yield w
+    w.stop()
+
+
+def test_background_thread_writes_in_batches(app, writer):
+    for i in range(7):
+        assert writer.submit(_record(i))
+
+    deadline = time.monotonic() + 5
+    while writer.written < 7 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert OperationLog.query.count() == 7
+    stats = writer.stats()
+    assert stats["written"] == 7 and stats["queued"] == 0
+    assert 3 <= stats["batches"] <= 7  # 每批最多 batch_size 筆
+
+
+def test_full_queue_drops_and_stop_flushes_rest(app, monkeypatch):
+    writer = LogWriter(app, flush_ms=20, batch_size=2, max_queue=3)
+    monkeypatch.setattr(writer, "start", lambda: None)  # 不啟動背景執行緒，佇列只進不出
+
+    results = [writer.submit(_record(i)) for i in range(5)]
+    assert results == [True, True, True, False, False]
+    assert writer.stats()["dropped"] == 2
+    assert OperationLog.query.count() == 0
+
+    writer.stop()
+    assert OperationLog.query.count() == 3
+    assert writer.stats() == {"queued": 0, "written": 3, "dropped": 2, "failed": 0, "batches": 2}
+
+
+def test_add_log_goes_through_registered_writer(app, monkeypatch):
+    writer = LogWriter(app)
+    monkeypatch.setattr(writer, "start", lambda: None)
+    monkeypatch.setitem(app.extensions, "oplog_writer", writer)
+
+    add_log("admin", 1, "刪除候選人")
+    assert OperationLog.query.count() == 0  # 不在請求中 commit
+    writer.flush()
+    assert [log.action for log in OperationLog.query.all()] == ["刪除候選人"]
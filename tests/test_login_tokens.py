@@ -0,0 +1,99 @@
+# tests/test_login_tokens.py
+# -*- coding: utf-8 -*-
+"""QR 登入碼：GET 只顯示確認頁、POST 才用掉、重複使用與批次失效、刪除帳號。"""
+import pytest
+
+from models import db, LoginTokenUse, User, VotePhase
+from utils.login_tokens import make_token, revoke_all_tokens, set_token_login_enabled
+from utils.phase_service import invalidate_phases
+
+
+@pytest.fixture
+def parent(app, phases):
+    db.session.get(VotePhase, 1).is_open = True
+    user = User(username="p001", password_hash="x")
+    db.session.add(user)
+    db.session.commit()
+    invalidate_phases(broadcast=False)
+    set_token_login_enabled(True)
+    return user
+
+
+def _uses():
+    return LoginTokenUse.query.count()
+
+
+def test_get_shows_confirm_page_without_consuming(client, parent):
+    token = make_token(parent.id)
+
+    for _ in range(2):  # 連結預覽 + 家長本人開啟
+        res = client.get(f"/login/token/{token}")
+        assert res.status_code == 200
+        assert "p001" in res.get_data(as_text=True)
+    assert _uses() == 0
+    with client.session_transaction() as s:
+        assert "user_id" not in s
+
+    res = client.post(f"/login/token/{token}")
+    assert res.status_code == 302
+    assert res.headers["Location"].endswith("/vote")
+    assert _uses() == 1
+    with client.session_transaction() as s:
+        assert s["user_id"] == parent.id
+
+
+def test_token_cannot_be_reused_in_same_phase(app, parent):
+    token = make_token(parent.id)
+    assert app.test_client().post(f"/login/token/{token}").headers["Location"].endswith("/vote")
+
+    for method in ("get", "post"):
+        other = app.test_client()
+        res = getattr(other, method)(f"/login/token/{token}")
+        assert res.status_code == 302
+        assert res.headers["Location"].endswith("/login")
+        with other.session_transaction() as s:
+            assert "user_id" not in s
+    assert _uses() == 1
+
+
+def test_revoked_token_is_rejected(client, parent):
+    token = make_token(parent.id)
+    revoke_all_tokens()
+
+    res = client.post(f"/login/token/{token}")
+    assert res.headers["Location"].endswith("/login")
+    assert _uses() == 0
+
+    res = client.post(f"/login/token/{make_token(parent.id)}")
+    assert res.headers["Location"].endswith("/vote")
+
+
+def test_tampered_token_is_rejected(client, parent):
+    res = client.get(f"/login/token/{make_token(parent.id)}x")
+    assert res.headers["Location"].endswith("/login")
+
+
+def test_deleting_users_removes_token_uses(app, admin_client, parent):
+    other = User(username="p002", password_hash="x")
+    db.session.add(other)
+    db.session.commit()
+    for user in (parent, other):
+        app.test_client().post(f"/login/token/{make_token(user.id)}")
+    assert _uses() == 2
+
+    admin_client.get(f"/admin/users/delete/{parent.id}")
+    assert db.session.get(User, parent.id) is None
+    assert _uses() == 1
+
+    admin_client.post("/admin/users/delete", data={"user_ids": [str(other.id)]})
+    assert User.query.count() == 0
+    assert _uses() == 0
+
+
+def test_clear_all_data_removes_token_uses(app, admin_client, parent):
+    app.test_client().post(f"/login/token/{make_token(parent.id)}")
+    assert _uses() == 1
+
+    admin_client.post("/admin/clear_all_data", data={"confirm_delete": "DELETE"})
+    assert User.query.count() == 0
+    assert _uses() == 0
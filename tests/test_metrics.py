@@ -0,0 +1,60 @@
+# tests/test_metrics.py
+# -*- coding: utf-8 -*-
+"""請求計時：直方圖與百分位數、每個 endpoint 的查詢數、Prometheus 輸出與權限。"""
+import pytest
+
+from utils.metrics import RequestMetrics, metrics
+
+
+def test_histogram_percentiles():
+    m = RequestMetrics()
+    for ms in [3, 7, 7, 20, 40, 90, 200, 400, 800, 6000]:
+        m.request_started()
+        m.request_finished("auth.vote", 200, ms, db_queries=2, db_ms=1.0)
+    m.request_started()
+    m.request_finished("auth.vote", 500, 1.0, db_queries=0, db_ms=0.0)
+
+    row, = m.snapshot()
+    assert row["count"] == 11
+    assert row["statuses"] == {200: 10, 500: 1}
+    assert row["errors"] == 1
+    assert row["p50_ms"] == 50
+    assert row["p99_ms"] == 6000  # 落在 +Inf 格：回傳最大值
+    assert row["max_ms"] == 6000
+    assert m.in_flight == 0
+
+    text = m.prometheus_text()
+    assert 'http_request_duration_seconds_bucket{endpoint="auth.vote",le="0.005"} 2' in text
+    assert 'http_request_duration_seconds_bucket{endpoint="auth.vote",le="+Inf"} 11' in text
+    assert 'http_responses_total{endpoint="auth.vote",status="500"} 1' in text
+    assert 'db_queries_total{endpoint="auth.vote"} 20' in text
+
+
+@pytest.fixture
+def fresh_metrics(app):
+    metrics.reset()
+    yield metrics
+    metrics.reset()
+
+
+def test_requests_are_recorded_with_db_queries(admin_client, fresh_metrics):
+    admin_client.get("/admin/logs/data")
+    admin_client.get("/no-such-page")
+
+    rows = {r["endpoint"]: r for r in fresh_metrics.snapshot()}
+    assert rows["admin_logs.logs_data"]["count"] == 1
+    assert rows["admin_logs.logs_data"]["db_queries_avg"] >= 1
+    assert rows["(unmatched)"]["statuses"] == {404: 1}
+
+
+def test_prometheus_endpoint_requires_admin_or_token(app, client, admin_client, fresh_metrics, monkeypatch):
+    assert client.get("/admin/metrics/prometheus").status_code == 403
+
+    monkeypatch.setitem(app.config, "METRICS_TOKEN", "s3cret")
+    assert client.get("/admin/metrics/prometheus?token=wrong").status_code == 403
+    res = client.get("/admin/metrics/prometheus", headers={"Authorization": "Bearer s3cret"})
+    assert res.status_code == 200
+    assert res.headers["Content-Type"] == "text/plain; version=0.0.4; charset=utf-8"
+    assert "http_requests_in_flight" in res.get_data(as_text=True)
+
+    assert admin_client.get("/admin/metrics/prometheus").status_code == 200
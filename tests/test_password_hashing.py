@@ -0,0 +1,72 @@
+# tests/test_password_hashing.py
+# -*- coding: utf-8 -*-
+"""密碼雜湊 profile：設定來源的優先順序、登入時改用新參數重新雜湊、批次雜湊保持順序。"""
+from werkzeug.security import check_password_hash
+
+from models import db, User
+from utils.password_hashing import (
+    DEFAULT_HASH_METHOD,
+    current_hash_method,
+    hash_method_of,
+    hash_passwords,
+    needs_rehash,
+    normalize_method,
+)
+from utils.settings_service import set_settings
+
+CHEAP = "pbkdf2:sha256:1000"
+CHEAPER = "pbkdf2:sha256:1001"
+
+
+def test_normalize_method():
+    assert normalize_method(" pbkdf2:sha256:20000 ") == "pbkdf2:sha256:20000"
+    assert normalize_method("scrypt:16384:8:1") == "scrypt:16384:8:1"
+    assert normalize_method("pbkdf2:sha256") is None
+    assert normalize_method("scrypt:a:8:1") is None
+    assert normalize_method(None) is None
+
+
+def test_method_precedence(app, monkeypatch):
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_METHOD", None)
+    assert current_hash_method() == DEFAULT_HASH_METHOD
+
+    set_settings({"password_hash_method": CHEAP})
+    assert current_hash_method() == CHEAP
+
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_METHOD", CHEAPER)  # 環境變數優先
+    assert current_hash_method() == CHEAPER
+
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_METHOD", "bogus")  # 格式錯誤就往下找
+    assert current_hash_method() == CHEAP
+
+
+def test_login_rehashes_with_current_profile(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_METHOD", CHEAP)
+    user = User(username="p001", password_hash="")
+    user.set_password("1234")
+    db.session.add(user)
+    db.session.commit()
+    assert hash_method_of(user.password_hash) == CHEAP
+    assert not needs_rehash(user.password_hash)
+
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_METHOD", CHEAPER)
+    assert needs_rehash(user.password_hash)
+
+    client.post("/login", data={"username": "p001", "password": "wrong"})
+    db.session.refresh(user)
+    assert hash_method_of(user.password_hash) == CHEAP  # 密碼錯誤不重算
+
+    client.post("/login", data={"username": "p001", "password": "1234"})
+    db.session.refresh(user)
+    assert hash_method_of(user.password_hash) == CHEAPER
+    assert check_password_hash(user.password_hash, "1234")
+
+
+def test_hash_passwords_keeps_order_and_reports_progress():
+    passwords = [f"pw-{i}" for i in range(100)]
+    done = []
+    hashes = hash_passwords(passwords, progress=done.append, workers=4, method=CHEAP)
+
+    assert len(hashes) == 100 and sum(done) == 100
+    assert all(check_password_hash(h, pw) for h, pw in zip(hashes, passwords))
+    assert {hash_method_of(h) for h in hashes} == {CHEAP}
@@ -0,0 +1,87 @@
+# tests/test_password_verifier.py
+# -*- coding: utf-8 -*-
+"""登入密碼驗證 pool：名額滿時立刻拒絕、逾時視為忙碌、失敗時歸還名額，登入頁回 503。"""
+import threading
+
+import pytest
+
+from models import db, User
+from utils import password_verifier
+from utils.password_hashing import hash_password
+from utils.password_verifier import PasswordVerifier, PasswordVerifierBusy
+
+PWHASH = hash_password("1234", "pbkdf2:sha256:1000")
+
+
+@pytest.fixture
+def gate(monkeypatch):
+    """讓 pool 內的驗證卡住，直到 gate.set()。"""
+    gate = threading.Event()
+    started = threading.Event()
+    real = password_verifier.check_password_hash
+
+    def slow_check(pwhash, password):
+        started.set()
+        gate.wait(5)
+        return real(pwhash, password)
+
+    monkeypatch.setattr(password_verifier, "check_password_hash", slow_check)
+    gate.started = started
+    yield gate
+    gate.set()
+
+
+def test_verify():
+    verifier = PasswordVerifier(workers=2)
+    assert verifier.verify(PWHASH, "1234") is True
+    assert verifier.verify(PWHASH, "wrong") is False
+    stats = verifier.stats()
+    assert stats["verified_total"] == 2 and stats["queue_depth"] == 0 and stats["active"] == 0
+
+
+def test_rejects_immediately_when_full(gate):
+    verifier = PasswordVerifier(workers=1, max_queue=0)
+    result = {}
+    first = threading.Thread(target=lambda: result.setdefault("ok", verifier.verify(PWHASH, "1234")))
+    first.start()
+    assert gate.started.wait(5)
+
+    with pytest.raises(PasswordVerifierBusy) as exc:
+        verifier.verify(PWHASH, "1234")
+    assert exc.value.retry_after >= 1
+    assert verifier.stats()["rejected_total"] == 1
+
+    gate.set()
+    first.join(5)
+    assert result["ok"] is True
+    assert verifier.verify(PWHASH, "1234") is True  # 名額已歸還
+
+
+def test_timeout_counts_as_busy(gate):
+    verifier = PasswordVerifier(workers=1, max_queue=1, timeout=0.05)
+    with pytest.raises(PasswordVerifierBusy):
+        verifier.verify(PWHASH, "1234")
+    assert verifier.stats()["timeouts_total"] == 1
+
+
+def test_slot_released_when_submit_fails():
+    verifier = PasswordVerifier(workers=1, max_queue=0)
+    verifier._pool.shutdown()
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            verifier.verify(PWHASH, "1234")
+    assert verifier.pending == 0
+    assert verifier.stats()["rejected_total"] == 0  # 每次都拿得到名額
+
+
+def test_login_returns_503_when_busy(app, client, monkeypatch):
+    db.session.add(User(username="p001", password_hash=PWHASH))
+    db.session.commit()
+
+    def busy(*args, **kwargs):
+        raise PasswordVerifierBusy(3)
+
+    monkeypatch.setattr(app.extensions["password_verifier"], "verify_and_rehash", busy)
+    res = client.post("/login", data={"username": "p001", "password": "1234"})
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "3"
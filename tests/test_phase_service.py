@@ -0,0 +1,58 @@
+# tests/test_phase_service.py
+# -*- coding: utf-8 -*-
+"""階段快取：保留資料庫原值，寫入選票前不依賴快取確認階段仍開啟。"""
+import pytest
+from sqlalchemy import update
+
+from models import db, Candidate, User, Vote, VotePhase
+from utils.phase_service import get_current_phase, get_phase, invalidate_phases
+
+
+def test_phase_info_keeps_raw_values(app, phases):
+    db.session.get(VotePhase, 3).promote_count = 0
+    db.session.get(VotePhase, 3).max_votes = None
+    db.session.commit()
+    invalidate_phases(broadcast=False)
+
+    phase = get_phase(3)
+    assert phase.promote_count == 0
+    assert phase.max_votes is None
+
+
+@pytest.fixture
+def voter(app, phases):
+    db.session.get(VotePhase, 1).is_open = True
+    user = User(username="p001", password_hash="x")
+    db.session.add_all([user, Candidate(id=1, name="c1", class_name="101", phase_id=1)])
+    db.session.commit()
+    invalidate_phases(broadcast=False)
+    return user
+
+
+def _login(client, user):
+    with client.session_transaction() as s:
+        s["user_id"] = user.id
+        s["role"] = "voter"
+
+
+def test_ballot_is_recorded_while_phase_open(client, voter):
+    _login(client, voter)
+    res = client.post("/vote", data={"candidate_ids": ["1"]})
+    assert res.status_code == 200
+    assert Vote.query.filter_by(voter_id=voter.id, phase_id=1).count() == 1
+
+
+def test_ballot_rejected_when_phase_closed_on_another_host(client, voter):
+    _login(client, voter)
+    assert get_current_phase().id == 1  # 本行程快取：階段開啟中
+
+    # 另一台主機關閉階段：資料庫已更新，但本機的快取版本檔沒有變動
+    db.session.execute(update(VotePhase).where(VotePhase.id == 1).values(is_open=False))
+    db.session.commit()
+    assert get_current_phase().id == 1
+
+    res = client.post("/vote", data={"candidate_ids": ["1"]})
+    assert res.status_code == 302
+    assert res.headers["Location"].endswith("/login")
+    assert Vote.query.count() == 0
+    assert get_current_phase() is None  # 發現已關閉後清掉本行程快取
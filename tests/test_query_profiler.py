@@ -0,0 +1,64 @@
+# tests/test_query_profiler.py
+# -*- coding: utf-8 -*-
+"""晉級頁的查詢數不隨候選人數增加（鎖住 promote_page / save_promoted_candidates 的 N+1 修正）。"""
+import pytest
+
+from models import db, Candidate, User, Vote
+from utils.query_profiler import QueryProfiler
+
+PROMOTE_PAGE_BUDGET = 5
+SAVE_PROMOTED_BUDGET = 10
+
+
+def _seed(phase_id, n):
+    candidates = [Candidate(name=f"c{i}", class_name=f"{101 + i}", parent_name=f"p{i}", phase_id=phase_id)
+                  for i in range(n)]
+    voters = [User(username=f"v{i}", password_hash="x") for i in range(n)]
+    db.session.add_all(candidates + voters)
+    db.session.commit()
+    # 第 i 位候選人得 n - i 票，名次不同、沒有同票
+    db.session.add_all(Vote(voter_id=voters[j].id, candidate_id=c.id, phase_id=phase_id)
+                       for i, c in enumerate(candidates) for j in range(n - i))
+    db.session.commit()
+    return candidates
+
+
+def _profile(client, method, url, **kwargs):
+    db.session.expire_all()
+    with QueryProfiler(url) as prof:
+        resp = getattr(client, method)(url, **kwargs)
+    assert resp.status_code in (200, 302)
+    return prof
+
+
+@pytest.mark.parametrize("n", [5, 40])
+def test_promote_page_query_budget(admin_client, phases, n):
+    _seed(1, n)
+    prof = _profile(admin_client, "get", "/admin/promote?phase_id=1")
+    prof.assert_max_queries(PROMOTE_PAGE_BUDGET)
+    prof.assert_no_nplus1()
+
+
+@pytest.mark.parametrize("n", [5, 40])
+def test_save_promoted_query_budget(admin_client, phases, n):
+    _seed(1, n)
+    prof = _profile(admin_client, "post", "/admin/promote/save", data={"phase_id": "1"})
+    prof.assert_max_queries(SAVE_PROMOTED_BUDGET)
+    prof.assert_no_nplus1()
+
+    promoted = Candidate.query.filter_by(phase_id=1, is_promoted=True).count()
+    assert promoted == 2
+    assert Candidate.query.filter_by(phase_id=2).count() == 2
+
+
+def test_profiler_flags_repeated_statements(app):
+    with QueryProfiler(nplus1_threshold=3) as prof:
+        for i in range(4):
+            db.session.get(User, i + 1)
+            db.session.expire_all()
+    assert prof.count == 4
+    assert prof.repeated()
+    with pytest.raises(AssertionError):
+        prof.assert_no_nplus1()
+    with pytest.raises(AssertionError):
+        prof.assert_max_queries(3)
@@ -0,0 +1,96 @@
+# tests/test_schema.py
+# -*- coding: utf-8 -*-
+"""啟動時的遷移版本標記，以及 `flask db upgrade` / run_server.py / WSGI 匯入對舊資料庫的一次性清理。"""
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, inspect
+
+from models import db
+from utils.schema import current_revision, ensure_schema, head_revision
+
+ROOT = Path(__file__).resolve().parents[1]
+PRE_BACKLOG_REVISION = "9bd27a0c4874"
+
+
+def test_fresh_database_is_stamped_at_head(app):
+    assert head_revision() is not None
+    assert current_revision() == head_revision()
+
+
+def test_missing_migrations_directory_is_skipped(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(app.extensions["migrate"], "directory", str(tmp_path / "missing"))
+    ensure_schema()
+
+
+def test_unknown_revision_stops_startup(app):
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE alembic_version SET version_num = 'deadbeef0000'")
+
+    with pytest.raises(RuntimeError, match="deadbeef0000"):
+        ensure_schema()
+
+
+def _legacy_database(path):
+    """最新結構扣掉後來新增的欄位 / 索引 / 資料表，並放入重複的教職員票。"""
+    engine = create_engine(f"sqlite:///{path}")
+    db.metadata.create_all(engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(path)
+    for index in ("ix_votes_phase_id_cast_at", "ix_votes_phase_id_id",
+                  "ix_operation_logs_timestamp_id", "uix_staff_votes_staff_reset"):
+        conn.execute(f"DROP INDEX {index}")
+    conn.execute("ALTER TABLE votes DROP COLUMN cast_at")
+    conn.execute("ALTER TABLE users DROP COLUMN class_name")
+    conn.execute("DROP TABLE login_token_uses")
+    conn.execute("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL PRIMARY KEY)")
+    conn.execute("INSERT INTO alembic_version VALUES (?)", (PRE_BACKLOG_REVISION,))
+    conn.execute("INSERT INTO staffs (id, username, password_hash, name) VALUES (1, 't1', 'x', 'A'), (2, 't2', 'x', 'B')")
+    conn.executemany("INSERT INTO staff_votes (id, staff_id, vote_result, reset_id) VALUES (?, ?, ?, ?)", [
+        (1, 1, "贊成", 1), (2, 1, "反對", 1), (3, 1, "反對", 2), (4, 2, "反對", 1), (5, 2, "贊成", 1),
+    ])
+    conn.commit()
+    conn.close()
+
+
+UPGRADE_COMMANDS = {
+    "flask": ["-m", "flask", "--app", "app", "db", "upgrade"],
+    # 打包版沒有 flask 指令：run_server.py 啟動時套用
+    "run_server": ["-c", "import run_server; run_server.bootstrap_first_run()"],
+    # `flask run` / WSGI 伺服器：只匯入 app
+    "wsgi": ["-c", "import app"],
+}
+
+
+@pytest.mark.parametrize("command", sorted(UPGRADE_COMMANDS))
+def test_upgrade_dedupes_staff_votes_and_adds_schema(app, tmp_path, command):
+    path = tmp_path / "legacy.db"
+    _legacy_database(path)
+
+    # 從其他目錄執行：遷移腳本要依 app 所在位置找，不依賴目前目錄
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", OPLOG_ASYNC="0", PYTHONPATH=str(ROOT))
+    result = subprocess.run(
+        [sys.executable, *UPGRADE_COMMANDS[command]],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT version_num FROM alembic_version").fetchone()[0] == head_revision()
+    # 每人每輪保留最早的一筆
+    assert conn.execute("SELECT id FROM staff_votes ORDER BY id").fetchall() == [(1,), (3,), (4,)]
+    conn.close()
+
+    engine = create_engine(f"sqlite:///{path}")
+    inspector = inspect(engine)
+    assert "cast_at" in {c["name"] for c in inspector.get_columns("votes")}
+    assert "class_name" in {c["name"] for c in inspector.get_columns("users")}
+    assert {"ix_votes_phase_id_id", "ix_votes_phase_id_cast_at"} <= {i["name"] for i in inspector.get_indexes("votes")}
+    assert any(i["name"] == "uix_staff_votes_staff_reset" and i["unique"] for i in inspector.get_indexes("staff_votes"))
+    assert inspector.has_table("login_token_uses")
+    engine.dispose()
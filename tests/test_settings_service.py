@@ -0,0 +1,55 @@
+# tests/test_settings_service.py
+# -*- coding: utf-8 -*-
+"""設定快取：一次載入全部設定，寫入後透過版本檔讓其他 worker 重新載入。"""
+import time
+
+from models import db, Setting
+from utils.settings_service import get_int_setting, get_setting, invalidate_settings, set_settings
+from utils.versioned_cache import VersionedCache
+
+
+def test_versioned_cache_reloads_when_another_worker_invalidates(app):
+    calls = []
+    mine = VersionedCache("test_cache", lambda: calls.append(1) or len(calls))
+    other = VersionedCache("test_cache", lambda: None)  # 另一個 worker 的同名快取
+
+    assert mine.get() == 1
+    assert mine.get() == 1
+    assert len(calls) == 1
+
+    time.sleep(0.02)  # 版本以 mtime 表示，避開檔案系統時間精度
+    other.invalidate()
+    assert mine.get() == 2
+
+    other.invalidate(broadcast=False)  # 只清自己的快取，不通知別人
+    assert mine.get() == 2
+
+
+def test_versioned_cache_max_age(app):
+    calls = []
+    cache = VersionedCache("test_cache_age", lambda: calls.append(1) or len(calls), max_age=0)
+    assert cache.get() == 1
+    assert cache.get() == 2
+
+
+def test_settings_are_cached_until_invalidated(app):
+    set_settings({"vote_title": "家長會選舉", "current_reset_id": 3, "empty": None})
+    assert get_setting("vote_title") == "家長會選舉"
+    assert get_setting("empty") == ""
+    assert get_int_setting("current_reset_id", 1) == 3
+    assert get_setting("missing", "預設") == "預設"
+
+    # 直接改資料庫（沒有經過 set_settings）：快取仍是舊值，use_cache=False 讀到新值
+    Setting.query.filter_by(key="vote_title").update({"value": "新標題"})
+    db.session.commit()
+    assert get_setting("vote_title") == "家長會選舉"
+    assert get_setting("vote_title", use_cache=False) == "新標題"
+
+    invalidate_settings(broadcast=False)
+    assert get_setting("vote_title") == "新標題"
+
+
+def test_int_setting_falls_back_on_bad_value(app):
+    set_settings({"current_reset_id": "abc"})
+    assert get_int_setting("current_reset_id", 1) == 1
+    assert get_int_setting("not_set", 7) == 7
@@ -0,0 +1,76 @@
+# tests/test_staff_votes.py
+# -*- coding: utf-8 -*-
+"""教職員投票：每人每輪只能一票（uix_staff_votes_staff_reset），快取票數跟著更新；投影頁以 ETag 輪詢。"""
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Staff, StaffVote
+from utils.settings_service import set_settings
+from utils.staff_tally import get_staff_tally
+
+
+@pytest.fixture
+def staff(app):
+    s = Staff(username="t001", password_hash="x", name="王老師")
+    db.session.add(s)
+    db.session.commit()
+    return s
+
+
+def test_one_vote_per_staff_per_round(app, staff):
+    db.session.add(StaffVote(staff_id=staff.id, vote_result="贊成", reset_id=1))
+    db.session.commit()
+
+    db.session.add(StaffVote(staff_id=staff.id, vote_result="反對", reset_id=1))
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
+
+    # 下一輪可以再投
+    db.session.add(StaffVote(staff_id=staff.id, vote_result="反對", reset_id=2))
+    db.session.commit()
+    assert StaffVote.query.count() == 2
+
+
+def test_second_submission_is_not_counted(client, staff):
+    with client.session_transaction() as s:
+        s["staff_id"] = staff.id
+
+    client.post("/staff/vote", data={"choice": "贊成"})
+    client.post("/staff/vote", data={"choice": "反對"})
+
+    assert StaffVote.query.filter_by(staff_id=staff.id).count() == 1
+    tally = get_staff_tally()
+    assert (tally.reset_id, tally.agree, tally.disagree) == (1, 1, 0)
+
+    set_settings({"current_reset_id": 2})
+    client.post("/staff/vote", data={"choice": "反對"})
+    tally = get_staff_tally()
+    assert (tally.reset_id, tally.agree, tally.disagree) == (2, 0, 1)
+
+
+def test_tally_api_answers_304_until_a_vote_changes_it(client, admin_client, staff):
+    res = admin_client.get("/admin/api/staff_votes/tally")
+    assert res.status_code == 200
+    assert res.get_json() == {"reset_id": 1, "agree": 0, "disagree": 0, "total": 0}
+    etag = res.headers["ETag"]
+    assert res.headers["Cache-Control"] == "no-cache"
+
+    res = admin_client.get("/admin/api/staff_votes/tally", headers={"If-None-Match": etag})
+    assert res.status_code == 304 and res.data == b""
+    assert res.headers["ETag"] == etag
+
+    with client.session_transaction() as s:
+        s["staff_id"] = staff.id
+    client.post("/staff/vote", data={"choice": "反對"})
+
+    res = admin_client.get("/admin/api/staff_votes/tally", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+    assert res.get_json()["disagree"] == 1
+
+
+def test_live_page_and_api_require_admin(client, admin_client, staff):
+    assert client.get("/admin/api/staff_votes/tally").status_code == 403
+    assert client.get("/admin/staff_votes/live").status_code == 302
+    assert admin_client.get("/admin/staff_votes/live").status_code == 200
@@ -0,0 +1,24 @@
+# tests/test_startup.py
+# -*- coding: utf-8 -*-
+"""匯入 app 時不載入試算表相關的重型套件（第一次匯入 / 匯出時才載入）。"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from bench_startup import HEAVY_MODULES
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_app_import_does_not_load_heavy_modules(tmp_path):
+    code = (
+        "import json, sys; import app; "
+        f"print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))"
+    )
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'startup.db'}", OPLOG_ASYNC="0")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
@@ -0,0 +1,77 @@
+# tests/test_table_reader.py
+# -*- coding: utf-8 -*-
+"""CSV 編碼判斷與串流讀取；.xlsx 以 read-only 模式逐列讀取。"""
+import codecs
+import io
+
+from werkzeug.datastructures import FileStorage
+
+from utils.table_reader import DECODE_CHUNK_BYTES, detect_encoding, open_csv, open_table
+
+
+def _rows(data: bytes):
+    header, rows = open_csv(io.BytesIO(data))
+    return header, list(rows)
+
+
+def test_utf8_with_bom():
+    header, rows = _rows(codecs.BOM_UTF8 + "帳號,密碼\nwh-001,1234\n".encode("utf-8"))
+    assert header == ["帳號", "密碼"]
+    assert rows == [{"帳號": "wh-001", "密碼": "1234"}]
+
+
+def test_big5_names_after_long_ascii_prefix():
+    # 前面超過一整塊都是純 ASCII，Big5 姓名到檔案後段才出現
+    ascii_rows = "".join(f"wh-{i:05d},1234,101\n" for i in range(DECODE_CHUNK_BYTES // 16 + 100))
+    text = "account,password,class\n" + ascii_rows + "wh-99999,1234,王小明\n"
+    data = text.encode("cp950")
+    assert detect_encoding(io.BytesIO(data)) == "cp950"
+
+    header, rows = _rows(data)
+    assert header == ["account", "password", "class"]
+    assert rows[-1] == {"account": "wh-99999", "password": "1234", "class": "王小明"}
+
+
+def test_utf8_multibyte_across_chunk_boundary():
+    # 多位元組字元剛好跨過讀取區塊邊界時仍判斷為 UTF-8
+    prefix = "a,b\n" + "xxxxxxxxx,1\n" * ((DECODE_CHUNK_BYTES - 4) // 12 - 1)
+    prefix += "y" * (DECODE_CHUNK_BYTES - 1 - len(prefix) - 3) + ",1\n"
+    data = (prefix + "王小明,2\n").encode("utf-8")
+    assert len(prefix) == DECODE_CHUNK_BYTES - 1
+    stream = io.BytesIO(data)
+    assert detect_encoding(stream) == "utf-8"
+    assert stream.tell() == 0
+    assert _rows(data)[1][-1] == {"a": "王小明", "b": "2"}
+
+
+def _xlsx(rows) -> bytes:
+    from openpyxl import Workbook
+    wb = Workbook()
+    for row in rows:
+        wb.active.append(row)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def test_xlsx_rows_as_text():
+    data = _xlsx([
+        [None, None, None],              # 表頭前的空白列
+        [" 帳號 ", "密碼", "班級"],
+        ["wh-001", 1234.0, 101],         # Excel 常把數字存成浮點數
+        [None, None, None],              # 中間的空白列
+        ["wh-002", "abcd", None],
+    ])
+    header, rows = open_table(FileStorage(stream=io.BytesIO(data), filename="users.XLSX"))
+
+    assert header == ["帳號", "密碼", "班級"]
+    assert list(rows) == [
+        {"帳號": "wh-001", "密碼": "1234", "班級": "101"},
+        {"帳號": "wh-002", "密碼": "abcd", "班級": ""},
+    ]
+
+
+def test_open_table_dispatches_csv_by_extension():
+    header, rows = open_table(FileStorage(stream=io.BytesIO("帳號\nwh-001\n".encode("utf-8")), filename="u.csv"))
+    assert header == ["帳號"]
+    assert list(rows) == [{"帳號": "wh-001"}]
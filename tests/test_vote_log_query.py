@@ -0,0 +1,71 @@
+# tests/test_vote_log_query.py
+# -*- coding: utf-8 -*-
+"""投票明細：依 (phase_id, id) keyset 分頁不漏不重、前綴篩選與筆數、CSV 匯出。"""
+import csv
+import io
+
+import pytest
+
+from models import db, Candidate, User, Vote
+
+
+@pytest.fixture
+def votes(app, phases):
+    users = [User(username=u, password_hash="x") for u in ("wh-010", "wh-011", "wh-020", "wh%1")]
+    cands = [Candidate(name=n, class_name=c, parent_name=n, phase_id=p)
+             for n, c, p in (("甲", "601", 1), ("乙", "502", 1), ("丙", "603", 2))]
+    db.session.add_all(users + cands)
+    db.session.flush()
+    # 故意交錯階段寫入，驗證排序依 (phase_id, id)
+    pairs = [(0, 2), (0, 0), (1, 1), (2, 2), (1, 0), (2, 0), (3, 1)]
+    rows = [Vote(voter_id=users[u].id, candidate_id=cands[c].id, phase_id=cands[c].phase_id) for u, c in pairs]
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+
+def _page(client, **params):
+    res = client.get("/admin/votes_log/data", query_string={"length": 2, **params})
+    assert res.status_code == 200
+    return res.get_json()
+
+
+def test_keyset_pages_cover_every_vote_once(admin_client, votes):
+    seen, params = [], {}
+    while True:
+        page = _page(admin_client, **params)
+        assert page["recordsTotal"] == 7
+        seen.extend(page["data"])
+        if not page["cursor"]:
+            break
+        params = {"after_phase": page["cursor"]["phase"], "after_id": page["cursor"]["id"]}
+
+    assert len(seen) == 7
+    assert [row[0] for row in seen] == ["家長委員"] * 5 + ["常務委員"] * 2
+    assert seen[0] == ["家長委員", "wh-010", "601 甲"]
+
+
+def test_prefix_filters_and_counts(admin_client, votes):
+    page = _page(admin_client, voter="wh-01", length=100)
+    assert page["recordsFiltered"] == 4
+    assert {row[1] for row in page["data"]} == {"wh-010", "wh-011"}
+
+    page = _page(admin_client, class_name="6", phase_id="1", length=100)
+    assert page["recordsFiltered"] == 3
+    assert {row[2] for row in page["data"]} == {"601 甲"}
+
+    # % 視為一般字元，不是萬用字元
+    assert _page(admin_client, voter="wh%")["recordsFiltered"] == 1
+
+
+def test_export_csv(admin_client, votes):
+    res = admin_client.get("/admin/votes_log/export", query_string={"phase_id": "2"})
+    assert res.status_code == 200
+    assert "votes_log_phase2.csv" in res.headers["Content-Disposition"]
+    rows = list(csv.reader(io.StringIO(res.data.decode("utf-8-sig"))))
+    assert rows == [["投票階段", "投票帳號", "候選人班級", "候選人姓名"],
+                    ["常務委員", "wh-010", "603", "丙"], ["常務委員", "wh-020", "603", "丙"]]
+
+
+def test_data_requires_admin(client, votes):
+    assert client.get("/admin/votes_log/data").status_code == 403
@@ -0,0 +1,114 @@
+# tests/test_vote_timeline.py
+# -*- coding: utf-8 -*-
+"""每分鐘投票趨勢：依分鐘分組、補齊沒有票的分鐘、舊資料當起始值、依家長年級的累計投票率與預估。"""
+from datetime import datetime
+
+import pytest
+
+from models import db, Candidate, User, Vote, VotePhase
+from utils import vote_timeline
+from utils.phase_service import invalidate_phases
+from utils.vote_timeline import get_vote_timeline
+
+
+@pytest.fixture
+def ballots(app, phases):
+    # 家長是三、五年級，候選人是一、六年級：年級投票率要看家長自己的班級
+    users = [User(username=f"p{i}", password_hash="x", class_name=cls)
+             for i, cls in enumerate(["301", "302", "501", "502"])]
+    first_grade = Candidate(name="A", class_name="101", parent_name="A", phase_id=1)
+    sixth_grade = Candidate(name="B", class_name="602", parent_name="B", phase_id=1)
+    db.session.add_all(users + [first_grade, sixth_grade])
+    db.session.flush()
+
+    legacy = Vote(voter_id=users[0].id, candidate_id=first_grade.id, phase_id=1)
+    at_10_00 = datetime(2025, 3, 1, 10, 0, 15)
+    db.session.add_all([
+        legacy,
+        Vote(voter_id=users[1].id, candidate_id=first_grade.id, phase_id=1, cast_at=at_10_00),
+        Vote(voter_id=users[1].id, candidate_id=sixth_grade.id, phase_id=1, cast_at=at_10_00),
+        Vote(voter_id=users[2].id, candidate_id=sixth_grade.id, phase_id=1, cast_at=datetime(2025, 3, 1, 10, 2, 59)),
+    ])
+    db.session.commit()
+    # 加上 cast_at 之前的舊資料（ORM 會替 None 套用預設值，因此另外清空）
+    Vote.query.filter_by(id=legacy.id).update({"cast_at": None})
+    db.session.commit()
+
+
+def test_per_minute_series(ballots):
+    data = get_vote_timeline(1)
+
+    assert data["minutes"] == ["10:00", "10:01", "10:02"]
+    assert data["ballots"] == [2, 0, 1]
+    assert data["voters"] == [1, 0, 1]
+    assert data["cumulative_voters"] == [2, 2, 3]  # 含沒有時間的 1 位
+    assert data["turnout"] == [50.0, 50.0, 75.0]
+    # p1 投了兩票只算一人；p3 沒投
+    assert data["grades"] == {"三年級": [2, 2, 2], "五年級": [0, 0, 1]}
+    assert data["grade_turnout"] == {"三年級": [100.0, 100.0, 100.0], "五年級": [0.0, 0.0, 50.0]}
+    assert data["grade_registered"] == {"三年級": 2, "五年級": 2}
+    assert data["untimed_ballots"] == 1
+    assert (data["total_voters"], data["registered_users"]) == (3, 4)
+    assert data["voters_per_minute"] == 0.67
+    assert data["eta_minutes"] == 2
+
+
+def test_grade_counts_first_vote_of_each_voter(app, phases):
+    cand = Candidate(name="A", class_name="601", parent_name="A", phase_id=1)
+    other = Candidate(name="B", class_name="101", parent_name="B", phase_id=1)
+    db.session.add_all([cand, other])
+    db.session.flush()
+    bound = User(username="p0", password_hash="x", candidate_id=cand.id)  # 沒填班級：用綁定候選人的班級
+    twice = User(username="p1", password_hash="x", class_name="201")
+    idle = User(username="p2", password_hash="x")
+    db.session.add_all([bound, twice, idle])
+    db.session.flush()
+    db.session.add_all([
+        Vote(voter_id=twice.id, candidate_id=cand.id, phase_id=1, cast_at=datetime(2025, 3, 1, 10, 0)),
+        Vote(voter_id=twice.id, candidate_id=other.id, phase_id=1, cast_at=datetime(2025, 3, 1, 10, 1)),
+        Vote(voter_id=bound.id, candidate_id=cand.id, phase_id=1, cast_at=datetime(2025, 3, 1, 10, 1)),
+    ])
+    db.session.commit()
+
+    data = get_vote_timeline(1)
+    assert data["voters"] == [1, 1]
+    assert data["cumulative_voters"] == [1, 2]
+    assert data["grades"] == {"二年級": [1, 1], "六年級": [0, 1], "未分班": [0, 0]}
+    assert data["grade_turnout"] == {"二年級": [100.0, 100.0], "六年級": [0.0, 100.0], "未分班": [0.0, 0.0]}
+
+
+def test_empty_phase(app, phases):
+    data = get_vote_timeline(2)
+    assert data["minutes"] == [] and data["total_voters"] == 0
+    assert data["eta_minutes"] is None
+
+
+def test_timeline_is_cached(ballots, monkeypatch):
+    first = get_vote_timeline(1)
+    Vote.query.delete()
+    db.session.commit()
+    assert get_vote_timeline(1) is first
+
+    monkeypatch.setattr(vote_timeline, "VOTE_TIMELINE_TTL", 0)
+    assert get_vote_timeline(1)["total_voters"] == 0
+
+
+def test_vote_records_cast_at(client, app, phases):
+    db.session.get(VotePhase, 1).is_open = True
+    user = User(username="p9", password_hash="x")
+    db.session.add_all([user, Candidate(id=1, name="A", class_name="101", phase_id=1),
+                        Candidate(id=2, name="B", class_name="102", phase_id=1)])
+    db.session.commit()
+    invalidate_phases(broadcast=False)
+    with client.session_transaction() as s:
+        s["user_id"] = user.id
+
+    client.post("/vote", data={"candidate_ids": ["1", "2"]})
+    cast_at = {v.cast_at for v in Vote.query.all()}
+    assert len(cast_at) == 1 and None not in cast_at  # 同一張選票同一個時間
+
+
+def test_api(admin_client, ballots):
+    res = admin_client.get("/admin/api/vote_timeline?phase_id=1")
+    assert res.status_code == 200
+    assert res.get_json()["ballots"] == [2, 0, 1]
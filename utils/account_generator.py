@@ -0,0 +1,115 @@
+# utils/account_generator.py
+# -*- coding: utf-8 -*-
+"""
+批次產生家長帳號（wh-001、wh-002…）：編號範圍 + 隨機密碼 → 平行雜湊 → bulk insert。
+
+- 可依「班級 人數」清單連續編號，帳密單依年級分組列印
+- 雜湊與寫入沿用 account_import.import_account_rows（平行雜湊、一次 commit、進度回報）
+- 明文密碼只存在於這次產生的帳密單，資料庫只有雜湊
+"""
+from __future__ import annotations
+
+import re
+import secrets
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from models import db, User
+from utils.account_import import import_account_rows, user_row
+from utils.helpers import GRADE_ORDER, get_grade_from_class
+from utils.import_pipeline import ImportProgress, ImportReport
+
+# 去掉容易看錯的 0/O、1/I/L
+PASSWORD_ALPHABET = "ABCDEFGHJKMNPQRSTUVWXYZ23456789"
+DEFAULT_PASSWORD_LENGTH = 6
+MAX_ACCOUNTS = 5000
+
+_PLAN_LINE_RE = re.compile(r"^\s*(\S+)\s*[,:：\s]\s*(\d+)\s*$")
+
+
+class AccountGenerationError(ValueError):
+    """產生參數不正確（訊息直接顯示給管理員）。"""
+
+
+class GeneratedAccount(NamedTuple):
+    username: str
+    password: str
+    class_name: str
+    grade: str
+
+
+# --------------------------------------------------
+# 📝 規劃帳號
+# --------------------------------------------------
+def parse_class_plan(text: str) -> List[Tuple[str, int]]:
+    """每行「班級 人數」（可用空白、逗號或冒號分隔），例如「101 3」。"""
+    plan = []
+    for lineno, line in enumerate((text or "").splitlines(), start=1):
+        if not line.strip():
+            continue
+        m = _PLAN_LINE_RE.match(line)
+        if not m:
+            raise AccountGenerationError(f"第 {lineno} 行格式錯誤：「{line.strip()}」（應為「班級 人數」）")
+        plan.append((m.group(1), int(m.group(2))))
+    return plan
+
+
+def generate_password(length: int = DEFAULT_PASSWORD_LENGTH) -> str:
+    return "".join(secrets.choice(PASSWORD_ALPHABET) for _ in range(length))
+
+
+def plan_accounts(prefix: str, start: int, width: int, count: int | None = None,
+                  class_plan: Sequence[Tuple[str, int]] | None = None,
+                  password_length: int = DEFAULT_PASSWORD_LENGTH) -> List[GeneratedAccount]:
+    """
+    有 class_plan 時依序為各班編號（總數 = 各班人數合計），否則產生 count 個未分班帳號。
+    """
+    slots = [cls for cls, n in class_plan for _ in range(n)] if class_plan else [""] * (count or 0)
+    if not slots:
+        raise AccountGenerationError("沒有要產生的帳號")
+    if len(slots) > MAX_ACCOUNTS:
+        raise AccountGenerationError(f"一次最多產生 {MAX_ACCOUNTS} 個帳號")
+    if start < 0 or not 1 <= width <= 10 or not 4 <= password_length <= 32:
+        raise AccountGenerationError("起始編號、位數或密碼長度不正確")
+
+    return [
+        GeneratedAccount(f"{prefix}{start + i:0{width}d}", generate_password(password_length),
+                         cls, get_grade_from_class(cls) if cls else "未分班")
+        for i, cls in enumerate(slots)
+    ]
+
+
+# --------------------------------------------------
+# 💾 寫入
+# --------------------------------------------------
+def create_accounts(accounts: Sequence[GeneratedAccount], reset_existing: bool = False,
+                    job_id: str | None = None) -> Tuple[ImportReport, List[GeneratedAccount]]:
+    """
+    寫入帳號，回傳 (統計, 實際寫入的帳號)。
+    已存在的帳號預設略過；reset_existing=True 時改為重設密碼。
+    """
+    report = ImportReport()
+    progress = ImportProgress(job_id)
+    try:
+        with report.stage("existing"):
+            existing = {u for (u,) in db.session.query(User.username)
+                        .filter(User.username.in_([a.username for a in accounts]))}
+        written = [a for a in accounts if reset_existing or a.username not in existing]
+        report.count("skipped", len(accounts) - len(written))
+
+        rows = ({"帳號": a.username, "密碼": a.password, "班級": a.class_name} for a in written)
+        import_account_rows(User, rows, user_row, report, progress)
+    except Exception as e:
+        progress.finish(error=str(e))
+        raise
+    progress.finish()
+    return report, written
+
+
+def group_by_grade(accounts: Sequence[GeneratedAccount]) -> "OrderedDict[str, List[GeneratedAccount]]":
+    grouped: Dict[str, List[GeneratedAccount]] = {}
+    for a in accounts:
+        grouped.setdefault(a.grade, []).append(a)
+    ordered = OrderedDict((g, grouped.pop(g)) for g in GRADE_ORDER if g in grouped)
+    ordered.update(grouped)
+    return ordered
@@ -0,0 +1,142 @@
+# utils/account_import.py
+# -*- coding: utf-8 -*-
+"""
+帳號名單匯入（家長帳號 User、教職員 Staff）：parse → normalize → diff → hash → write。
+
+- diff 一次載入既有 username → id，不再逐列查詢
+- 密碼雜湊是最耗時的一段，交給 hash_passwords() 平行計算並回報進度
+- 寫入以 bulk_insert_mappings / bulk_update_mappings 完成，只 commit 一次
+"""
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, Optional
+
+from models import db, User, Staff
+from utils.import_pipeline import ImportProgress, ImportReport
+from utils.password_hashing import hash_passwords
+from utils.table_reader import open_table
+
+
+class AccountImportError(ValueError):
+    """檔案內容不符合格式（訊息直接顯示給管理員）。"""
+
+
+def _text(value) -> str:
+    return str(value or '').strip()
+
+
+# --------------------------------------------------
+# 各帳號類型的欄位對應（回傳 None 代表略過此列）
+# --------------------------------------------------
+def user_row(row) -> Optional[Dict[str, str]]:
+    username = _text(row.get('帳號'))
+    if not username:
+        return None
+    values = {"username": username, "password": _text(row.get('密碼')) or "1234"}
+    class_name = _text(row.get('班級'))
+    if class_name:  # 沒有班級欄時不覆蓋既有資料（bulk update 只更新有給的欄位）
+        values["class_name"] = class_name
+    return values
+
+
+def staff_row(row) -> Optional[Dict[str, str]]:
+    username = _text(row.get('帳號'))
+    password = _text(row.get('密碼'))
+    if not username or not password:
+        return None
+    return {
+        "username": username,
+        "password": password,
+        "name": _text(row.get('姓名')),
+        "class_name": _text(row.get('班級')) or None,
+    }
+
+
+# --------------------------------------------------
+# 匯入流程
+# --------------------------------------------------
+def import_account_rows(model, rows: Iterable[dict], normalize: Callable[[dict], Optional[dict]],
+                        report: ImportReport, progress: ImportProgress) -> ImportReport:
+    progress.stage("normalize")
+    with report.stage("normalize"):
+        accounts: Dict[str, dict] = {}
+        for row in rows:
+            report.count("rows")
+            values = normalize(row)
+            if values is None:
+                report.count("skipped")
+                continue
+            if values["username"] in accounts:
+                report.count("duplicates")
+            accounts[values["username"]] = values  # 同帳號以最後一列為準
+
+    progress.stage("diff")
+    with report.stage("diff"):
+        existing = dict(db.session.query(model.username, model.id).all())
+
+    items = list(accounts.values())
+    progress.stage("hash", total=len(items))
+    with report.stage("hash"):
+        hashes = hash_passwords([a["password"] for a in items], progress=progress.advance)
+
+    inserts, updates = [], []
+    for values, password_hash in zip(items, hashes):
+        mapping = {k: v for k, v in values.items() if k != "password"}
+        mapping["password_hash"] = password_hash
+        user_id = existing.get(values["username"])
+        if user_id is None:
+            inserts.append(mapping)
+        else:
+            mapping["id"] = user_id
+            updates.append(mapping)
+    report.count("created", len(inserts))
+    report.count("updated", len(updates))
+
+    progress.stage("write", total=len(inserts) + len(updates))
+    with report.stage("write"):
+        try:
+            if inserts:
+                db.session.bulk_insert_mappings(model, inserts)
+            if updates:
+                db.session.bulk_update_mappings(model, updates)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        progress.advance(len(inserts) + len(updates))
+
+    return report
+
+
+def _import_file(file, model, required_cols, normalize, job_id: str | None) -> ImportReport:
+    report = ImportReport()
+    progress = ImportProgress(job_id)
+    try:
+        with report.stage("parse"):
+            try:
+                header, rows = open_table(file)
+            except Exception as e:
+                raise AccountImportError(f'讀取檔案失敗：{e}') from e
+        if not required_cols.issubset(header):
+            raise AccountImportError(f'匯入失敗：缺少必要欄位 {required_cols}')
+
+        import_account_rows(model, rows, normalize, report, progress)
+    except Exception as e:
+        progress.finish(error=str(e))
+        raise
+    progress.finish()
+    return report
+
+
+def import_user_file(file, job_id: str | None = None) -> ImportReport:
+    return _import_file(file, User, {'帳號', '密碼'}, user_row, job_id)
+
+
+def import_staff_file(file, job_id: str | None = None) -> ImportReport:
+    return _import_file(file, Staff, {'帳號', '密碼'}, staff_row, job_id)
+
+
+def summary_text(report: ImportReport) -> str:
+    counts = report.counts
+    return (f'✅ 匯入完成：新增 {counts.get("created", 0)} 筆、更新 {counts.get("updated", 0)} 筆、'
+            f'略過 {counts.get("skipped", 0)} 筆')
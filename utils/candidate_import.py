@@ -0,0 +1,112 @@
+# utils/candidate_import.py
+# -*- coding: utf-8 -*-
+"""
+候選人名單匯入：parse → normalize → diff → write。
+
+- parse 只讀表頭，資料列在 normalize 階段邊讀邊整理（不先轉成 list）
+
+- diff 階段一次載入該階段所有 (班級, 家長姓名) → 候選人，不再逐列查詢
+- write 階段以 bulk_insert_mappings / bulk_update_mappings 寫入，只 commit 一次
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+from models import db, Candidate
+from utils.import_pipeline import ImportReport
+from utils.table_reader import open_table
+
+REQUIRED_COLUMNS = {'班級', '家長姓名'}
+
+Key = Tuple[str, str]
+
+
+class CandidateImportError(ValueError):
+    """檔案內容不符合格式（訊息直接顯示給管理員）。"""
+
+
+# --------------------------------------------------
+# 1️⃣ normalize：去空白、略過缺欄、檔案內重複只留一筆
+# --------------------------------------------------
+def normalize_rows(rows, report: ImportReport) -> Dict[Key, Dict[str, str]]:
+    normalized: Dict[Key, Dict[str, str]] = {}
+    for row in rows:
+        report.count("rows")
+        class_name = str(row.get('班級') or '').strip()
+        parent_name = str(row.get('家長姓名') or '').strip()
+        if not class_name or not parent_name:
+            report.count("skipped")
+            continue
+        key = (class_name, parent_name)
+        if key in normalized:
+            report.count("duplicates")
+            continue
+        normalized[key] = {"class_name": class_name, "parent_name": parent_name, "name": parent_name}
+    return normalized
+
+
+# --------------------------------------------------
+# 2️⃣ diff：與既有候選人比對（一次查詢）
+# --------------------------------------------------
+def diff_candidates(normalized: Dict[Key, Dict[str, str]], phase_id: int,
+                    report: ImportReport) -> Tuple[List[dict], List[dict]]:
+    existing: Dict[Key, Tuple[int, str]] = {}
+    rows = db.session.query(Candidate.id, Candidate.class_name, Candidate.parent_name, Candidate.name) \
+        .filter(Candidate.phase_id == phase_id).all()
+    for cid, class_name, parent_name, name in rows:
+        existing.setdefault((class_name or '', parent_name or ''), (cid, name))
+
+    inserts, updates = [], []
+    for key, values in normalized.items():
+        hit = existing.get(key)
+        if hit is None:
+            inserts.append(dict(values, phase_id=phase_id))
+        elif hit[1] != values["name"]:
+            updates.append({"id": hit[0], "name": values["name"]})
+        else:
+            report.count("unchanged")
+    return inserts, updates
+
+
+# --------------------------------------------------
+# 3️⃣ write
+# --------------------------------------------------
+def write_candidates(inserts: List[dict], updates: List[dict]) -> None:
+    if inserts:
+        db.session.bulk_insert_mappings(Candidate, inserts)
+    if updates:
+        db.session.bulk_update_mappings(Candidate, updates)
+    db.session.commit()
+
+
+def import_candidate_file(file, phase_id: int) -> ImportReport:
+    """執行完整匯入；格式錯誤時丟出 CandidateImportError，寫入失敗時已 rollback 並重新丟出。"""
+    report = ImportReport()
+
+    with report.stage("parse"):
+        try:
+            header, rows = open_table(file)
+        except Exception as e:
+            raise CandidateImportError(f'讀取檔案失敗：{e}') from e
+    if not REQUIRED_COLUMNS.issubset(header):
+        raise CandidateImportError(f'匯入失敗：缺少必要欄位 {REQUIRED_COLUMNS}')
+
+    with report.stage("normalize"):
+        try:
+            normalized = normalize_rows(rows, report)
+        except (UnicodeError, ValueError) as e:
+            raise CandidateImportError(f'讀取檔案失敗：{e}') from e
+
+    with report.stage("diff"):
+        inserts, updates = diff_candidates(normalized, phase_id, report)
+    report.count("created", len(inserts))
+    report.count("updated", len(updates))
+
+    with report.stage("write"):
+        try:
+            write_candidates(inserts, updates)
+        except Exception:
+            db.session.rollback()
+            raise
+
+    return report
@@ -0,0 +1,114 @@
+# utils/dashboard_stats.py
+# -*- coding: utf-8 -*-
+"""
+管理員主控台統計快照。
+
+- 指定階段的候選人數、已投票數、投票人數、投票率、簽到人數與教職員票數，
+  以一個含多個純量子查詢的 SELECT 一次取回（一次 DB 來回）
+- 依階段快取 DASHBOARD_STATS_TTL 秒，主控台自動更新時多個分頁共用同一份結果
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Integer, func, literal, select
+
+from models import db, Candidate, Staff, StaffVote, User, Vote
+from utils.phase_service import get_current_phase, get_first_phase_id, get_phase
+from utils.staff_tally import current_reset_id
+
+DASHBOARD_STATS_TTL = 5  # 秒
+
+_lock = threading.Lock()
+_cache: Dict[Optional[int], Tuple[float, "DashboardStats"]] = {}
+
+
+class DashboardStats(NamedTuple):
+    phase_id: Optional[int]
+    phase_name: str
+    phase_open: bool
+    candidates: int
+    candidates_signed_in: int
+    ballots: int
+    voters: int
+    registered_users: int
+    users_signed_in: int
+    staff_total: int
+    staff_reset_id: int
+    staff_agree: int
+    staff_disagree: int
+    generated_at: float
+
+    @property
+    def turnout(self) -> float:
+        """投票人數 / 已登錄家長帳號（百分比，小數一位）。"""
+        return round(self.voters * 100 / self.registered_users, 1) if self.registered_users else 0.0
+
+    @property
+    def staff_voted(self) -> int:
+        return self.staff_agree + self.staff_disagree
+
+    def to_dict(self) -> dict:
+        data = self._asdict()
+        data.update(turnout=self.turnout, staff_voted=self.staff_voted)
+        return data
+
+
+def _count(*where, of=None):
+    """純量子查詢：SELECT count(...) FROM ... WHERE ..."""
+    return select(func.count(of)).where(*where).scalar_subquery()
+
+
+def _target_phase(phase_id: Optional[int]):
+    """
+    統計的階段：指定的 → 開啟中的 → 最後一個有票的 → 第一個階段。
+    「最後一個有票的」以子查詢放進同一個 SELECT（走 ix_votes_phase_id_id），不多一次來回。
+    """
+    if phase_id is None and get_current_phase():
+        phase_id = get_current_phase().id
+    if phase_id is not None:
+        return literal(phase_id, Integer)
+    return func.coalesce(select(func.max(Vote.phase_id)).scalar_subquery(), get_first_phase_id())
+
+
+def _load(phase_id: Optional[int]) -> DashboardStats:
+    target = _target_phase(phase_id)
+    reset_id = current_reset_id()
+    row = db.session.execute(select(
+        target,
+        _count(Candidate.phase_id == target, of=Candidate.id),
+        _count(Candidate.phase_id == target, Candidate.is_signed_in.is_(True), of=Candidate.id),
+        _count(Vote.phase_id == target, of=Vote.id),
+        _count(Vote.phase_id == target, of=Vote.voter_id.distinct()),
+        _count(of=User.id),
+        _count(User.is_signed_in.is_(True), of=User.id),
+        _count(of=Staff.id),
+        _count(StaffVote.reset_id == reset_id, StaffVote.vote_result == '贊成', of=StaffVote.id),
+        _count(StaffVote.reset_id == reset_id, StaffVote.vote_result == '反對', of=StaffVote.id),
+    )).one()
+    phase = get_phase(row[0])
+    return DashboardStats(
+        phase.id if phase else None, phase.name if phase else "尚未建立階段", bool(phase and phase.is_open),
+        *(int(v or 0) for v in row[1:8]),
+        reset_id, int(row[8] or 0), int(row[9] or 0),
+        time.time(),
+    )
+
+
+def get_dashboard_stats(phase_id: Optional[int] = None) -> DashboardStats:
+    """取得指定階段（未指定時見 _target_phase）的統計快照，快取 DASHBOARD_STATS_TTL 秒。"""
+    if phase_id is not None and get_phase(phase_id) is None:
+        phase_id = None
+
+    now = time.monotonic()
+    with _lock:
+        hit = _cache.get(phase_id)
+    if hit and now - hit[0] < DASHBOARD_STATS_TTL:
+        return hit[1]
+
+    stats = _load(phase_id)
+    with _lock:
+        _cache[phase_id] = (now, stats)
+    return stats
@@ -0,0 +1,217 @@
+# utils/election_report.py
+# -*- coding: utf-8 -*-
+"""
+選舉相關 Excel 匯出，不經過 pandas。
+
+整場選舉報表（單一活頁簿、多個工作表）：
+- 總覽：各階段候選人數、票數、投票人數、投票率
+- 每個階段一張「得票排名」
+- 晉級名單：所有階段的晉級者
+- 教職員投票：各輪（reset_id）贊成 / 反對
+
+另有單一階段得票、單一階段 / 全部晉級名單等單表匯出（欄位與舊版相同）。
+
+xlsxwriter 使用 constant_memory 模式逐列寫出（每張表寫完即釋放），
+直接寫到磁碟上的檔案（見 utils.export_jobs），記憶體用量不隨選舉規模成長。
+"""
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import case, func
+
+from models import db, Candidate, StaffVote, User, Vote
+from utils.helpers import get_setting
+from utils.phase_service import get_phases
+
+_YIELD_PER = 1000
+
+
+def _safe_sheet_name(name: str, used: set) -> str:
+    # Excel 工作表名稱最多 31 字、不可含 []:*?/\ 且不可重複
+    cleaned = "".join("_" if ch in '[]:*?/\\' else ch for ch in name)[:31] or "Sheet"
+    candidate, n = cleaned, 2
+    while candidate in used:
+        suffix = f"({n})"
+        candidate = cleaned[:31 - len(suffix)] + suffix
+        n += 1
+    used.add(candidate)
+    return candidate
+
+
+class _SheetWriter:
+    """依序寫列（constant_memory 模式下列號只能遞增）。"""
+
+    def __init__(self, workbook, name, header, widths, header_fmt):
+        self.ws = workbook.add_worksheet(name)
+        for col, width in enumerate(widths):
+            self.ws.set_column(col, col, width)
+        self.ws.write_row(0, 0, header, header_fmt)
+        self.ws.freeze_panes(1, 0)
+        self.row = 1
+
+    def write(self, values, fmt=None) -> None:
+        self.ws.write_row(self.row, 0, values, fmt)
+        self.row += 1
+
+
+# --------------------------------------------------
+# 各工作表
+# --------------------------------------------------
+def _write_overview(wb, used, fmts, phases) -> None:
+    stats = dict(
+        (phase_id, (votes, voters))
+        for phase_id, votes, voters in db.session.query(
+            Vote.phase_id, func.count(Vote.id), func.count(func.distinct(Vote.voter_id))
+        ).group_by(Vote.phase_id)
+    )
+    candidate_counts = dict(
+        db.session.query(Candidate.phase_id, func.count(Candidate.id)).group_by(Candidate.phase_id).all()
+    )
+    total_users = db.session.query(func.count(User.id)).scalar() or 0
+
+    sheet = _SheetWriter(wb, _safe_sheet_name("總覽", used),
+                         ["階段ID", "階段", "狀態", "應選人數", "每人票數", "候選人數", "總票數", "投票人數", "帳號總數", "投票率"],
+                         [8, 14, 8, 10, 10, 10, 10, 10, 10, 10], fmts["header"])
+    for p in phases:
+        votes, voters = stats.get(p.id, (0, 0))
+        turnout = voters / total_users if total_users else 0
+        sheet.write([p.id, p.name, "進行中" if p.is_open else "已結束", p.promote_count, p.max_votes,
+                     candidate_counts.get(p.id, 0), votes, voters, total_users])
+        sheet.ws.write_number(sheet.row - 1, 9, turnout, fmts["percent"])  # 同一列，尚未被 flush
+    sheet.write([])
+    sheet.write(["投票名稱", get_setting('vote_title', '')], fmts["bold"])
+    sheet.write(["教職員投票", get_setting('staff_vote_title', '')], fmts["bold"])
+    sheet.write(["產出時間", datetime.now().strftime("%Y-%m-%d %H:%M:%S")], fmts["bold"])
+
+
+def _write_phase_results(wb, used, fmts, phase) -> None:
+    vote_count = func.count(Vote.id)
+    q = (
+        db.session.query(Candidate.class_name, Candidate.parent_name, Candidate.is_promoted,
+                         Candidate.promote_type, vote_count)
+        .outerjoin(Vote, (Vote.candidate_id == Candidate.id) & (Vote.phase_id == phase.id))
+        .filter(Candidate.phase_id == phase.id)
+        .group_by(Candidate.id)
+        .order_by(vote_count.desc(), Candidate.id.asc())
+        .yield_per(_YIELD_PER)
+    )
+
+    sheet = _SheetWriter(wb, _safe_sheet_name(f"{phase.name}得票", used),
+                         ["名次", "班級", "家長姓名", "得票數", "晉級"],
+                         [8, 10, 16, 10, 12], fmts["header"])
+    rank, prev_votes = 0, None
+    for idx, (class_name, parent_name, is_promoted, promote_type, votes) in enumerate(q, start=1):
+        if votes != prev_votes:
+            rank, prev_votes = idx, votes
+        promoted = ("手動" if promote_type == "manual" else "✔") if is_promoted else ""
+        sheet.write([rank, class_name or "", parent_name or "", int(votes), promoted])
+
+
+def _write_promoted(wb, used, fmts, phases) -> None:
+    names = {p.id: p.name for p in phases}
+    q = (
+        db.session.query(Candidate.phase_id, Candidate.class_name, Candidate.parent_name, Candidate.promote_type)
+        .filter(Candidate.is_promoted.is_(True))
+        .order_by(Candidate.phase_id, Candidate.id)
+        .yield_per(_YIELD_PER)
+    )
+    sheet = _SheetWriter(wb, _safe_sheet_name("晉級名單", used),
+                         ["階段", "班級", "家長姓名", "晉級方式"], [14, 10, 16, 10], fmts["header"])
+    for phase_id, class_name, parent_name, promote_type in q:
+        sheet.write([names.get(phase_id, phase_id), class_name or "", parent_name or "", promote_type or "auto"])
+
+
+def _write_staff_votes(wb, used, fmts) -> None:
+    rows = (
+        db.session.query(
+            StaffVote.reset_id,
+            func.sum(case((StaffVote.vote_result == '贊成', 1), else_=0)),
+            func.sum(case((StaffVote.vote_result == '反對', 1), else_=0)),
+            func.count(StaffVote.id),
+        )
+        .group_by(StaffVote.reset_id)
+        .order_by(StaffVote.reset_id)
+        .all()
+    )
+    sheet = _SheetWriter(wb, _safe_sheet_name("教職員投票", used),
+                         ["輪次", "贊成", "反對", "總票數"], [8, 10, 10, 10], fmts["header"])
+    for reset_id, agree, disagree, total in rows:
+        sheet.write([reset_id, int(agree or 0), int(disagree or 0), int(total)])
+
+
+# --------------------------------------------------
+# 進入點（output 可為檔名或可寫入的 binary file object）
+# --------------------------------------------------
+def _open_workbook(output):
+    import xlsxwriter  # 第一次匯出才載入
+    wb = xlsxwriter.Workbook(output, {"constant_memory": True})
+    fmts = {
+        "header": wb.add_format({"bold": True, "bg_color": "#DDEBF7", "border": 1}),
+        "bold": wb.add_format({"bold": True}),
+        "percent": wb.add_format({"num_format": "0.0%"}),
+    }
+    return wb, fmts
+
+
+def write_election_report(output) -> None:
+    """將完整報表寫入 output。"""
+    wb, fmts = _open_workbook(output)
+    used: set = set()
+    phases = get_phases()
+    try:
+        _write_overview(wb, used, fmts, phases)
+        for phase in phases:
+            _write_phase_results(wb, used, fmts, phase)
+        _write_promoted(wb, used, fmts, phases)
+        _write_staff_votes(wb, used, fmts)
+    finally:
+        wb.close()
+
+
+def write_phase_results(output, phase) -> None:
+    """單一階段得票排名（名次、班級、家長姓名、得票數）。"""
+    wb, fmts = _open_workbook(output)
+    try:
+        vote_count = func.count(Vote.id)
+        q = (
+            db.session.query(Candidate.class_name, Candidate.parent_name, vote_count)
+            .outerjoin(Vote, (Vote.candidate_id == Candidate.id) & (Vote.phase_id == phase.id))
+            .filter(Candidate.phase_id == phase.id)
+            .group_by(Candidate.id)
+            .order_by(vote_count.desc(), Candidate.id.asc())
+            .yield_per(_YIELD_PER)
+        )
+        sheet = _SheetWriter(wb, _safe_sheet_name(f"{phase.name}投票結果", set()),
+                             ["名次", "班級", "家長姓名", "得票數"], [8, 10, 16, 10], fmts["header"])
+        rank, prev_votes = 0, None
+        for idx, (class_name, parent_name, votes) in enumerate(q, start=1):
+            if votes != prev_votes:
+                rank, prev_votes = idx, votes
+            sheet.write([rank, class_name or "", parent_name or "", int(votes)])
+    finally:
+        wb.close()
+
+
+def write_promoted_list(output, phase=None) -> None:
+    """晉級名單；phase=None 時為所有階段。"""
+    wb, fmts = _open_workbook(output)
+    try:
+        q = db.session.query(Candidate.id, Candidate.phase_id, Candidate.class_name,
+                             Candidate.parent_name, Candidate.promote_type) \
+            .filter(Candidate.is_promoted.is_(True))
+        if phase is not None:
+            q = q.filter(Candidate.phase_id == phase.id).order_by(Candidate.id)
+            sheet = _SheetWriter(wb, "當選名單", ["ID", "班級", "家長姓名", "晉級方式"],
+                                 [8, 10, 16, 10], fmts["header"])
+        else:
+            q = q.order_by(Candidate.phase_id, Candidate.id)
+            sheet = _SheetWriter(wb, "所有晉級者", ["階段ID", "班級", "家長姓名", "晉級方式"],
+                                 [8, 10, 16, 10], fmts["header"])
+
+        for cid, phase_id, class_name, parent_name, promote_type in q.yield_per(_YIELD_PER):
+            first = cid if phase is not None else phase_id
+            default_type = "auto" if phase is not None else ""
+            sheet.write([first, class_name or "", parent_name or "", promote_type or default_type])
+    finally:
+        wb.close()
@@ -0,0 +1,210 @@
+# utils/export_jobs.py
+# -*- coding: utf-8 -*-
+"""
+Excel 匯出背景工作與檔案快取。
+
+- 每份匯出以 (種類, 階段, 資料版本) 為 key，產出後存到 instance/exports/
+  資料沒變（例如已結束的階段）時直接回傳磁碟上的檔案，不再重算
+- 產生工作丟給 thread pool 在背景執行，頁面以 key 輪詢狀態，完成後再下載
+- 狀態以「檔案是否存在」為準，所以輪詢打到別的 worker 也能正確判斷完成
+"""
+from __future__ import annotations
+
+import glob
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from sqlalchemy import func
+
+from models import db, Candidate, StaffVote, User, Vote
+from utils.election_report import write_election_report, write_phase_results, write_promoted_list
+from utils.helpers import get_setting
+from utils.phase_service import get_phase, get_phases
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIRNAME = "exports"
+DEFAULT_EXPORT_WORKERS = 2
+
+_KEY_RE = re.compile(r"^(?P<kind>[a-z_]+)-(?P<phase>\d+)-(?P<version>[0-9a-f]{12})$")
+
+
+class ExportKind(NamedTuple):
+    writer: Callable[..., None]       # writer(path, phase) 或 writer(path)
+    per_phase: bool
+    filename: Callable[[Any], str]
+
+
+KINDS: Dict[str, ExportKind] = {
+    "vote_results": ExportKind(
+        write_phase_results, True, lambda p: f"投票結果_{p.name}_ID{p.id}.xlsx"),
+    "promoted": ExportKind(
+        lambda path, phase: write_promoted_list(path, phase), True, lambda p: f"當選名單_{p.name}_ID{p.id}.xlsx"),
+    "all_promoted": ExportKind(
+        lambda path: write_promoted_list(path), False, lambda _: "所有晉級者名單.xlsx"),
+    "report": ExportKind(
+        write_election_report, False, lambda _: "選舉報表.xlsx"),
+}
+
+
+# --------------------------------------------------
+# 🔢 資料版本：只要候選人 / 票數 / 晉級結果有變就會不同
+# --------------------------------------------------
+def _candidate_digest(phase_id: int | None) -> str:
+    """
+    候選人內容的雜湊（姓名、班級、晉級 / 當選狀態），同長度的改名也會改變版本。
+    候選人只有數百筆，逐列雜湊比產生一份 Excel 便宜得多。
+    """
+    q = db.session.query(
+        Candidate.id, Candidate.phase_id, Candidate.name, Candidate.class_name, Candidate.parent_name,
+        Candidate.is_promoted, Candidate.promote_type, Candidate.is_winner,
+    )
+    if phase_id is not None:
+        q = q.filter(Candidate.phase_id == phase_id)
+    digest = hashlib.sha1()
+    for row in q.order_by(Candidate.id).yield_per(1000):
+        digest.update(repr(tuple(row)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _tally_digest(phase_id: int | None) -> tuple:
+    """
+    匯出內容用到的票數彙總（每位候選人得票、每階段投票人數、教職員各輪贊成 / 反對）。
+    Vote.id 沒有 AUTOINCREMENT，清空後重投會重用 id，所以不能只看 (筆數, 最大 id)。
+    """
+    cq = db.session.query(Vote.phase_id, Vote.candidate_id, func.count(Vote.id)) \
+        .group_by(Vote.phase_id, Vote.candidate_id).order_by(Vote.phase_id, Vote.candidate_id)
+    pq = db.session.query(Vote.phase_id, func.count(func.distinct(Vote.voter_id))) \
+        .group_by(Vote.phase_id).order_by(Vote.phase_id)
+    if phase_id is not None:
+        cq, pq = cq.filter(Vote.phase_id == phase_id), pq.filter(Vote.phase_id == phase_id)
+    parts = [cq.all(), pq.all()]
+    if phase_id is None:
+        parts.append(db.session.query(StaffVote.reset_id, StaffVote.vote_result, func.count(StaffVote.id))
+                     .group_by(StaffVote.reset_id, StaffVote.vote_result)
+                     .order_by(StaffVote.reset_id, StaffVote.vote_result).all())
+    return tuple(tuple(map(tuple, rows)) for rows in parts)
+
+
+def data_version(phase_id: int | None = None) -> str:
+    if phase_id is not None:
+        parts = [get_phase(phase_id)]
+    else:
+        parts = [get_phases(),
+                 db.session.query(func.count(User.id)).scalar(),
+                 get_setting('vote_title', ''), get_setting('staff_vote_title', '')]
+    parts += [_candidate_digest(phase_id), _tally_digest(phase_id)]
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:12]
+
+
+def parse_key(key: str) -> Optional[Dict[str, Any]]:
+    m = _KEY_RE.match(key or "")
+    if not m or m.group("kind") not in KINDS:
+        return None
+    return {"kind": m.group("kind"), "phase_id": int(m.group("phase")), "version": m.group("version")}
+
+
+# --------------------------------------------------
+# 🏃 背景工作
+# --------------------------------------------------
+class ExportJobRunner:
+    def __init__(self, app, max_workers: int = DEFAULT_EXPORT_WORKERS):
+        self.app = app
+        self.export_dir = os.path.join(app.instance_path, EXPORT_DIRNAME)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.export_dir, f"{key}.xlsx")
+
+    def make_key(self, kind: str, phase_id: int | None) -> str:
+        version = data_version(phase_id if KINDS[kind].per_phase else None)
+        return f"{kind}-{phase_id or 0}-{version}"
+
+    def status(self, key: str) -> Dict[str, Any]:
+        if os.path.exists(self.path_for(key)):
+            return {"key": key, "status": "done"}
+        with self._lock:
+            job = dict(self._jobs.get(key) or {})
+        if not job:
+            return {"key": key, "status": "unknown"}
+        job["key"] = key
+        if job["status"] == "running":
+            job["elapsed"] = round(time.monotonic() - job["started_at"], 1)
+        job.pop("started_at", None)
+        return job
+
+    def submit(self, kind: str, phase_id: int | None) -> Dict[str, Any]:
+        """建立（或沿用）匯出工作，回傳目前狀態。需在 app context 內呼叫。"""
+        key = self.make_key(kind, phase_id)
+        if os.path.exists(self.path_for(key)):
+            return {"key": key, "status": "done", "cached": True}
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or job["status"] == "error":
+                self._jobs[key] = {"status": "running", "started_at": time.monotonic()}
+                self._pool.submit(self._run, key, kind, phase_id)
+        return self.status(key)
+
+    def build_now(self, kind: str, phase_id: int | None) -> str:
+        """同步產生（沒有 JS 的下載連結用）；已有快取則直接回傳路徑。"""
+        key = self.make_key(kind, phase_id)
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            self._write(key, kind, phase_id)
+        return key
+
+    def _run(self, key: str, kind: str, phase_id: int | None) -> None:
+        try:
+            with self.app.app_context():
+                self._write(key, kind, phase_id)
+            with self._lock:
+                self._jobs.pop(key, None)
+        except Exception as e:
+            logger.exception("export %s failed", key)
+            with self._lock:
+                self._jobs[key] = {"status": "error", "error": str(e)}
+
+    def _write(self, key: str, kind: str, phase_id: int | None) -> None:
+        os.makedirs(self.export_dir, exist_ok=True)
+        spec = KINDS[kind]
+        path = self.path_for(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if spec.per_phase:
+                spec.writer(tmp_path, get_phase(phase_id))
+            else:
+                spec.writer(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._remove_stale(key)
+
+    def _remove_stale(self, key: str) -> None:
+        # 同種類、同階段的舊版本檔案已不會再被用到
+        prefix = key.rsplit("-", 1)[0]
+        for old in glob.glob(os.path.join(self.export_dir, f"{prefix}-*.xlsx")):
+            if os.path.basename(old) != f"{key}.xlsx":
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+
+    def download_name(self, key: str) -> str:
+        info = parse_key(key)
+        spec = KINDS[info["kind"]]
+        return spec.filename(get_phase(info["phase_id"]) if spec.per_phase else None)
+
+
+def init_export_jobs(app) -> ExportJobRunner:
+    runner = ExportJobRunner(app, int(app.config.get("EXPORT_WORKERS", DEFAULT_EXPORT_WORKERS)))
+    app.extensions["export_jobs"] = runner
+    return runner
@@ -8,8 +8,17 @@ from datetime import datetime, timedelta
 from collections import defaultdict, OrderedDict
 from typing import Any, Dict, Tuple
 
-from flask import request
-from models import db, Setting
+from flask import request, current_app, has_app_context, has_request_context
+from models import db
+# 🔧 系統設定快取（實作在 utils.settings_service，跨 worker 失效）
+from utils.settings_service import (
+    get_all_settings,
+    get_setting,
+    get_int_setting,
+    set_setting,
+    set_settings,
+    invalidate_settings,
+)
 
 # --------------------------------------------------
 # Optional: OperationLog（若專案還沒建此模型，不會爆炸）
@@ -20,37 +29,6 @@ try:
 except Exception:
     HAS_OPERATION_LOG = False
 
-# --------------------------------------------------
-# 🔧 系統設定快取
-# --------------------------------------------------
-_setting_cache: Dict[str, Any] = {}
-
-def get_setting(key: str, default: Any = None, use_cache: bool = True) -> Any:
-    """
-    取得系統設定值（含記憶體快取）。
-    """
-    if use_cache and key in _setting_cache:
-        return _setting_cache[key]
-
-    setting = Setting.query.filter_by(key=key).first()
-    value = setting.value if setting else default
-    if use_cache:
-        _setting_cache[key] = value
-    return value
-
-def set_setting(key: str, value: str) -> None:
-    """
-    儲存系統設定值，並同步更新快取。
-    """
-    s = Setting.query.filter_by(key=key).first()
-    if s:
-        s.value = value
-    else:
-        s = Setting(key=key, value=value)
-        db.session.add(s)
-    db.session.commit()
-    _setting_cache[key] = value
-
 # --------------------------------------------------
 # 🏷️ 年級對應 & 分組
 # --------------------------------------------------
@@ -183,6 +161,12 @@ ENDPOINT_ZH = {
     "admin_logs.view_logs": "查看操作紀錄",
     "admin_logs.logs_data": "查詢操作紀錄（資料表）",
     "admin_logs.export_logs_csv": "匯出操作紀錄 CSV",
+    "admin_logs.archive_logs": "封存舊操作紀錄",
+    "admin_logs.search_archive": "查詢封存操作紀錄",
+
+    # metrics
+    "admin_metrics.metrics_page": "查看效能監控",
+    "admin_metrics.metrics_reset": "重設效能統計",
 
     # votes
     "admin_votes.admin_live_votes": "即時監票頁",
@@ -197,6 +181,22 @@ ENDPOINT_ZH = {
     "admin_votes.open_next_phase": "開啟下一階段",
     "admin_votes.admin_tiebreaker": "同票手動晉級處理",
     "admin_votes.votes_log": "查看投票明細（誰投給誰）",
+    "admin_votes.votes_log_data": "查詢投票明細（資料表）",
+    "admin_votes.export_votes_log_csv": "匯出投票明細 CSV",
+    "admin_votes.api_vote_timeline": "查詢每分鐘投票趨勢",
+
+    # dashboard
+    "admin_dashboard.admin_dashboard": "查看管理員主控台",
+    "admin_dashboard.dashboard_stats": "查詢主控台統計",
+
+    # staffs
+    "admin_staffs.admin_staff_votes_live": "教職員投票即時看板",
+
+    # users
+    "admin_users.generate_users": "批次產生家長帳號",
+    "admin_users.login_tokens": "查看 QR 登入單",
+    "admin_users.login_tokens_settings": "變更 QR 登入設定",
+    "auth.token_login": "QR 登入",
 
     # 其他自行補上...
 }
@@ -237,19 +237,27 @@ def zh_action_from_request(req) -> str:
 def add_log(user_type: str, user_id: int | None, action: str) -> None:
     """
     寫入操作紀錄（以本地時間記錄）。
+    若 app 已啟用背景寫入器（utils.log_writer），改為非同步批次寫入。
     user_type: 'admin' / 'candidate' / 'staff' / 'guest'
     """
     if not HAS_OPERATION_LOG:
         return
 
-    log = OperationLog(
+    record = dict(
         user_type=user_type,
         user_id=user_id,
         action=action,
-        ip_address=request.remote_addr if request else None,
+        ip_address=request.remote_addr if has_request_context() else None,
         timestamp=datetime.now()
     )
-    db.session.add(log)
+
+    # 有背景寫入器就交給它批次寫入，不在請求中 commit
+    writer = current_app.extensions.get("oplog_writer") if has_app_context() else None
+    if writer is not None:
+        writer.submit(record)
+        return
+
+    db.session.add(OperationLog(**record))
     db.session.commit()
 
 # --------------------------------------------------
@@ -0,0 +1,161 @@
+# utils/import_pipeline.py
+# -*- coding: utf-8 -*-
+"""
+名單匯入共用：分段計時與筆數統計、匯入進度（讀檔見 utils.table_reader）。
+
+    report = ImportReport()
+    with report.stage("normalize"):
+        for row in rows:
+            report.count("rows")
+    flash(report.timing_text())
+"""
+from __future__ import annotations
+
+import glob
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Tuple
+
+from flask import current_app
+
+STAGE_LABELS = {
+    "parse": "開檔",
+    "normalize": "讀取整理",
+    "diff": "比對",
+    "existing": "檢查既有帳號",
+    "hash": "密碼雜湊",
+    "write": "寫入",
+    "done": "完成",
+}
+
+
+# --------------------------------------------------
+# ⏱️ 分段計時
+# --------------------------------------------------
+class ImportReport:
+    def __init__(self):
+        self.stages: List[Tuple[str, float]] = []
+        self.counts: Dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.stages.append((name, (time.perf_counter() - start) * 1000))
+
+    def count(self, key: str, n: int = 1) -> None:
+        self.counts[key] = self.counts.get(key, 0) + n
+
+    @property
+    def total_ms(self) -> float:
+        return sum(ms for _, ms in self.stages)
+
+    def timing_text(self) -> str:
+        parts = [f"{STAGE_LABELS.get(name, name)} {ms:.0f}ms" for name, ms in self.stages]
+        return "、".join(parts) + f"（共 {self.total_ms:.0f}ms）"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "counts": dict(self.counts),
+            "stages": [{"stage": name, "ms": round(ms, 1)} for name, ms in self.stages],
+            "total_ms": round(self.total_ms, 1),
+        }
+
+
+# --------------------------------------------------
+# 📊 匯入進度（頁面以 job_id 輪詢）
+# 存成 instance/import_progress/<job_id>.json，輪詢打到別的 worker 也讀得到
+# --------------------------------------------------
+PROGRESS_DIRNAME = "import_progress"
+PROGRESS_TTL = 600               # 秒；過期的進度檔在下一次建立工作時清掉
+PROGRESS_WRITE_INTERVAL = 0.2    # 秒；advance() 最多每隔這麼久寫一次檔
+
+_JOB_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def _progress_dir() -> str:
+    return os.path.join(current_app.instance_path, PROGRESS_DIRNAME)
+
+
+def _progress_path(job_id: str) -> str | None:
+    if not _JOB_ID_RE.match(job_id or ""):
+        return None
+    return os.path.join(_progress_dir(), f"{job_id}.json")
+
+
+def _remove_expired() -> None:
+    cutoff = time.time() - PROGRESS_TTL
+    for path in glob.glob(os.path.join(_progress_dir(), "*.json")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+class ImportProgress:
+    """需在 app context 內建立（用來取得 instance 目錄）；job_id 格式不符時不記錄。"""
+
+    def __init__(self, job_id: str | None):
+        self.path = _progress_path(job_id) if job_id else None
+        self._lock = threading.Lock()
+        self._state: Dict[str, Any] = {}
+        self._written_at = 0.0
+        if self.path:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            _remove_expired()
+            self._set(stage="parse", done=0, total=0, finished=False)
+
+    def _write(self) -> None:
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._state, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+        self._written_at = time.monotonic()
+
+    def _set(self, **values) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            self._state.update(values)
+            self._write()
+
+    def stage(self, name: str, total: int | None = None) -> None:
+        values = {"stage": name, "done": 0}
+        if total is not None:
+            values["total"] = total
+        self._set(**values)
+
+    def advance(self, n: int) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            self._state["done"] = self._state.get("done", 0) + n
+            if time.monotonic() - self._written_at >= PROGRESS_WRITE_INTERVAL:
+                self._write()
+
+    def finish(self, error: str | None = None) -> None:
+        self._set(stage="done", finished=True, error=error)
+
+
+def get_import_progress(job_id: str) -> Dict[str, Any] | None:
+    path = _progress_path(job_id)
+    if not path:
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    data["stage_label"] = STAGE_LABELS.get(data.get("stage"), data.get("stage"))
+    data["percent"] = round(100 * data["done"] / data["total"]) if data.get("total") else (100 if data.get("finished") else 0)
+    return data
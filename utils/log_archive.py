@@ -0,0 +1,174 @@
+# utils/log_archive.py
+# -*- coding: utf-8 -*-
+"""
+操作紀錄封存：把超過保留天數的 OperationLog 搬到 instance/log_archive/
+下的 gzip JSONL 檔（每月一檔），並分批從資料表刪除。
+封存檔仍可透過 search_archived_logs() 依條件查詢。
+"""
+from __future__ import annotations
+
+import glob
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List
+
+from flask import current_app
+
+from models import db, OperationLog
+from utils.log_query import invalidate_log_counts
+
+DEFAULT_RETENTION_DAYS = 180
+DEFAULT_BATCH_SIZE = 1000
+ARCHIVE_PREFIX = "operation_logs_"
+ARCHIVE_SUFFIX = ".jsonl.gz"
+
+
+def get_archive_dir() -> str:
+    path = os.path.join(current_app.instance_path, "log_archive")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _archive_path(archive_dir: str, ts: datetime) -> str:
+    return os.path.join(archive_dir, f"{ARCHIVE_PREFIX}{ts:%Y-%m}{ARCHIVE_SUFFIX}")
+
+
+def _to_record(row) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "timestamp": row.timestamp.strftime("%Y-%m-%d %H:%M:%S") if row.timestamp else None,
+        "user_type": row.user_type,
+        "user_id": row.user_id,
+        "action": row.action,
+        "ip_address": row.ip_address,
+    }
+
+
+# --------------------------------------------------
+# 📦 封存
+# --------------------------------------------------
+def archive_old_logs(retention_days: int | None = None,
+                     batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    封存 retention_days 天以前的操作紀錄。
+    每批最多 batch_size 筆：先寫入 gzip（附加為新的 gzip member）再刪除並 commit，
+    因此中途失敗最多造成封存檔重複，不會遺失紀錄。
+    回傳 {"archived": 筆數, "files": [檔名...], "cutoff": 截止時間}
+    """
+    if retention_days is None:
+        retention_days = int(current_app.config.get("OPLOG_RETENTION_DAYS", DEFAULT_RETENTION_DAYS))
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    archive_dir = get_archive_dir()
+
+    archived = 0
+    files = set()
+    while True:
+        rows = (
+            db.session.query(
+                OperationLog.id,
+                OperationLog.timestamp,
+                OperationLog.user_type,
+                OperationLog.user_id,
+                OperationLog.action,
+                OperationLog.ip_address,
+            )
+            .filter(OperationLog.timestamp < cutoff)
+            .order_by(OperationLog.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+
+        # 依月份分檔
+        by_file: Dict[str, List[Dict[str, Any]]] = {}
+        for r in rows:
+            by_file.setdefault(_archive_path(archive_dir, r.timestamp), []).append(_to_record(r))
+
+        for path, records in by_file.items():
+            with gzip.open(path, "at", encoding="utf-8") as f:
+                for rec in records:
+                    f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            files.add(os.path.basename(path))
+
+        ids = [r.id for r in rows]
+        OperationLog.query.filter(OperationLog.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        archived += len(ids)
+
+        if len(rows) < batch_size:
+            break
+
+    if archived:
+        invalidate_log_counts()
+    return {"archived": archived, "files": sorted(files), "cutoff": cutoff.strftime("%Y-%m-%d %H:%M:%S")}
+
+
+# --------------------------------------------------
+# 🔍 查詢封存
+# --------------------------------------------------
+def list_archives() -> List[Dict[str, Any]]:
+    archive_dir = get_archive_dir()
+    result = []
+    for path in sorted(glob.glob(os.path.join(archive_dir, f"{ARCHIVE_PREFIX}*{ARCHIVE_SUFFIX}"))):
+        name = os.path.basename(path)
+        result.append({
+            "name": name,
+            "month": name[len(ARCHIVE_PREFIX):-len(ARCHIVE_SUFFIX)],
+            "size": os.path.getsize(path),
+        })
+    return result
+
+
+def _iter_archive(path: str) -> Iterator[Dict[str, Any]]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def search_archived_logs(user_type: str = "", keyword: str = "",
+                         date_from: str = "", date_to: str = "",
+                         limit: int = 500) -> List[Dict[str, Any]]:
+    """
+    依與 logs_data 相同的條件掃描封存檔（只讀取日期範圍內的月份檔），
+    由新到舊回傳最多 limit 筆。
+    """
+    month_from = date_from[:7] if date_from else ""
+    month_to = date_to[:7] if date_to else ""
+    ts_from = f"{date_from} 00:00:00" if date_from else ""
+    ts_to = f"{date_to} 23:59:59" if date_to else ""
+    kw = keyword.lower()
+
+    archive_dir = get_archive_dir()
+    results: List[Dict[str, Any]] = []
+    for info in reversed(list_archives()):
+        month = info["month"]
+        if month_from and month < month_from:
+            continue
+        if month_to and month > month_to:
+            continue
+
+        matched = []
+        for rec in _iter_archive(os.path.join(archive_dir, info["name"])):
+            if user_type and rec.get("user_type") != user_type:
+                continue
+            ts = rec.get("timestamp") or ""
+            if ts_from and ts < ts_from:
+                continue
+            if ts_to and ts > ts_to:
+                continue
+            if kw and kw not in (rec.get("action") or "").lower() \
+                    and kw not in (rec.get("ip_address") or "").lower():
+                continue
+            matched.append(rec)
+
+        matched.sort(key=lambda r: (r.get("timestamp") or "", r.get("id") or 0), reverse=True)
+        results.extend(matched[:limit - len(results)])
+        if len(results) >= limit:
+            break
+
+    return results
@@ -0,0 +1,150 @@
+# utils/log_query.py
+# -*- coding: utf-8 -*-
+"""
+操作紀錄查詢共用工具：篩選條件、keyset 分頁、筆數快取。
+"""
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+from sqlalchemy import and_, func, or_
+
+from models import db, OperationLog
+from utils.log_search import keyword_filter
+
+FILTERED_COUNT_TTL = 10      # 篩選後筆數快取秒數
+TOTAL_COUNT_MAX_AGE = 300    # 總筆數最長多久強制重算一次
+_MAX_FILTER_CACHE = 256
+
+_lock = threading.Lock()
+_total_cache: Dict[str, Any] = {}
+_filtered_cache: Dict[Tuple, Tuple[float, int]] = {}
+
+
+# --------------------------------------------------
+# 🔍 篩選條件
+# --------------------------------------------------
+def filter_signature(user_type: str = "", keyword: str = "",
+                     date_from: str = "", date_to: str = "") -> Tuple[str, str, str, str]:
+    return (user_type or "", keyword or "", date_from or "", date_to or "")
+
+
+def apply_log_filters(q, user_type: str = "", keyword: str = "",
+                      date_from: str = "", date_to: str = ""):
+    """套用 logs_data / 匯出共用的篩選條件（日期格式錯誤時忽略該條件）。"""
+    if user_type:
+        q = q.filter(OperationLog.user_type == user_type)
+
+    if keyword:
+        # 全文索引（SQLite FTS5 / PostgreSQL pg_trgm），不支援時為 LIKE
+        q = q.filter(keyword_filter(keyword))
+
+    if date_from:
+        try:
+            dt_from = datetime.strptime(date_from, "%Y-%m-%d")
+            q = q.filter(OperationLog.timestamp >= dt_from)
+        except ValueError:
+            pass
+
+    if date_to:
+        try:
+            dt_to = datetime.strptime(date_to, "%Y-%m-%d").replace(hour=23, minute=59, second=59)
+            q = q.filter(OperationLog.timestamp <= dt_to)
+        except ValueError:
+            pass
+
+    return q
+
+
+# --------------------------------------------------
+# 📄 keyset 分頁（依 timestamp, id）
+# --------------------------------------------------
+def parse_cursor(after_ts: str, after_id: str) -> Tuple[datetime, int] | None:
+    if not after_ts or not after_id:
+        return None
+    try:
+        return datetime.fromisoformat(after_ts), int(after_id)
+    except ValueError:
+        return None
+
+
+def apply_keyset(q, cursor: Tuple[datetime, int] | None, descending: bool = True):
+    """依 (timestamp, id) 排序；有 cursor 時只取 cursor 之後的資料（不使用 OFFSET）。"""
+    ts_col, id_col = OperationLog.timestamp, OperationLog.id
+    if cursor:
+        ts, last_id = cursor
+        if descending:
+            q = q.filter(or_(ts_col < ts, and_(ts_col == ts, id_col < last_id)))
+        else:
+            q = q.filter(or_(ts_col > ts, and_(ts_col == ts, id_col > last_id)))
+    if descending:
+        return q.order_by(ts_col.desc(), id_col.desc())
+    return q.order_by(ts_col.asc(), id_col.asc())
+
+
+def make_cursor(log) -> Dict[str, Any] | None:
+    if log is None or log.timestamp is None:
+        return None
+    return {"ts": log.timestamp.isoformat(), "id": log.id}
+
+
+# --------------------------------------------------
+# 🔢 筆數快取
+# --------------------------------------------------
+def invalidate_log_counts() -> None:
+    """有刪除紀錄（封存、清空）時呼叫，讓下一次查詢重新計算。"""
+    with _lock:
+        _total_cache.clear()
+        _filtered_cache.clear()
+
+
+def get_total_count() -> int:
+    """
+    總筆數快取。以 min(id)/max(id)（皆走主鍵索引）當版本：
+    - 只有新增 → 只補算 id > 舊 max 的筆數
+    - min(id) 改變或 max(id) 變小（有刪除）→ 全量重算
+    跨 worker 也能正確失效，不需共用記憶體。
+    """
+    min_id, max_id = db.session.query(func.min(OperationLog.id), func.max(OperationLog.id)).one()
+    now = time.monotonic()
+
+    with _lock:
+        cached = dict(_total_cache)
+
+    if (cached and cached["min_id"] == min_id and now - cached["at"] < TOTAL_COUNT_MAX_AGE
+            and max_id is not None and cached["max_id"] is not None and max_id >= cached["max_id"]):
+        total = cached["total"]
+        if max_id > cached["max_id"]:
+            total += db.session.query(func.count(OperationLog.id)) \
+                .filter(OperationLog.id > cached["max_id"]).scalar()
+        at = cached["at"]
+    else:
+        total = db.session.query(func.count(OperationLog.id)).scalar() if max_id is not None else 0
+        at = now
+
+    with _lock:
+        _total_cache.update(min_id=min_id, max_id=max_id, total=total, at=at)
+    return total
+
+
+def get_filtered_count(q, signature: Tuple) -> int:
+    """篩選後筆數，依篩選條件快取 FILTERED_COUNT_TTL 秒。"""
+    now = time.monotonic()
+    with _lock:
+        hit = _filtered_cache.get(signature)
+    if hit and now - hit[0] < FILTERED_COUNT_TTL:
+        return hit[1]
+
+    count = q.order_by(None).count()
+    with _lock:
+        if len(_filtered_cache) >= _MAX_FILTER_CACHE:
+            # 先丟掉已過期的，仍然太多就整個清掉
+            for k in [k for k, (t, _) in _filtered_cache.items() if now - t >= FILTERED_COUNT_TTL]:
+                _filtered_cache.pop(k, None)
+            if len(_filtered_cache) >= _MAX_FILTER_CACHE:
+                _filtered_cache.clear()
+        _filtered_cache[signature] = (now, count)
+    return count
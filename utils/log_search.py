@@ -0,0 +1,101 @@
+# utils/log_search.py
+# -*- coding: utf-8 -*-
+"""
+操作紀錄關鍵字全文索引。
+- SQLite：FTS5 trigram 外部內容表 operation_logs_fts，由 trigger 在新增/刪除/修改時同步
+- PostgreSQL：pg_trgm GIN 索引，原本的 ILIKE '%kw%' 即可走索引
+trigram 以三個字元為單位，中文的子字串查詢也能命中；少於 3 個字元的關鍵字退回 LIKE。
+"""
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy import or_, text
+
+from models import db, OperationLog
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "operation_logs_fts"
+MIN_TRIGRAM_LEN = 3
+
+# 啟動時偵測後設定：'sqlite_fts' / 'pg_trgm' / None
+_backend: str | None = None
+
+_SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        action, ip_address,
+        content='operation_logs', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON operation_logs BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, action, ip_address) VALUES (new.id, new.action, new.ip_address);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON operation_logs BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, action, ip_address)
+        VALUES ('delete', old.id, old.action, old.ip_address);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON operation_logs BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, action, ip_address)
+        VALUES ('delete', old.id, old.action, old.ip_address);
+        INSERT INTO {FTS_TABLE}(rowid, action, ip_address) VALUES (new.id, new.action, new.ip_address);
+    END""",
+]
+
+_PG_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_operation_logs_action_trgm ON operation_logs USING gin (action gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_operation_logs_ip_trgm ON operation_logs USING gin (ip_address gin_trgm_ops)",
+]
+
+
+def ensure_log_search_index() -> str | None:
+    """建立（或確認）全文索引，回傳使用的後端；不支援時回傳 None 並沿用 LIKE。"""
+    global _backend
+    dialect = db.engine.dialect.name
+
+    try:
+        if dialect == "sqlite":
+            with db.engine.begin() as conn:
+                existed = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:n"),
+                    {"n": FTS_TABLE}
+                ).first() is not None
+                for ddl in _SQLITE_DDL:
+                    conn.execute(text(ddl))
+                if not existed:
+                    # 第一次建立：把既有紀錄灌進索引
+                    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+            _backend = "sqlite_fts"
+        elif dialect == "postgresql":
+            with db.engine.begin() as conn:
+                for ddl in _PG_DDL:
+                    conn.execute(text(ddl))
+            _backend = "pg_trgm"
+        else:
+            _backend = None
+    except Exception as e:
+        # 例如 SQLite 未編入 FTS5 trigram、或 PostgreSQL 無權限建立 extension
+        logger.warning("⚠️ 無法建立操作紀錄全文索引，改用 LIKE 查詢: %s", e)
+        _backend = None
+
+    return _backend
+
+
+def _fts_phrase(keyword: str) -> str:
+    # 包成 FTS5 片語，避免使用者輸入被當成查詢語法
+    return '"' + keyword.replace('"', '""') + '"'
+
+
+def keyword_filter(keyword: str):
+    """回傳 keyword 對應的 WHERE 條件（可直接交給 query.filter）。"""
+    if _backend == "sqlite_fts" and len(keyword) >= MIN_TRIGRAM_LEN:
+        matched_ids = text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :kw") \
+            .bindparams(kw=_fts_phrase(keyword)) \
+            .columns(rowid=db.Integer)
+        return OperationLog.id.in_(matched_ids)
+
+    like = f"%{keyword}%"
+    return or_(
+        OperationLog.action.ilike(like),
+        OperationLog.ip_address.ilike(like)
+    )
@@ -0,0 +1,168 @@
+# utils/log_writer.py
+# -*- coding: utf-8 -*-
+"""
+背景批次寫入操作紀錄（OperationLog）。
+
+請求執行緒只把紀錄丟進有上限的佇列，由背景執行緒每 N 毫秒
+或累積 M 筆時一次 bulk insert，避免每個 POST 都多一次同步 commit。
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List
+
+from models import db, OperationLog
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_MS = 500
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_MAX_QUEUE = 10000
+
+
+class LogWriter:
+    """
+    操作紀錄背景寫入器。
+    - submit()：非阻塞放入佇列；佇列滿時丟棄並累計 dropped
+    - 背景執行緒：每 flush_ms 或滿 batch_size 筆就寫入一次
+    - stop()：停止執行緒並把剩餘紀錄全部寫入（atexit 自動呼叫）
+    """
+
+    def __init__(self, app, flush_ms: int = DEFAULT_FLUSH_MS,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 max_queue: int = DEFAULT_MAX_QUEUE):
+        self.app = app
+        self.flush_interval = max(flush_ms, 1) / 1000.0
+        self.batch_size = max(batch_size, 1)
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._start_lock = threading.Lock()
+
+        # 統計
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    # ---------------------------
+    # 生命週期
+    # ---------------------------
+    def start(self) -> None:
+        """啟動背景執行緒（fork 後的 worker 會自動重新啟動一次）。"""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="oplog-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """停止背景執行緒並寫入佇列中剩餘的紀錄。"""
+        self._stop.set()
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            self._thread.join(timeout)
+        self.flush()
+
+    # ---------------------------
+    # 寫入
+    # ---------------------------
+    def submit(self, record: Dict[str, Any]) -> bool:
+        """放入佇列；佇列已滿時回傳 False 並累計 dropped。"""
+        if self._pid != os.getpid() or not (self._thread and self._thread.is_alive()):
+            self.start()
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning("⚠️ 操作紀錄佇列已滿，已丟棄 %d 筆", self.dropped)
+            return False
+
+    def flush(self) -> None:
+        """同步寫入佇列中所有剩餘紀錄。"""
+        batch: List[Dict[str, Any]] = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+    # ---------------------------
+    # 內部
+    # ---------------------------
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        with self.app.app_context():
+            try:
+                db.session.bulk_insert_mappings(OperationLog, batch)
+                db.session.commit()
+                self.written += len(batch)
+                self.batches += 1
+            except Exception as e:
+                db.session.rollback()
+                self.failed += len(batch)
+                logger.warning("⚠️ 批次寫入操作紀錄失敗（%d 筆）: %s", len(batch), e)
+
+
+def init_log_writer(app) -> LogWriter | None:
+    """
+    依 app.config 建立並註冊背景寫入器：
+    OPLOG_ASYNC / OPLOG_FLUSH_MS / OPLOG_BATCH_SIZE / OPLOG_MAX_QUEUE
+    """
+    if not app.config.get("OPLOG_ASYNC", True):
+        return None
+
+    writer = LogWriter(
+        app,
+        flush_ms=int(app.config.get("OPLOG_FLUSH_MS", DEFAULT_FLUSH_MS)),
+        batch_size=int(app.config.get("OPLOG_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+        max_queue=int(app.config.get("OPLOG_MAX_QUEUE", DEFAULT_MAX_QUEUE)),
+    )
+    app.extensions["oplog_writer"] = writer
+    atexit.register(writer.stop)
+    return writer
+
+
+def get_log_writer(app) -> LogWriter | None:
+    return app.extensions.get("oplog_writer")
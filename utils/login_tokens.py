@@ -0,0 +1,96 @@
+# utils/login_tokens.py
+# -*- coding: utf-8 -*-
+"""
+家長 QR 登入碼（選用的登入方式）。
+
+- 管理員為每個帳號產生以 app.secret_key 簽章的 token（itsdangerous），印成 QR code 附在家長通知單上
+- 掃碼登入只做一次 HMAC 驗章 + 一次 INSERT，不需要跑 pbkdf2 / scrypt
+- 開啟連結（GET）只驗證並顯示確認頁，家長按下「進入投票」（POST）才會用掉登入碼，
+  避免連結預覽、掃碼 App 預先載入或郵件掃毒先把登入碼用掉
+- 每個帳號每個投票階段只能用一次：login_token_uses 的 (user_id, phase_id) 唯一鍵，跨 worker 也成立
+- 刪除帳號前需呼叫 forget_token_uses() 清掉使用紀錄（user_id 為外鍵）
+- token 內含「批次代號」（設定 login_token_generation）；重新產生後舊的 QR code 全部失效
+- 設定 token_login_enabled = 1 時才開放
+
+注意：SECRET_KEY 必須固定（環境變數），否則重啟後所有 QR code 都會失效。
+"""
+from __future__ import annotations
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy.exc import IntegrityError
+
+from models import db, LoginTokenUse, User
+from utils.settings_service import get_int_setting, get_setting, set_settings
+
+TOKEN_SALT = "parent-login-token"
+ENABLED_SETTING = "token_login_enabled"
+GENERATION_SETTING = "login_token_generation"
+
+
+class LoginTokenError(ValueError):
+    """token 無效、已失效或已使用（訊息直接顯示給家長）。"""
+
+
+def _serializer() -> URLSafeSerializer:
+    return URLSafeSerializer(current_app.secret_key, salt=TOKEN_SALT)
+
+
+def token_login_enabled() -> bool:
+    return get_setting(ENABLED_SETTING, "0") == "1"
+
+
+def token_generation() -> int:
+    return get_int_setting(GENERATION_SETTING, 1)
+
+
+def set_token_login_enabled(enabled: bool) -> None:
+    set_settings({ENABLED_SETTING: "1" if enabled else "0"})
+
+
+def revoke_all_tokens() -> int:
+    """換一批代號，先前印出的 QR code 全部失效；回傳新的代號。"""
+    generation = token_generation() + 1
+    set_settings({GENERATION_SETTING: generation})
+    return generation
+
+
+def make_token(user_id: int, generation: int | None = None) -> str:
+    return _serializer().dumps([user_id, generation or token_generation()])
+
+
+def verify_token(token: str, phase_id: int) -> int:
+    """只驗證、不記錄使用（確認頁用），回傳 user_id。"""
+    try:
+        user_id, generation = _serializer().loads(token)
+    except (BadSignature, TypeError, ValueError):
+        raise LoginTokenError("登入碼無效，請改用帳號密碼登入。")
+    if generation != token_generation():
+        raise LoginTokenError("此登入碼已停用，請改用帳號密碼登入。")
+    # 主鍵查詢，確認帳號沒有被刪除（成本遠低於密碼雜湊）
+    if db.session.query(User.id).filter_by(id=user_id).scalar() is None:
+        raise LoginTokenError("帳號不存在，請洽工作人員。")
+    if db.session.query(LoginTokenUse.id).filter_by(user_id=user_id, phase_id=phase_id).first():
+        raise LoginTokenError("此登入碼本階段已使用過，請改用帳號密碼登入。")
+    return user_id
+
+
+def redeem_token(token: str, phase_id: int) -> int:
+    """驗證 token 並記錄本階段已使用，回傳 user_id。"""
+    user_id = verify_token(token, phase_id)
+    db.session.add(LoginTokenUse(user_id=user_id, phase_id=phase_id))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # 兩個請求同時兌換：唯一鍵擋下第二個
+        db.session.rollback()
+        raise LoginTokenError("此登入碼本階段已使用過，請改用帳號密碼登入。")
+    return user_id
+
+
+def forget_token_uses(user_ids=None) -> int:
+    """刪除指定帳號（None = 全部）的登入碼使用紀錄，不 commit；回傳刪除筆數。"""
+    q = LoginTokenUse.query
+    if user_ids is not None:
+        q = q.filter(LoginTokenUse.user_id.in_(list(user_ids)))
+    return q.delete(synchronize_session=False)
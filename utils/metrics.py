@@ -0,0 +1,239 @@
+# utils/metrics.py
+# -*- coding: utf-8 -*-
+"""
+請求計時與 DB 查詢統計（每個 worker 行程各自統計）。
+- 每個 endpoint：延遲直方圖、狀態碼計數、DB 查詢次數與耗時
+- 全域：進行中請求數
+記錄成本只有幾次 perf_counter + 一次加鎖累加，選舉當天也可常駐開啟。
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from typing import Any, Dict, List
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 直方圖上界（毫秒），最後一格為 +Inf
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class EndpointStats:
+    __slots__ = ("count", "total_ms", "max_ms", "buckets", "statuses", "db_queries", "db_ms")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.statuses: Dict[int, int] = {}
+        self.db_queries = 0
+        self.db_ms = 0.0
+
+    def percentile(self, q: float) -> float | None:
+        """由直方圖估計百分位數（回傳該格上界，落在 +Inf 時回傳最大值）。"""
+        if not self.count:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for i, n in enumerate(self.buckets):
+            cumulative += n
+            if cumulative >= target:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+
+class RequestMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.in_flight = 0
+        self.started_at = time.time()
+        # 非請求期間（背景執行緒、啟動時）的查詢
+        self.background_db_queries = 0
+        self.background_db_ms = 0.0
+
+    # ---------------------------
+    # 請求
+    # ---------------------------
+    def request_started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self, endpoint: str, status: int, elapsed_ms: float,
+                         db_queries: int, db_ms: float) -> None:
+        idx = bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)
+        with self._lock:
+            self.in_flight -= 1
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = EndpointStats()
+            stats.count += 1
+            stats.total_ms += elapsed_ms
+            if elapsed_ms > stats.max_ms:
+                stats.max_ms = elapsed_ms
+            stats.buckets[idx] += 1
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.db_queries += db_queries
+            stats.db_ms += db_ms
+
+    def background_query(self, elapsed_ms: float) -> None:
+        with self._lock:
+            self.background_db_queries += 1
+            self.background_db_ms += elapsed_ms
+
+    def reset(self) -> None:
+        with self._lock:
+            self.endpoints.clear()
+            self.background_db_queries = 0
+            self.background_db_ms = 0.0
+            self.started_at = time.time()
+
+    # ---------------------------
+    # 輸出
+    # ---------------------------
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """給頁面用：依總耗時排序的 endpoint 統計。"""
+        with self._lock:
+            items = [(name, self._copy(s)) for name, s in self.endpoints.items()]
+
+        rows = []
+        for name, s in items:
+            errors = sum(n for code, n in s.statuses.items() if code >= 500)
+            rows.append({
+                "endpoint": name,
+                "count": s.count,
+                "avg_ms": s.total_ms / s.count if s.count else 0.0,
+                "p50_ms": s.percentile(0.50),
+                "p95_ms": s.percentile(0.95),
+                "p99_ms": s.percentile(0.99),
+                "max_ms": s.max_ms,
+                "total_ms": s.total_ms,
+                "statuses": dict(sorted(s.statuses.items())),
+                "errors": errors,
+                "db_queries_avg": s.db_queries / s.count if s.count else 0.0,
+                "db_ms_avg": s.db_ms / s.count if s.count else 0.0,
+            })
+        rows.sort(key=lambda r: r["total_ms"], reverse=True)
+        return rows
+
+    def prometheus_text(self, extra_gauges: Dict[str, float] | None = None) -> str:
+        """Prometheus text exposition format。"""
+        with self._lock:
+            items = sorted((name, self._copy(s)) for name, s in self.endpoints.items())
+            in_flight = self.in_flight
+            bg_queries, bg_ms = self.background_db_queries, self.background_db_ms
+
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {in_flight}",
+            "# HELP http_request_duration_seconds Request latency by endpoint.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for name, s in items:
+            cumulative = 0
+            for i, bound in enumerate(LATENCY_BUCKETS_MS):
+                cumulative += s.buckets[i]
+                lines.append(f'http_request_duration_seconds_bucket{{endpoint="{name}",le="{bound / 1000:g}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{endpoint="{name}",le="+Inf"}} {s.count}')
+            lines.append(f'http_request_duration_seconds_sum{{endpoint="{name}"}} {s.total_ms / 1000:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{endpoint="{name}"}} {s.count}')
+
+        lines += ["# HELP http_responses_total Responses by endpoint and status code.",
+                  "# TYPE http_responses_total counter"]
+        for name, s in items:
+            for code, n in sorted(s.statuses.items()):
+                lines.append(f'http_responses_total{{endpoint="{name}",status="{code}"}} {n}')
+
+        lines += ["# HELP db_queries_total SQL statements executed, by endpoint.",
+                  "# TYPE db_queries_total counter"]
+        for name, s in items:
+            lines.append(f'db_queries_total{{endpoint="{name}"}} {s.db_queries}')
+        lines.append(f'db_queries_total{{endpoint="(background)"}} {bg_queries}')
+
+        lines += ["# HELP db_query_duration_seconds_total Time spent in SQL, by endpoint.",
+                  "# TYPE db_query_duration_seconds_total counter"]
+        for name, s in items:
+            lines.append(f'db_query_duration_seconds_total{{endpoint="{name}"}} {s.db_ms / 1000:.6f}')
+        lines.append(f'db_query_duration_seconds_total{{endpoint="(background)"}} {bg_ms / 1000:.6f}')
+
+        for key, value in (extra_gauges or {}).items():
+            lines.append(f"# TYPE {key} gauge")
+            lines.append(f"{key} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _copy(s: EndpointStats) -> EndpointStats:
+        c = EndpointStats()
+        c.count, c.total_ms, c.max_ms = s.count, s.total_ms, s.max_ms
+        c.buckets = list(s.buckets)
+        c.statuses = dict(s.statuses)
+        c.db_queries, c.db_ms = s.db_queries, s.db_ms
+        return c
+
+
+metrics = RequestMetrics()
+
+
+# --------------------------------------------------
+# 🔌 掛到 Flask app / SQLAlchemy
+# --------------------------------------------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("_metrics_query_start")
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+    if has_request_context() and "_metrics_start" in g:
+        g._metrics_db_queries += 1
+        g._metrics_db_ms += elapsed_ms
+    else:
+        metrics.background_query(elapsed_ms)
+
+
+def init_metrics(app) -> RequestMetrics:
+    """註冊請求計時 hook 與 SQLAlchemy 查詢計數（METRICS_ENABLED=False 可關閉）。"""
+    app.extensions["request_metrics"] = metrics
+    if not app.config.get("METRICS_ENABLED", True):
+        return metrics
+
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    @app.before_request
+    def _metrics_start():
+        g._metrics_start = time.perf_counter()
+        g._metrics_db_queries = 0
+        g._metrics_db_ms = 0.0
+        g._metrics_status = 500
+        metrics.request_started()
+
+    @app.after_request
+    def _metrics_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _metrics_finish(exc):
+        start = g.pop("_metrics_start", None)
+        if start is None:
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        metrics.request_finished(
+            request.endpoint or "(unmatched)",
+            g.get("_metrics_status", 500),
+            elapsed_ms,
+            g.get("_metrics_db_queries", 0),
+            g.get("_metrics_db_ms", 0.0),
+        )
+
+    return metrics
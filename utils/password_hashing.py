@@ -0,0 +1,149 @@
+# utils/password_hashing.py
+# -*- coding: utf-8 -*-
+"""
+密碼雜湊（models 的 set_password 與批次匯入共用同一組參數）。
+
+雜湊參數（profile）為 werkzeug 的 method 字串，例如 pbkdf2:sha256:10000、scrypt:16384:8:1，
+依序取自：
+1. 環境變數 PASSWORD_HASH_METHOD（app.config）
+2. 設定表 password_hash_method（由 calibrate_password_hash.py --save 寫入）
+3. DEFAULT_HASH_METHOD
+
+參數改變後，舊帳號會在下次登入成功時以新參數重新雜湊（見 needs_rehash）。
+
+批次匯入時以 hash_passwords() 平行計算：
+werkzeug 底層的 hashlib.pbkdf2_hmac 在計算期間會釋放 GIL，
+因此用「CPU 數量」大小的 thread pool 就能吃滿所有核心，
+不必 fork 出帶著 DB 連線與背景執行緒的子行程。
+"""
+from __future__ import annotations
+
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Sequence
+
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_HASH_METHOD = 'pbkdf2:sha256:10000'
+HASH_METHOD_SETTING = 'password_hash_method'
+PASSWORD_SALT_LENGTH = 16
+
+PBKDF2_MIN_ITERATIONS = 10000
+SCRYPT_MIN_N = 2 ** 12
+SCRYPT_MAX_N = 2 ** 17   # r=8 時約 128 MB / 次，再大就會吃光伺服器記憶體
+
+# 筆數少於此值直接逐筆計算（開 pool 不划算）
+PARALLEL_MIN_ITEMS = 32
+_CHUNK_SIZE = 64
+
+
+# --------------------------------------------------
+# ⚙️ 目前的雜湊參數
+# --------------------------------------------------
+def normalize_method(method: str | None) -> str | None:
+    """檢查並補齊 method 字串（pbkdf2:sha256:N / scrypt:n:r:p）；格式不符回傳 None。"""
+    parts = (method or '').strip().split(':')
+    try:
+        if parts[0] == 'pbkdf2' and len(parts) == 3:
+            return f"pbkdf2:{parts[1]}:{int(parts[2])}"
+        if parts[0] == 'scrypt' and len(parts) == 4:
+            n, r, p = (int(x) for x in parts[1:])
+            return f"scrypt:{n}:{r}:{p}"
+    except ValueError:
+        return None
+    return None
+
+
+def current_hash_method() -> str:
+    if not has_app_context():
+        return DEFAULT_HASH_METHOD
+    from utils.settings_service import get_setting  # models → 本模組 → settings_service 會循環匯入
+
+    for candidate in (current_app.config.get('PASSWORD_HASH_METHOD'), get_setting(HASH_METHOD_SETTING)):
+        method = normalize_method(candidate)
+        if method:
+            return method
+    return DEFAULT_HASH_METHOD
+
+
+def hash_method_of(pwhash: str | None) -> str:
+    return (pwhash or '').split('$', 1)[0]
+
+
+def needs_rehash(pwhash: str | None, method: str | None = None) -> bool:
+    """雜湊參數與目前 profile 不同（不論變強或變弱）就需要在登入時重算。"""
+    return bool(pwhash) and hash_method_of(pwhash) != (method or current_hash_method())
+
+
+# --------------------------------------------------
+# 🔐 雜湊
+# --------------------------------------------------
+def hash_password(password: str, method: str | None = None) -> str:
+    return generate_password_hash(password, method=method or current_hash_method(),
+                                  salt_length=PASSWORD_SALT_LENGTH)
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def hash_passwords(passwords: Sequence[str],
+                   progress: Callable[[int], None] | None = None,
+                   workers: int | None = None,
+                   method: str | None = None) -> List[str]:
+    """
+    依序回傳每個密碼的雜湊。
+    progress(n)：每完成一批呼叫一次，n 為該批筆數（用來更新匯入進度）。
+    """
+    workers = workers or default_workers()
+    method = method or current_hash_method()  # 在呼叫端（有 app context）決定，worker thread 內不再查
+    chunks = [passwords[i:i + _CHUNK_SIZE] for i in range(0, len(passwords), _CHUNK_SIZE)]
+
+    def _hash_chunk(chunk):
+        result = [hash_password(pw, method) for pw in chunk]
+        if progress:
+            progress(len(chunk))
+        return result
+
+    if workers <= 1 or len(passwords) < PARALLEL_MIN_ITEMS:
+        return [h for chunk in chunks for h in _hash_chunk(chunk)]
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash") as pool:
+        return [h for chunk_hashes in pool.map(_hash_chunk, chunks) for h in chunk_hashes]
+
+
+# --------------------------------------------------
+# ⏱️ 校準：挑出在這台機器上驗證一次約 target_ms 的參數
+# --------------------------------------------------
+def measure_verify_ms(method: str, rounds: int = 5) -> float:
+    """驗證一次（= 算一次雜湊）的中位數毫秒。"""
+    pwhash = hash_password("calibration-password", method)
+    samples = []
+    for _ in range(max(1, rounds)):
+        start = time.perf_counter()
+        check_password_hash(pwhash, "calibration-password")
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def calibrate(target_ms: float, algorithm: str = 'pbkdf2', rounds: int = 5) -> str:
+    """
+    pbkdf2：耗時與 iterations 成正比，量一次基準後等比例換算（取千位整數，不低於 PBKDF2_MIN_ITERATIONS）。
+    scrypt：N 只能是 2 的次方，由小往上試，取不超過 target_ms 的最大 N（r=8, p=1）。
+    """
+    if algorithm == 'pbkdf2':
+        base = PBKDF2_MIN_ITERATIONS
+        ms = measure_verify_ms(f"pbkdf2:sha256:{base}", rounds)
+        iterations = int(round(base * target_ms / ms / 1000.0)) * 1000
+        return f"pbkdf2:sha256:{max(PBKDF2_MIN_ITERATIONS, iterations)}"
+
+    if algorithm == 'scrypt':
+        n = SCRYPT_MIN_N
+        while n * 2 <= SCRYPT_MAX_N and measure_verify_ms(f"scrypt:{n * 2}:8:1", rounds) <= target_ms:
+            n *= 2
+        return f"scrypt:{n}:8:1"
+
+    raise ValueError(f"不支援的演算法：{algorithm}")
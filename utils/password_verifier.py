@@ -0,0 +1,207 @@
+# utils/password_verifier.py
+# -*- coding: utf-8 -*-
+"""
+登入密碼驗證的有界 worker pool。
+
+階段一開放時大量家長同時登入，每次 check_password 都要跑一次 pbkdf2/scrypt；
+若直接在 waitress 的請求執行緒上算，CPU 與執行緒會被登入吃光，投票、輪詢都跟著卡住。
+
+- 驗證交給固定大小的 pool（LOGIN_HASH_WORKERS），同時最多只有這麼多個雜湊在算
+- 排隊中的驗證最多 LOGIN_HASH_QUEUE 個；超過就立刻丟 PasswordVerifierBusy，
+  由登入頁回 503 + Retry-After，不讓請求執行緒在這裡堆積
+- 等待超過 LOGIN_HASH_TIMEOUT 秒同樣視為忙碌
+- 驗證成功且雜湊參數與目前 profile 不同時，在同一個 worker 內順便重算新雜湊，
+  由 check_login() 寫回帳號（參數升級、降級都不需要使用者重設密碼）
+- 佇列深度、雜湊耗時、拒絕次數等統計顯示在 /admin/metrics
+"""
+from __future__ import annotations
+
+import bisect
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Optional, Tuple
+
+from flask import current_app
+from werkzeug.security import check_password_hash
+
+from models import db
+from utils.metrics import LATENCY_BUCKETS_MS
+from utils.password_hashing import current_hash_method, hash_password, needs_rehash
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE = 4
+DEFAULT_TIMEOUT = 5.0
+
+
+def default_workers() -> int:
+    # 留一半 CPU 給投票與其他請求
+    return max(1, (os.cpu_count() or 1) // 2)
+
+
+class PasswordVerifierBusy(Exception):
+    """驗證佇列已滿或等待逾時；retry_after 為建議的重試秒數。"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"password verifier busy, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class PasswordVerifier:
+    def __init__(self, workers: int | None = None, max_queue: int = DEFAULT_QUEUE,
+                 timeout: float = DEFAULT_TIMEOUT):
+        self.workers = max(1, workers or default_workers())
+        self.capacity = self.workers + max(0, max_queue)
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pwverify")
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+
+        # 統計
+        self.pending = 0          # 已受理、尚未完成（排隊 + 計算中）
+        self.active = 0           # 計算中
+        self.verified = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.rehashed = 0
+        self.hash_ms_total = 0.0
+        self.hash_ms_max = 0.0
+        self.wait_ms_total = 0.0
+        self.hash_buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    # ---------------------------
+    # 驗證
+    # ---------------------------
+    def verify(self, pwhash: str, password: str) -> bool:
+        return self.verify_and_rehash(pwhash, password)[0]
+
+    def verify_and_rehash(self, pwhash: str, password: str,
+                          rehash_method: str | None = None) -> Tuple[bool, Optional[str]]:
+        """回傳 (是否正確, 新雜湊)；rehash_method 有值且參數不同時才會產生新雜湊。"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordVerifierBusy(self.retry_after())
+
+        with self._lock:
+            self.pending += 1
+        try:
+            future = self._pool.submit(self._check, time.perf_counter(), pwhash, password, rehash_method)
+        except Exception:
+            # 例如執行緒池已 shutdown：沒有 future 會回呼，必須自己歸還名額
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except (FutureTimeout, CancelledError):
+            future.cancel()  # 還在排隊就不用算了
+            with self._lock:
+                self.timeouts += 1
+            raise PasswordVerifierBusy(self.retry_after())
+
+    def _check(self, queued_at: float, pwhash: str, password: str,
+               rehash_method: str | None) -> Tuple[bool, Optional[str]]:
+        start = time.perf_counter()
+        with self._lock:
+            self.active += 1
+            self.wait_ms_total += (start - queued_at) * 1000
+        try:
+            ok = check_password_hash(pwhash, password)
+            if ok and rehash_method and needs_rehash(pwhash, rehash_method):
+                with self._lock:
+                    self.rehashed += 1
+                return ok, hash_password(password, rehash_method)
+            return ok, None
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.active -= 1
+                self.verified += 1
+                self.hash_ms_total += elapsed_ms
+                self.hash_ms_max = max(self.hash_ms_max, elapsed_ms)
+                self.hash_buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self.pending -= 1
+        self._slots.release()
+
+    def retry_after(self) -> int:
+        """以目前的平均雜湊時間估計排到的秒數（至少 1 秒）。"""
+        with self._lock:
+            avg_ms = self.hash_ms_total / self.verified if self.verified else 100.0
+            pending = self.pending
+        return max(1, math.ceil(avg_ms * (pending + 1) / self.workers / 1000))
+
+    # ---------------------------
+    # 統計
+    # ---------------------------
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            verified = self.verified
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "queue_depth": max(0, self.pending - self.active),
+                "active": self.active,
+                "verified_total": verified,
+                "rejected_total": self.rejected,
+                "timeouts_total": self.timeouts,
+                "rehashed_total": self.rehashed,
+                "hash_ms_avg": round(self.hash_ms_total / verified, 2) if verified else 0.0,
+                "hash_ms_max": round(self.hash_ms_max, 2),
+                "hash_ms_p95": self._percentile(0.95),
+                "wait_ms_avg": round(self.wait_ms_total / verified, 2) if verified else 0.0,
+            }
+
+    def _percentile(self, q: float) -> float:
+        # 呼叫端已持有 _lock
+        if not self.verified:
+            return 0.0
+        target, cumulative = q * self.verified, 0
+        for i, n in enumerate(self.hash_buckets):
+            cumulative += n
+            if cumulative >= target:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else round(self.hash_ms_max, 2)
+        return round(self.hash_ms_max, 2)
+
+
+def check_login(account, password: str, use_pool: bool = True) -> bool:
+    """
+    登入用密碼檢查：經由 app 的 PasswordVerifier 驗證（未初始化或 use_pool=False 時直接計算），
+    成功且雜湊參數已過時則寫回新雜湊。pool 忙碌時丟 PasswordVerifierBusy。
+    """
+    if account is None or not account.password_hash:
+        return False
+    method = current_hash_method()
+    verifier = current_app.extensions.get("password_verifier") if use_pool else None
+    if verifier is None:
+        ok = check_password_hash(account.password_hash, password)
+        new_hash = hash_password(password, method) if ok and needs_rehash(account.password_hash, method) else None
+    else:
+        ok, new_hash = verifier.verify_and_rehash(account.password_hash, password, method)
+
+    if new_hash:
+        try:
+            account.password_hash = new_hash
+            db.session.commit()
+        except Exception as e:
+            # 重新雜湊失敗不影響這次登入，下次登入再試
+            db.session.rollback()
+            logger.warning("⚠️ 無法更新密碼雜湊（%s）：%s", getattr(account, "username", "?"), e)
+    return ok
+
+
+def init_password_verifier(app) -> PasswordVerifier:
+    verifier = PasswordVerifier(
+        workers=app.config.get("LOGIN_HASH_WORKERS") or None,
+        max_queue=int(app.config.get("LOGIN_HASH_QUEUE", DEFAULT_QUEUE)),
+        timeout=float(app.config.get("LOGIN_HASH_TIMEOUT", DEFAULT_TIMEOUT)),
+    )
+    app.extensions["password_verifier"] = verifier
+    return verifier
@@ -0,0 +1,119 @@
+# utils/phase_service.py
+# -*- coding: utf-8 -*-
+"""
+投票階段（VotePhase）快取服務。
+
+階段只有幾筆、卻幾乎每個請求都要查「目前開啟的階段」，
+因此一次載入全部階段做成唯讀快照，各 worker 共用 VersionedCache（instance/phases.version）失效。
+
+- 讀取：get_current_phase / get_latest_closed_phase / get_next_phase ... 回傳 PhaseInfo（唯讀）
+- 需要修改時：用 db.session.get(VotePhase, info.id) 取 ORM 物件，commit 後呼叫 invalidate_phases()
+- 寫入選票前：phase_is_open_in_db() 直接查資料庫，不依賴快取
+"""
+from __future__ import annotations
+
+from typing import NamedTuple, Optional, Tuple
+
+from models import db, VotePhase
+from utils.versioned_cache import VersionedCache
+
+PHASES_MAX_AGE = 60
+
+
+class PhaseInfo(NamedTuple):
+    id: int
+    name: str
+    is_open: bool
+    # 與資料庫欄位相同（可能為 0 或 None），預設值由各呼叫端自行決定
+    max_votes: Optional[int]
+    min_votes: Optional[int]
+    promote_count: Optional[int]
+
+
+def _load_phases() -> Tuple[PhaseInfo, ...]:
+    rows = db.session.query(
+        VotePhase.id, VotePhase.name, VotePhase.is_open,
+        VotePhase.max_votes, VotePhase.min_votes, VotePhase.promote_count,
+    ).order_by(VotePhase.id).all()
+    return tuple(
+        PhaseInfo(r.id, r.name, bool(r.is_open), r.max_votes, r.min_votes, r.promote_count)
+        for r in rows
+    )
+
+
+_phase_cache = VersionedCache("phases", _load_phases, max_age=PHASES_MAX_AGE)
+
+
+def invalidate_phases(broadcast: bool = True) -> None:
+    """新增 / 刪除階段、開關階段、修改票數設定後呼叫。"""
+    _phase_cache.invalidate(broadcast)
+
+
+# --------------------------------------------------
+# 讀取
+# --------------------------------------------------
+def get_phases() -> Tuple[PhaseInfo, ...]:
+    """所有階段，依 id 排序。"""
+    return _phase_cache.get()
+
+
+def get_phase(phase_id) -> Optional[PhaseInfo]:
+    for p in get_phases():
+        if p.id == phase_id:
+            return p
+    return None
+
+
+def get_current_phase() -> Optional[PhaseInfo]:
+    """目前開啟中的階段（若有多個，取 id 最小者）。"""
+    for p in get_phases():
+        if p.is_open:
+            return p
+    return None
+
+
+def get_first_phase() -> Optional[PhaseInfo]:
+    phases = get_phases()
+    return phases[0] if phases else None
+
+
+def get_first_phase_id() -> Optional[int]:
+    first = get_first_phase()
+    return first.id if first else None
+
+
+def get_latest_closed_phase() -> Optional[PhaseInfo]:
+    """id 最大的已結束階段。"""
+    for p in reversed(get_phases()):
+        if not p.is_open:
+            return p
+    return None
+
+
+def get_next_phase(phase_id) -> Optional[PhaseInfo]:
+    for p in get_phases():
+        if p.id > phase_id:
+            return p
+    return None
+
+
+def get_previous_phase(phase_id) -> Optional[PhaseInfo]:
+    for p in reversed(get_phases()):
+        if p.id < phase_id:
+            return p
+    return None
+
+
+# --------------------------------------------------
+# 寫入前確認（不經快取）
+# --------------------------------------------------
+def phase_is_open_in_db(phase_id) -> bool:
+    """
+    直接查資料庫確認階段仍開啟（主鍵查詢）。
+    快取只在同一台主機內即時失效，其他主機最多落後 PHASES_MAX_AGE 秒，
+    因此寫入選票前要在同一個交易內再確認一次；已關閉時順便清掉本行程的快取。
+    """
+    is_open = bool(db.session.query(VotePhase.is_open).filter_by(id=phase_id).scalar())
+    if not is_open:
+        invalidate_phases(broadcast=False)
+    return is_open
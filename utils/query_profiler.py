@@ -0,0 +1,165 @@
+# utils/query_profiler.py
+# -*- coding: utf-8 -*-
+"""
+SQL 查詢剖析 / N+1 偵測。
+
+- 開啟 SQL_PROFILE 後，每個請求記錄所有 SQL，回應加上 X-SQL-Queries 標頭，
+  同一種語句重複 SQL_NPLUS1_THRESHOLD 次以上會寫入 log 並加上 X-SQL-NPlus1 標頭
+- 測試中可直接當 context manager 用來檢查查詢數上限：
+
+    with QueryProfiler() as prof:
+        client.get("/admin/promote")
+    prof.assert_max_queries(10)
+"""
+from __future__ import annotations
+
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Tuple
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NPLUS1_THRESHOLD = 5
+
+_active: ContextVar[Tuple["QueryProfiler", ...]] = ContextVar("sql_profilers", default=())
+
+_WS_RE = re.compile(r"\s+")
+# IN (?, ?, ?) / IN (%(p1)s, %(p2)s) → IN (?...)，讓不同長度的 IN 視為同一種語句
+_IN_LIST_RE = re.compile(r"\((?:\s*(?:\?|%\([^)]*\)s|%s|:\w+)\s*,)+\s*(?:\?|%\([^)]*\)s|%s|:\w+)\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    shape = _WS_RE.sub(" ", statement).strip()
+    return _IN_LIST_RE.sub("(?...)", shape)
+
+
+class QueryProfiler:
+    """收集期間內執行的所有 SQL（可巢狀，所有作用中的 profiler 都會收到）。"""
+
+    def __init__(self, label: str = "", nplus1_threshold: int = DEFAULT_NPLUS1_THRESHOLD):
+        self.label = label
+        self.nplus1_threshold = nplus1_threshold
+        self.statements: List[Tuple[str, float]] = []
+        self._token = None
+
+    # ---------------------------
+    # 啟用 / 停用
+    # ---------------------------
+    def start(self) -> "QueryProfiler":
+        self._token = _active.set(_active.get() + (self,))
+        return self
+
+    def stop(self) -> None:
+        if self._token is not None:
+            _active.reset(self._token)
+            self._token = None
+
+    def __enter__(self) -> "QueryProfiler":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ---------------------------
+    # 統計
+    # ---------------------------
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.statements.append((statement_shape(statement), elapsed_ms))
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(ms for _, ms in self.statements)
+
+    def repeated(self) -> List[Tuple[str, int]]:
+        """重複達門檻的語句（疑似 N+1），依次數排序。"""
+        counts = Counter(shape for shape, _ in self.statements)
+        return [(shape, n) for shape, n in counts.most_common() if n >= self.nplus1_threshold]
+
+    def assert_max_queries(self, limit: int) -> None:
+        if self.count > limit:
+            raise AssertionError(
+                f"預期最多 {limit} 次 SQL，實際 {self.count} 次\n" + self.report()
+            )
+
+    def assert_no_nplus1(self) -> None:
+        repeated = self.repeated()
+        if repeated:
+            raise AssertionError("偵測到重複查詢（N+1）\n" + self.report())
+
+    def report(self) -> str:
+        lines = [f"[SQL] {self.label} 共 {self.count} 次，{self.total_ms:.1f} ms"]
+        for shape, n in self.repeated():
+            lines.append(f"  ⚠️ 重複 {n} 次：{shape[:300]}")
+        return "\n".join(lines)
+
+
+# --------------------------------------------------
+# 🔌 SQLAlchemy 事件
+# --------------------------------------------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active.get():
+        conn.info.setdefault("_profiler_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profilers = _active.get()
+    if not profilers:
+        return
+    starts = conn.info.get("_profiler_query_start")
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000 if starts else 0.0
+    for p in profilers:
+        p.record(statement, elapsed_ms)
+
+
+def install_listeners() -> None:
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# 測試直接 import QueryProfiler 時也能運作
+install_listeners()
+
+
+def init_query_profiler(app) -> None:
+    """SQL_PROFILE=True 時替每個請求掛上 QueryProfiler。"""
+    if not app.config.get("SQL_PROFILE", False):
+        return
+    threshold = int(app.config.get("SQL_NPLUS1_THRESHOLD", DEFAULT_NPLUS1_THRESHOLD))
+
+    @app.before_request
+    def _profile_start():
+        g._sql_profiler = QueryProfiler(request.endpoint or request.path, threshold).start()
+
+    @app.after_request
+    def _profile_headers(response):
+        prof = g.get("_sql_profiler")
+        if prof is not None:
+            response.headers["X-SQL-Queries"] = f"{prof.count}; {prof.total_ms:.1f}ms"
+            repeated = prof.repeated()
+            if repeated:
+                summary = "; ".join(f"{n}x {shape[:80]}" for shape, n in repeated[:3])
+                response.headers["X-SQL-NPlus1"] = summary.encode("ascii", "replace").decode("ascii")
+        return response
+
+    @app.teardown_request
+    def _profile_stop(exc):
+        prof = g.pop("_sql_profiler", None)
+        if prof is None:
+            return
+        prof.stop()
+        if prof.repeated():
+            logger.warning(prof.report())
+        else:
+            logger.debug(prof.report())
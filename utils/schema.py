@@ -0,0 +1,73 @@
+# utils/schema.py
+# -*- coding: utf-8 -*-
+"""
+啟動時建立資料表並套用遷移（含操作紀錄全文索引）。
+
+- 新資料庫：db.create_all() 建出的就是最新結構，直接標記為最新的 Alembic 版本
+- 既有資料庫：欄位、索引、資料清理都寫在 migrations/versions，版本落後時在這裡套用；
+  run_server.py、`flask run`、WSGI 都會匯入 app，三種啟動方式結果一致
+- 套用失敗就中止啟動，不帶著舊結構上線（例如缺少 votes.cast_at）
+"""
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from flask import current_app
+from sqlalchemy import inspect
+
+from models import db
+
+logger = logging.getLogger(__name__)
+
+
+def _script_directory() -> ScriptDirectory:
+    return ScriptDirectory(current_app.extensions["migrate"].directory)
+
+
+def current_revision() -> Optional[str]:
+    with db.engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+
+def head_revision() -> Optional[str]:
+    return _script_directory().get_current_head()
+
+
+def _upgrade(script: ScriptDirectory) -> None:
+    from flask_migrate import upgrade
+
+    current, head = current_revision(), script.get_current_head()
+    logger.info("🔧 資料庫遷移版本 %s → %s", current, head)
+    try:
+        upgrade(directory=script.dir)
+    except (Exception, SystemExit) as e:  # flask_migrate 找不到版本時會 sys.exit
+        raise RuntimeError(
+            f"資料庫遷移版本 {current} 無法升級到 {head}：{e}，請確認 migrations/ 與資料庫後再執行 `flask db upgrade`"
+        ) from e
+    if current_revision() != head:
+        raise RuntimeError(f"資料庫遷移版本 {current_revision()} 不是最新的 {head}，請執行 `flask db upgrade`")
+
+
+def ensure_schema() -> None:
+    from utils.log_search import ensure_log_search_index
+
+    fresh = not inspect(db.engine).get_table_names()
+    db.create_all()
+
+    try:
+        script = _script_directory()
+    except Exception as e:
+        logger.warning("⚠️ 找不到遷移腳本，略過版本檢查：%s", e)
+        script = None
+
+    if script is not None and fresh:
+        with db.engine.begin() as conn:
+            MigrationContext.configure(conn).stamp(script, "head")
+        logger.info("✅ 已建立資料表並標記遷移版本 %s", script.get_current_head())
+    elif script is not None and current_revision() != script.get_current_head():
+        _upgrade(script)
+
+    ensure_log_search_index()
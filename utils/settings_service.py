@@ -0,0 +1,74 @@
+# utils/settings_service.py
+# -*- coding: utf-8 -*-
+"""
+系統設定（Setting）快取服務。
+
+- 一次查詢載入所有 Setting 列，每個 worker 行程各自快取
+- 寫入後透過 VersionedCache（instance/settings.version）通知其他 worker 重新載入
+"""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from models import db, Setting
+from utils.versioned_cache import VersionedCache
+
+SETTINGS_MAX_AGE = 60
+
+
+def _load_all() -> Dict[str, str]:
+    return {key: value for key, value in db.session.query(Setting.key, Setting.value).all()}
+
+
+_settings_cache = VersionedCache("settings", _load_all, max_age=SETTINGS_MAX_AGE)
+
+
+def get_all_settings() -> Dict[str, str]:
+    """回傳所有設定（dict）；版本未變時直接使用本行程快取。"""
+    return _settings_cache.get()
+
+
+def invalidate_settings(broadcast: bool = True) -> None:
+    """清除本行程快取；broadcast=True 時同時通知其他 worker。"""
+    _settings_cache.invalidate(broadcast)
+
+
+# --------------------------------------------------
+# 讀取
+# --------------------------------------------------
+def get_setting(key: str, default: Any = None, use_cache: bool = True) -> Any:
+    if not use_cache:
+        row = Setting.query.filter_by(key=key).first()
+        return row.value if row else default
+    return get_all_settings().get(key, default)
+
+
+def get_int_setting(key: str, default: int) -> int:
+    """取得整數設定；不存在或格式錯誤時回傳 default。"""
+    value = get_setting(key)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+# --------------------------------------------------
+# 寫入
+# --------------------------------------------------
+def set_settings(values: Dict[str, Any]) -> None:
+    """批次新增或更新多筆設定，一次 commit 並通知其他 worker。"""
+    if not values:
+        return
+    existing = {s.key: s for s in Setting.query.filter(Setting.key.in_(list(values.keys()))).all()}
+    for key, value in values.items():
+        value = "" if value is None else str(value)
+        if key in existing:
+            existing[key].value = value
+        else:
+            db.session.add(Setting(key=key, value=value))
+    db.session.commit()
+    invalidate_settings()
+
+
+def set_setting(key: str, value: Any) -> None:
+    set_settings({key: value})
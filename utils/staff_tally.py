@@ -0,0 +1,72 @@
+# utils/staff_tally.py
+# -*- coding: utf-8 -*-
+"""
+教職員投票（贊成 / 反對）目前輪次的票數快取。
+
+- 一次 GROUP BY vote_result 取得目前 current_reset_id 的票數，每個 worker 行程各自快取
+- 有人投票、管理員清空票數時呼叫 invalidate_staff_tally()，
+  透過 VersionedCache（instance/staff_tally.version）通知其他 worker 重新載入
+- current_reset_id 改變時自動重載
+- 即時看板以 etag 做條件式輪詢，票數沒變時只回 304
+"""
+from __future__ import annotations
+
+from typing import NamedTuple
+
+from sqlalchemy import func
+
+from models import db, StaffVote
+from utils.settings_service import get_int_setting
+from utils.versioned_cache import VersionedCache
+
+STAFF_TALLY_MAX_AGE = 60
+CHOICES = ('贊成', '反對')
+
+
+class StaffTally(NamedTuple):
+    reset_id: int
+    agree: int
+    disagree: int
+
+    @property
+    def total(self) -> int:
+        return self.agree + self.disagree
+
+    @property
+    def etag(self) -> str:
+        return f"staff-{self.reset_id}-{self.agree}-{self.disagree}"
+
+    def to_dict(self) -> dict:
+        return {"reset_id": self.reset_id, "agree": self.agree,
+                "disagree": self.disagree, "total": self.total}
+
+
+def current_reset_id() -> int:
+    return get_int_setting('current_reset_id', 1)
+
+
+def _load() -> StaffTally:
+    reset_id = current_reset_id()
+    counts = dict(
+        db.session.query(StaffVote.vote_result, func.count(StaffVote.id))
+        .filter(StaffVote.reset_id == reset_id)
+        .group_by(StaffVote.vote_result)
+        .all()
+    )
+    return StaffTally(reset_id, counts.get('贊成', 0), counts.get('反對', 0))
+
+
+_tally_cache = VersionedCache("staff_tally", _load, max_age=STAFF_TALLY_MAX_AGE)
+
+
+def get_staff_tally() -> StaffTally:
+    tally = _tally_cache.get()
+    if tally.reset_id != current_reset_id():
+        _tally_cache.invalidate(broadcast=False)
+        tally = _tally_cache.get()
+    return tally
+
+
+def invalidate_staff_tally(broadcast: bool = True) -> None:
+    """清除本行程快取；broadcast=True 時同時通知其他 worker。"""
+    _tally_cache.invalidate(broadcast)
@@ -0,0 +1,128 @@
+# utils/table_reader.py
+# -*- coding: utf-8 -*-
+"""
+匯入檔讀取（CSV / Excel）：回傳 (欄位名稱, 逐列 dict 的 iterator)，不一次載入整份檔案。
+值一律為字串；Excel 以 openpyxl read_only 模式串流讀取。
+openpyxl / chardet 在實際讀檔時才 import，不影響 app 啟動時間。
+
+CSV 編碼判斷：
+- UTF-8 BOM / UTF-16 BOM → 直接採用
+- 整份檔案都能以 UTF-8 解碼 → utf-8；否則整份能以 CP950 解碼 → cp950（Big5 的超集，Windows Excel 預設）
+  （逐塊掃過整個檔案而非只看開頭，前幾列是純 ASCII、後面才出現 Big5 姓名的檔案也能判斷正確）
+- 以上皆否才交給 chardet 判斷開頭 ENCODING_SAMPLE_BYTES
+"""
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+from typing import Dict, Iterator, List, Tuple
+
+ENCODING_SAMPLE_BYTES = 64 * 1024
+DECODE_CHUNK_BYTES = 256 * 1024
+
+Rows = Iterator[Dict[str, str]]
+
+
+# --------------------------------------------------
+# 🔤 編碼判斷
+# --------------------------------------------------
+def _decodes_fully(stream, encoding: str) -> bool:
+    """逐塊解碼整個 stream（記憶體固定），任何位置解碼失敗即回傳 False；結束後 seek 回開頭。"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        while True:
+            chunk = stream.read(DECODE_CHUNK_BYTES)
+            if not chunk:
+                decoder.decode(b"", final=True)
+                return True
+            decoder.decode(chunk)
+    except UnicodeDecodeError:
+        return False
+    finally:
+        stream.seek(0)
+
+
+def detect_encoding(stream) -> str:
+    """stream 為可 seek 的 binary stream；回傳後位置在開頭。"""
+    sample = stream.read(ENCODING_SAMPLE_BYTES)
+    stream.seek(0)
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    if _decodes_fully(stream, "utf-8"):
+        return "utf-8"
+    if _decodes_fully(stream, "cp950"):
+        return "cp950"
+    import chardet
+    return chardet.detect(sample)["encoding"] or "utf-8"
+
+
+# --------------------------------------------------
+# 📄 CSV
+# --------------------------------------------------
+def open_csv(stream) -> Tuple[List[str], Rows]:
+    """stream 為可 seek 的 binary stream（例如 FileStorage.stream）。"""
+    encoding = detect_encoding(stream)
+
+    text = io.TextIOWrapper(stream, encoding=encoding, errors="ignore", newline="")
+    reader = csv.reader(text)
+    header = [h.strip() for h in next(reader, [])]
+
+    def rows() -> Rows:
+        try:
+            for values in reader:
+                if not any(values):
+                    continue
+                yield dict(zip(header, values))
+        finally:
+            # 不讓 TextIOWrapper 被回收時順便關掉上傳檔
+            text.detach()
+
+    return header, rows()
+
+
+# --------------------------------------------------
+# 📊 Excel
+# --------------------------------------------------
+def _cell_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))  # 1234.0 → "1234"（帳號、密碼、班級常被 Excel 存成數字）
+    return str(value)
+
+
+def open_excel(stream) -> Tuple[List[str], Rows]:
+    """openpyxl read_only 模式逐列讀取第一個工作表，不建立 DataFrame。"""
+    from openpyxl import load_workbook
+    wb = load_workbook(stream, read_only=True, data_only=True)
+    ws = wb.worksheets[0]
+    it = ws.iter_rows(values_only=True)
+
+    header: List[str] = []
+    for values in it:
+        if any(v is not None and str(v).strip() for v in values):
+            header = [_cell_text(v).strip() for v in values]
+            break
+
+    def rows() -> Rows:
+        try:
+            for values in it:
+                texts = [_cell_text(v) for v in values]
+                if not any(t.strip() for t in texts):
+                    continue
+                yield dict(zip(header, texts))
+        finally:
+            wb.close()
+
+    return header, rows()
+
+
+def open_table(file) -> Tuple[List[str], Rows]:
+    """依副檔名選擇讀取方式；file 為 werkzeug FileStorage。"""
+    ext = file.filename.lower().rsplit('.', 1)[-1]
+    if ext == "csv":
+        return open_csv(file.stream)
+    return open_excel(file.stream)
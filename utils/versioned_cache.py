@@ -0,0 +1,75 @@
+# utils/versioned_cache.py
+# -*- coding: utf-8 -*-
+"""
+跨 worker 失效的行程內快取。
+
+每個快取對應 instance/<name>.version 檔：寫入端呼叫 invalidate() 更新檔案 mtime，
+讀取端每次只做一次 os.stat 比對版本，有變動才重新呼叫 loader 載入。
+另有 max_age 秒的保底重載，避免多台主機不共用檔案時永久過期。
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Callable
+
+from flask import current_app, has_app_context
+
+
+class VersionedCache:
+    def __init__(self, name: str, loader: Callable[[], Any], max_age: float = 60):
+        self.name = name
+        self.loader = loader
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._value: Any = None
+        self._loaded = False
+        self._version: int | None = None
+        self._loaded_at = 0.0
+
+    def _version_path(self) -> str | None:
+        if not has_app_context():
+            return None
+        return os.path.join(current_app.instance_path, f"{self.name}.version")
+
+    def _current_version(self) -> int:
+        path = self._version_path()
+        if not path:
+            return 0
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return 0
+
+    def get(self) -> Any:
+        if (self._loaded
+                and self._version == self._current_version()
+                and time.monotonic() - self._loaded_at < self.max_age):
+            return self._value
+
+        # 先取版本再載入：載入期間若有人更新，下次讀取會再重載
+        version = self._current_version()
+        value = self.loader()
+        with self._lock:
+            self._value = value
+            self._version = version
+            self._loaded_at = time.monotonic()
+            self._loaded = True
+        return value
+
+    def invalidate(self, broadcast: bool = True) -> None:
+        """清除本行程快取；broadcast=True 時同時通知其他 worker。"""
+        with self._lock:
+            self._loaded = False
+            self._value = None
+        if not broadcast:
+            return
+        path = self._version_path()
+        if not path:
+            return
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(str(time.time_ns()))
+        except OSError:
+            pass
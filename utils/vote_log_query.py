@@ -0,0 +1,90 @@
+# utils/vote_log_query.py
+# -*- coding: utf-8 -*-
+"""
+投票明細（誰投給誰）查詢共用工具：篩選條件、keyset 分頁。
+排序固定為 (phase_id, id)，對應 votes 表上的 ix_votes_phase_id_id 索引。
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Tuple
+
+from sqlalchemy import and_, func, or_
+
+from models import db, Candidate, User, Vote, VotePhase
+
+
+def vote_log_query():
+    """Vote × VotePhase × User × Candidate，只選明細需要的欄位。"""
+    return (
+        db.session.query(
+            Vote.id,
+            Vote.phase_id,
+            VotePhase.name.label("phase"),
+            User.username.label("voter"),
+            Candidate.class_name.label("target_class"),
+            Candidate.parent_name.label("target_name"),
+        )
+        .join(VotePhase, Vote.phase_id == VotePhase.id)
+        .join(User, Vote.voter_id == User.id)
+        .join(Candidate, Vote.candidate_id == Candidate.id)
+    )
+
+
+# --------------------------------------------------
+# 🔍 篩選條件
+# --------------------------------------------------
+def parse_phase_id(value: str) -> int | None:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def apply_vote_log_filters(q, phase_id: int | None = None, voter: str = "", class_name: str = ""):
+    """
+    - phase_id：指定階段
+    - voter：投票帳號開頭（例如 wh-01）
+    - class_name：候選人班級開頭（例如 6 → 六年級各班）
+    """
+    if phase_id is not None:
+        q = q.filter(Vote.phase_id == phase_id)
+    if voter:
+        q = q.filter(User.username.startswith(voter, autoescape=True))
+    if class_name:
+        q = q.filter(Candidate.class_name.startswith(class_name, autoescape=True))
+    return q
+
+
+def count_vote_logs(phase_id: int | None = None, voter: str = "", class_name: str = "") -> int:
+    q = db.session.query(func.count(Vote.id))
+    if voter:
+        q = q.join(User, Vote.voter_id == User.id)
+    if class_name:
+        q = q.join(Candidate, Vote.candidate_id == Candidate.id)
+    return apply_vote_log_filters(q, phase_id, voter, class_name).scalar() or 0
+
+
+# --------------------------------------------------
+# 📄 keyset 分頁（依 phase_id, id）
+# --------------------------------------------------
+def parse_cursor(after_phase: str, after_id: str) -> Tuple[int, int] | None:
+    if not after_phase or not after_id:
+        return None
+    try:
+        return int(after_phase), int(after_id)
+    except ValueError:
+        return None
+
+
+def apply_keyset(q, cursor: Tuple[int, int] | None):
+    """依 (phase_id, id) 遞增排序；有 cursor 時只取 cursor 之後的資料（不使用 OFFSET）。"""
+    if cursor:
+        phase_id, last_id = cursor
+        q = q.filter(or_(Vote.phase_id > phase_id, and_(Vote.phase_id == phase_id, Vote.id > last_id)))
+    return q.order_by(Vote.phase_id.asc(), Vote.id.asc())
+
+
+def make_cursor(row) -> Dict[str, Any] | None:
+    if row is None:
+        return None
+    return {"phase": row.phase_id, "id": row.id}
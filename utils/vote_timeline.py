@@ -0,0 +1,175 @@
+# utils/vote_timeline.py
+# -*- coding: utf-8 -*-
+"""
+每分鐘投票趨勢：以 Vote.cast_at 在 SQL 端依分鐘分組（走 ix_votes_phase_id_cast_at），不載入個別選票。
+
+- 每分鐘票數與投票人數、累計投票率（/ 家長帳號數）
+- 各年級累計投票率：依投票家長自己的班級（User.class_name，沒有時用綁定候選人的班級），
+  每位家長只在第一次投票的那一分鐘計入，分母為該年級的家長帳號數
+- 以最近 FORECAST_WINDOW 分鐘的速度估計全部投完還需幾分鐘
+- 依階段快取 VOTE_TIMELINE_TTL 秒，多個監票畫面共用同一份結果
+"""
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import case, func
+
+from models import db, Candidate, User, Vote
+from utils.helpers import GRADE_ORDER, get_grade_from_class
+from utils.phase_service import get_phase
+
+VOTE_TIMELINE_TTL = 5       # 秒
+FORECAST_WINDOW = 10        # 分鐘
+MAX_BUCKETS = 24 * 60       # 最多顯示最近一天份（更早的併入起始值）
+BUCKET_FORMAT = "%Y-%m-%d %H:%M"
+UNASSIGNED_GRADE = "未分班"  # 與 utils.account_generator 的未分班帳號一致
+
+_lock = threading.Lock()
+_cache: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+
+
+def minute_bucket(column):
+    """把時間欄位截到分鐘，回傳 'YYYY-MM-DD HH:MM' 字串（依資料庫方言）。"""
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        return func.to_char(column, "YYYY-MM-DD HH24:MI")
+    if dialect in ("mysql", "mariadb"):
+        return func.date_format(column, "%Y-%m-%d %H:%i")
+    return func.strftime(BUCKET_FORMAT, column)
+
+
+def _minutes(first: str, last: str) -> List[str]:
+    """first ~ last 之間每一分鐘（含頭尾、最多 MAX_BUCKETS 個），讓沒有人投票的分鐘也顯示 0。"""
+    start = datetime.strptime(first, BUCKET_FORMAT)
+    end = datetime.strptime(last, BUCKET_FORMAT)
+    start = max(start, end - timedelta(minutes=MAX_BUCKETS - 1))
+    count = int((end - start).total_seconds() // 60) + 1
+    return [(start + timedelta(minutes=i)).strftime(BUCKET_FORMAT) for i in range(count)]
+
+
+def _voter_class():
+    """家長的班級；帳號沒填時用綁定候選人的班級。需搭配 outerjoin(Candidate, User.candidate_id)。"""
+    return func.coalesce(User.class_name, Candidate.class_name)
+
+
+def _grade(class_name) -> str:
+    return get_grade_from_class(class_name) if class_name else UNASSIGNED_GRADE
+
+
+def _load(phase_id: int) -> Dict[str, Any]:
+    bucket = minute_bucket(Vote.cast_at).label("bucket")
+
+    # 1) 每分鐘票數
+    per_minute = dict(
+        db.session.query(bucket, func.count(Vote.id))
+        .filter(Vote.phase_id == phase_id, Vote.cast_at.isnot(None))
+        .group_by(bucket).all()
+    )
+
+    # 2) 每位家長第一次投票的分鐘（有 cast_at 為空的舊選票時當作起始值，bucket 為 NULL）
+    first = db.session.query(
+        Vote.voter_id.label("voter_id"),
+        case((func.max(case((Vote.cast_at.is_(None), 1), else_=0)) == 1, None),
+             else_=minute_bucket(func.min(Vote.cast_at))).label("bucket"),
+    ).filter(Vote.phase_id == phase_id).group_by(Vote.voter_id).subquery()
+
+    # 3) 每分鐘 × 家長班級的新投票人數
+    voter_class = _voter_class().label("class_name")
+    per_class = db.session.query(first.c.bucket, voter_class, func.count()) \
+        .select_from(first) \
+        .outerjoin(User, User.id == first.c.voter_id) \
+        .outerjoin(Candidate, Candidate.id == User.candidate_id) \
+        .group_by(first.c.bucket, voter_class).all()
+
+    # 4) 沒有 cast_at 的舊選票數；各年級家長帳號數當投票率分母
+    untimed_ballots = db.session.query(func.count(Vote.id)) \
+        .filter(Vote.phase_id == phase_id, Vote.cast_at.is_(None)).scalar()
+    registered_by_grade: Dict[str, int] = {}
+    for class_name, n in db.session.query(voter_class, func.count(User.id)) \
+            .outerjoin(Candidate, Candidate.id == User.candidate_id).group_by(voter_class):
+        grade = _grade(class_name)
+        registered_by_grade[grade] = registered_by_grade.get(grade, 0) + int(n)
+    registered = sum(registered_by_grade.values())
+
+    new_voters: Dict[str | None, int] = {}
+    grade_minute: Dict[str, Dict[str | None, int]] = {}
+    for b, class_name, n in per_class:
+        new_voters[b] = new_voters.get(b, 0) + int(n)
+        counts = grade_minute.setdefault(_grade(class_name), {})
+        counts[b] = counts.get(b, 0) + int(n)
+
+    # 開啟中的階段畫到現在這一分鐘，停頓時速度與預估才會跟著下降
+    phase = get_phase(phase_id)
+    timed = [b for b in new_voters if b is not None]
+    last = max(timed) if timed else None
+    if last and phase and phase.is_open:
+        last = max(last, datetime.now().strftime(BUCKET_FORMAT))
+    minutes = _minutes(min(timed), last) if timed else []
+    first_minute = minutes[0] if minutes else ""
+
+    def _before_first(counts: Dict[str | None, int]) -> int:
+        """起始值：沒有時間的舊資料 + 超過 MAX_BUCKETS 之前的分鐘。"""
+        return sum(n for m, n in counts.items() if m is None or m < first_minute)
+
+    ballots, voters, cumulative, turnout = [], [], [], []
+    total_voters = _before_first(new_voters)
+    for m in minutes:
+        v = new_voters.get(m, 0)
+        total_voters += v
+        ballots.append(int(per_minute.get(m, 0)))
+        voters.append(v)
+        cumulative.append(total_voters)
+        turnout.append(round(total_voters * 100 / registered, 1) if registered else 0.0)
+
+    grades, grade_turnout = {}, {}
+    order = lambda g: GRADE_ORDER.index(g) if g in GRADE_ORDER else len(GRADE_ORDER)
+    for grade in sorted(set(grade_minute) | set(registered_by_grade), key=order):
+        counts = grade_minute.get(grade, {})
+        running, series = _before_first(counts), []
+        for m in minutes:
+            running += counts.get(m, 0)
+            series.append(running)
+        grades[grade] = series
+        accounts = registered_by_grade.get(grade, 0)
+        grade_turnout[grade] = [round(n * 100 / accounts, 1) if accounts else 0.0 for n in series]
+
+    # 最近 FORECAST_WINDOW 分鐘的平均速度（人 / 分鐘）
+    recent = voters[-FORECAST_WINDOW:]
+    rate = sum(recent) / len(recent) if recent else 0.0
+    remaining = max(registered - total_voters, 0)
+
+    return {
+        "phase_id": phase_id,
+        "minutes": [m[-5:] for m in minutes],
+        "ballots": ballots,
+        "voters": voters,
+        "cumulative_voters": cumulative,
+        "turnout": turnout,
+        "grades": grades,
+        "grade_turnout": grade_turnout,
+        "grade_registered": {g: registered_by_grade.get(g, 0) for g in grades},
+        "untimed_ballots": int(untimed_ballots or 0),
+        "total_voters": total_voters,
+        "registered_users": registered,
+        "voters_per_minute": round(rate, 2),
+        "eta_minutes": round(remaining / rate) if rate else None,
+        "generated_at": time.time(),
+    }
+
+
+def get_vote_timeline(phase_id: int) -> Dict[str, Any]:
+    """指定階段的每分鐘投票趨勢，快取 VOTE_TIMELINE_TTL 秒。"""
+    now = time.monotonic()
+    with _lock:
+        hit = _cache.get(phase_id)
+    if hit and now - hit[0] < VOTE_TIMELINE_TTL:
+        return hit[1]
+
+    data = _load(phase_id)
+    with _lock:
+        _cache[phase_id] = (now, data)
+    return data